@@ -0,0 +1,101 @@
+"""Measures the encode and parse throughput of every entry codec.
+
+Synthetic raw entries are encoded by each codec available (orjson is skipped if it isn't installed), then decoded
+again, and the size of the encoded entries is reported along with the throughput.
+
+Usage:
+    $ python benchmarks/codecs_throughput.py [--entries N] [--repeat N] [--seed SEED]
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from whereis import codec  # noqa: E402
+
+
+def synthetic_entries(count: int, seed: int) -> List[Dict[str, Any]]:
+    """Generates synthetic raw entries.
+
+    Args:
+        count: The number of entries.
+        seed: The random seed.
+
+    Returns:
+        The raw entries.
+    """
+    generator: random.Random = random.Random(seed)
+    entries: List[Dict[str, Any]] = []
+    for index in range(count):
+        name: str = f"tool{index}"
+        config: str = generator.choice(["config", "settings.json", "init.lua", f"{name}.conf"])
+        entries.append(
+            {
+                "name": name,
+                "locations": [["{HOME}", ".config", name, config], ["{HOME}", f".{name}rc"], ["etc", name]],
+            }
+        )
+    return entries
+
+
+def best(function: Callable[[], Any], repeat: int) -> float:
+    """Times a function.
+
+    Notes:
+        The garbage collector is disabled while timing, like timeit does, so that the many small objects decoded
+        don't make the collections dominate the timings.
+
+    Args:
+        function: The function.
+        repeat: How many times it's timed.
+
+    Returns:
+        The fastest time, in seconds.
+    """
+    timings: List[float] = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start: float = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return min(timings)
+
+
+def main() -> None:
+    """Main entry point.
+
+    Returns:
+        Nothing.
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000, help="The number of entries.")
+    parser.add_argument("--repeat", type=int, default=5, help="How many times each codec is timed.")
+    parser.add_argument("--seed", type=int, default=0, help="The random seed.")
+    arguments: argparse.Namespace = parser.parse_args()
+
+    entries: List[Dict[str, Any]] = synthetic_entries(arguments.entries, arguments.seed)
+    print(f"{arguments.entries} entries, default json codec: {codec.json_codec().name}")
+    for entry_codec in codec.available():
+        encoded: List[bytes] = [entry_codec.encode(entry) for entry in entries]
+        assert [entry_codec.decode(data) for data in encoded] == entries
+        encode: float = best(lambda: [entry_codec.encode(entry) for entry in entries], arguments.repeat)
+        decode: float = best(lambda: [entry_codec.decode(data) for data in encoded], arguments.repeat)
+        size: int = sum(len(data) for data in encoded)
+        print(
+            f"  {entry_codec.name:<7} parse {len(entries) / decode:12,.0f} entries/s "
+            f"({size / decode / 2 ** 20:7.1f} MiB/s)   encode {len(entries) / encode:12,.0f} entries/s   "
+            f"{size / len(entries):6.1f} bytes/entry"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measures how many bytes an Entry takes in memory.
+
+Usage:
+    $ python benchmarks/entry_memory.py [--entries N]
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from whereis import Entry  # noqa: E402
+
+
+def synthetic_json(count: int) -> str:
+    """Generates the json of a synthetic catalog.
+
+    Args:
+        count: The number of entries.
+
+    Returns:
+        A json array of raw entries.
+    """
+    return json.dumps(
+        [
+            {
+                "name": f"tool{index}",
+                "locations": [
+                    ["{HOME}", ".config", f"tool{index}"],
+                    ["{HOME}", f".tool{index}rc"],
+                    ["etc", f"tool{index}", "config"],
+                ],
+            }
+            for index in range(count)
+        ]
+    )
+
+
+def measure(count: int) -> None:
+    """Prints the bytes taken per entry, before and after resolving their locations.
+
+    Args:
+        count: The number of entries.
+
+    Returns:
+        Nothing.
+    """
+    catalog: str = synthetic_json(count)
+    gc.collect()
+    tracemalloc.start()
+    # parse the json like the database does, so that every string is a new object
+    raw_entries: list = json.loads(catalog)
+    entries: List[Entry] = [
+        Entry(raw_entry["name"], *raw_entry["locations"]) for raw_entry in raw_entries
+    ]
+    del raw_entries
+    gc.collect()
+    parsed, _ = tracemalloc.get_traced_memory()
+    for entry in entries:
+        entry.locations
+    gc.collect()
+    resolved, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"entries:                    {count}")
+    print(f"bytes per entry:            {parsed / count:.0f}")
+    print(f"bytes per resolved entry:   {resolved / count:.0f}")
+
+
+def main() -> None:
+    """Main entry point.
+
+    Returns:
+        Nothing.
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000, help="The number of entries.")
+    measure(parser.parse_args().entries)
+
+
+if __name__ == "__main__":
+    main()
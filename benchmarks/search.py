@@ -0,0 +1,84 @@
+"""Measures how long searching a large database takes.
+
+A synthetic database is written to a temporary folder, then the search index is compiled, and queries are run both
+from a new Database object (like a new `where-is search` process would) and from a warm one.
+
+Usage:
+    $ python benchmarks/search.py [--entries N] [--seed SEED]
+"""
+import argparse
+import json
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from whereis import Database  # noqa: E402
+
+QUERIES: List[str] = ["nvim", "t", "rc", "config", "settings.json", "abcdef", "qwertyuiop"]
+
+
+def write_database(location: Path, count: int, seed: int) -> None:
+    """Writes a synthetic database with random entry names.
+
+    Args:
+        location: The database location.
+        count: The number of entries.
+        seed: The random seed.
+
+    Returns:
+        Nothing.
+    """
+    generator: random.Random = random.Random(seed)
+    location.mkdir()
+    for index in range(count):
+        name: str = "".join(
+            generator.choice(string.ascii_lowercase) for _ in range(generator.randint(3, 10))
+        )
+        config: str = generator.choice(["config", "settings.json", "init.lua", f"{name}.conf"])
+        raw_entry: dict = {
+            "name": f"{name}{index}",
+            "locations": [["{HOME}", ".config", name, config], ["{HOME}", f".{name}rc"], ["etc", name]],
+        }
+        (location / f"{name}{index}.json").write_text(json.dumps(raw_entry))
+
+
+def main() -> None:
+    """Main entry point.
+
+    Returns:
+        Nothing.
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000, help="The number of entries.")
+    parser.add_argument("--seed", type=int, default=0, help="The random seed of the entry names.")
+    arguments: argparse.Namespace = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        location: Path = Path(folder) / "database"
+        write_database(location, arguments.entries, arguments.seed)
+        _ = Database(location).index
+
+        start: float = time.perf_counter()
+        Database(location).search("")
+        print(f"entries:           {arguments.entries}")
+        print(f"compile:           {(time.perf_counter() - start) * 1000:8.1f} ms")
+        start = time.perf_counter()
+        Database(location).search(QUERIES[0])
+        print(f"cold query:        {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+        database: Database = Database(location)
+        database.search("")
+        for query in QUERIES:
+            start = time.perf_counter()
+            results: int = len(database.search(query))
+            print(f"{query!r:<18} {(time.perf_counter() - start) * 1000:8.1f} ms  {results} results")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Measures the wall-clock startup time of `where-is find`.
+
+Every command is run in a new interpreter, like a user would, against a temporary database. The results can be
+appended to a json lines file to track the startup time across releases. With --max-ms, the benchmark fails if
+`find --format tsv` is slower than that, or if it imports one of the modules only other commands need.
+
+Usage:
+    $ python benchmarks/startup.py [--runs N] [--importtime] [--record FILE] [--max-ms MS]
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from whereis import Database, version  # noqa: E402
+
+COMMANDS: Dict[str, List[str]] = {
+    "python": ["-c", "pass"],
+    "find --format tsv": ["-m", "whereis", "find", "grub", "--format", "tsv"],
+    "find": ["-m", "whereis", "find", "grub"],
+    "--help": ["-m", "whereis", "--help"],
+}
+# Modules which only other commands need, and which find mustn't import.
+SLOW_IMPORTS: Tuple[str, ...] = (
+    "concurrent.futures",
+    "hashlib",
+    "orjson",
+    "tarfile",
+    "typer",
+    "whereis.backup",
+    "whereis.discover",
+    "whereis.fingerprint",
+    "whereis.owner",
+    "whereis.search",
+    "whereis.transfer",
+    "whereis.watch",
+)
+
+
+def run(arguments: List[str], location: Path, importtime: bool = False) -> subprocess.CompletedProcess:
+    """Runs a command in a new interpreter.
+
+    Args:
+        arguments: The interpreter arguments.
+        location: The database location.
+        importtime: Run with `-X importtime`?
+
+    Returns:
+        The completed process.
+    """
+    if arguments[:2] == ["-m", "whereis"]:
+        arguments = arguments[:2] + ["--database-location", str(location)] + arguments[2:]
+    return subprocess.run(
+        [sys.executable, *(["-X", "importtime"] if importtime else []), *arguments],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        cwd=str(Path(__file__).parent.parent),
+    )
+
+
+def measure(arguments: List[str], location: Path, runs: int) -> Dict[str, float]:
+    """Measures the wall-clock time of a command.
+
+    Args:
+        arguments: The interpreter arguments.
+        location: The database location.
+        runs: How many times the command is run.
+
+    Returns:
+        The minimum and median time in milliseconds.
+    """
+    timings: List[float] = []
+    for _ in range(runs):
+        start: float = time.perf_counter()
+        run(arguments, location)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"min_ms": min(timings), "median_ms": statistics.median(timings)}
+
+
+def imported_modules(location: Path) -> List[Tuple[int, str]]:
+    """Lists the modules imported during `where-is find`.
+
+    Args:
+        location: The database location.
+
+    Returns:
+        The cumulative import time of each module in microseconds, and its name indented by its depth.
+    """
+    imports: List[Tuple[int, str]] = []
+    for line in run(COMMANDS["find --format tsv"], location, importtime=True).stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        imports.append((int(cumulative), module.rstrip()))
+    return imports
+
+
+def print_importtime(location: Path, top: int = 15) -> None:
+    """Prints the modules taking the most cumulative time to import during `where-is find`.
+
+    Args:
+        location: The database location.
+        top: How many modules are printed.
+
+    Returns:
+        Nothing.
+    """
+    print("\nslowest imports (cumulative, us):")
+    for cumulative, module in sorted(imported_modules(location), reverse=True)[:top]:
+        print(f"  {cumulative:>8} {module}")
+
+
+def check(location: Path, result: Dict[str, float], max_ms: float) -> List[str]:
+    """Checks that `where-is find` starts fast enough.
+
+    Args:
+        location: The database location.
+        result: The timings of `find --format tsv`.
+        max_ms: The slowest startup allowed, in milliseconds.
+
+    Returns:
+        The failures, empty if there aren't any.
+    """
+    failures: List[str] = []
+    if result["min_ms"] > max_ms:
+        failures.append(f"find took {result['min_ms']:.1f} ms, more than {max_ms:.1f} ms")
+    modules: Set[str] = {module.strip() for _, module in imported_modules(location)}
+    failures.extend(f"find imported {module}" for module in SLOW_IMPORTS if module in modules)
+    return failures
+
+
+def main() -> None:
+    """Main entry point.
+
+    Returns:
+        Nothing.
+
+    Raises:
+        SystemExit: If --max-ms is given and find starts too slowly.
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="How many times each command is run.")
+    parser.add_argument("--importtime", action="store_true", help="Print the slowest imports of find.")
+    parser.add_argument("--record", type=Path, help="Append the results to a json lines file.")
+    parser.add_argument("--max-ms", type=float, help="Fail if find --format tsv takes longer than this.")
+    arguments: argparse.Namespace = parser.parse_args()
+    failures: List[str] = []
+
+    with tempfile.TemporaryDirectory() as folder:
+        location: Path = Path(folder) / "database"
+        Database(location).create()
+        run(COMMANDS["find"], location)  # warm up the filesystem cache and the compiled index
+        results: Dict[str, Dict[str, float]] = {
+            name: measure(command, location, arguments.runs) for name, command in COMMANDS.items()
+        }
+        for name, result in results.items():
+            print(f"{name:<20} min {result['min_ms']:7.1f} ms   median {result['median_ms']:7.1f} ms")
+        if arguments.importtime:
+            print_importtime(location)
+        if arguments.max_ms is not None:
+            failures = check(location, results["find --format tsv"], arguments.max_ms)
+
+    if arguments.record:
+        with arguments.record.open("a") as file:
+            record: dict = {
+                "version": version,
+                "python": platform.python_version(),
+                "time": time.time(),
+                "results": results,
+            }
+            file.write(json.dumps(record) + "\n")
+    if failures:
+        sys.exit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Measures the time and peak memory of the hot paths of where-is on synthetic databases.
+
+A synthetic database is generated in a temporary folder for every size, then each case is run a few times, and once
+more under tracemalloc for its peak memory. Nothing needs the network. The results can be saved as json, and two
+saved runs compared to catch regressions.
+
+Usage:
+    $ python benchmarks/suite.py run [--sizes N ...] [--storage folder|journal] [--repeat N] [--save FILE]
+    $ python benchmarks/suite.py compare BASELINE RESULTS [--threshold PERCENT]
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from whereis import Database, Entry, commands, storage, version  # noqa: E402
+
+SIZES: List[int] = [100, 10_000, 1_000_000]
+# Rendering the database table lists every entry, it's only measured up to this size.
+RICH_LIMIT: int = 10_000
+# The mtime the generated databases are set to.
+OLD_NS: int = 1_000_000_000_000_000_000
+
+Results = Dict[str, Dict[str, Dict[str, float]]]
+
+
+def synthetic_entries(count: int, seed: int) -> Iterator[Entry]:
+    """Generates synthetic entries, one at a time.
+
+    Args:
+        count: The number of entries.
+        seed: The random seed.
+
+    Returns:
+        The entries.
+    """
+    generator: random.Random = random.Random(seed)
+    for index in range(count):
+        name: str = f"tool{index}"
+        config: str = generator.choice(["config", "settings.json", "init.lua", f"{name}.conf"])
+        yield Entry(name, ["{HOME}", ".config", name, config], ["{HOME}", f".{name}rc"], ["etc", name])
+
+
+def measure(function: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Measures a case.
+
+    Args:
+        function: The case.
+        repeat: How many times the case is timed, before it's run once more under tracemalloc.
+
+    Returns:
+        The minimum and median time in milliseconds, and the peak memory in KiB.
+    """
+    timings: List[float] = []
+    for _ in range(repeat):
+        gc.collect()
+        start: float = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"min_ms": min(timings), "median_ms": statistics.median(timings), "peak_kib": peak / 1024}
+
+
+def cases(location: Path, size: int, operations: int, seed: int) -> Dict[str, Callable[[], Any]]:
+    """Builds the cases for a database.
+
+    Args:
+        location: The database location.
+        size: The number of entries of the database.
+        operations: How many entries are added, removed, looked up or probed by a case.
+        seed: The random seed of the looked up names.
+
+    Returns:
+        The cases keyed by their name.
+    """
+    from rich.console import Console
+
+    warm: Database = Database(location, catalog=False)
+    warm.entries
+    names: List[str] = [f"tool{index}" for index in random.Random(seed).sample(range(size), min(size, operations))]
+    sample: List[Entry] = [warm.get(name) for name in names]  # type: ignore
+    added: List[List[Entry]] = []
+    console: Console = Console(file=io.StringIO(), width=120)
+
+    def add() -> None:
+        batch: List[Entry] = [Entry(f"added{len(added)}-{index}", ["etc", "added"]) for index in range(operations)]
+        for entry in batch:
+            warm.add(entry)
+        added.append(batch)
+
+    def remove() -> None:
+        for entry in added.pop():
+            warm.remove(entry)
+
+    def get_entry(database: Database) -> None:
+        for name in names:
+            commands.get_entry(name, database)
+
+    def rich(renderable: Any) -> None:
+        console.file = io.StringIO()
+        console.print(renderable)
+
+    # the cases changing the database come last, so the other ones run against the generated database
+    return {
+        "entries (cold)": lambda: Database(location, catalog=False).entries,
+        "entries (warm)": lambda: warm.entries,
+        "get_entry (cold)": lambda: get_entry(Database(location, catalog=False)),
+        "get_entry (warm)": lambda: get_entry(warm),
+        "_format_path": lambda: [
+            Entry._format_path(Path("{HOME}", ".config", name, "config")) for name in names
+        ],
+        "locations_exists": lambda: [entry.locations_exists() for entry in sample],
+        "rich (entry)": lambda: rich(sample[0]),
+        **({"rich (database)": lambda: rich(warm)} if size <= RICH_LIMIT else {}),
+        "add": add,
+        "remove": remove,
+    }
+
+
+def run(sizes: List[int], layout: str, repeat: int, operations: int, seed: int) -> Results:
+    """Runs every case against a synthetic database of each size.
+
+    Args:
+        sizes: The numbers of entries of the databases.
+        layout: The storage layout of the databases.
+        repeat: How many times each case is timed.
+        operations: How many entries are added, removed, looked up or probed by a case.
+        seed: The random seed.
+
+    Returns:
+        The results keyed by size, then by case.
+    """
+    results: Results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            location: Path = Path(folder) / "database"
+            database: Database = Database(location, catalog=False)
+            database.create(layout)
+            start: float = time.perf_counter()
+            database.bulk_add(synthetic_entries(size, seed))
+            # a folder modified right before its snapshot is listed again on every check, which isn't the usual case
+            os.utime(str(location), ns=(OLD_NS, OLD_NS))
+            database.index
+            print(f"\n{size} entries ({layout}), generated in {time.perf_counter() - start:.1f} s")
+            results[str(size)] = {}
+            for name, function in cases(location, size, operations, seed).items():
+                result: Dict[str, float] = measure(function, repeat)
+                results[str(size)][name] = result
+                print(
+                    f"  {name:<18} min {result['min_ms']:9.2f} ms   median {result['median_ms']:9.2f} ms   "
+                    f"peak {result['peak_kib']:10.1f} KiB"
+                )
+            database.storage.close()
+    return results
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> bool:
+    """Prints how each case changed between two runs.
+
+    Notes:
+        The median times and the peak memory are compared, only the cases measured in both runs are.
+
+    Args:
+        baseline: The saved baseline run.
+        current: The saved run to compare to it.
+        threshold: How many percent slower or bigger a case has to be to be a regression.
+
+    Returns:
+        True if no case regressed, else False.
+    """
+    passed: bool = True
+    for size, current_cases in current["results"].items():
+        baseline_cases: Dict[str, Dict[str, float]] = baseline["results"].get(size, {})
+        print(f"\n{size} entries")
+        for name, result in current_cases.items():
+            old: Optional[Dict[str, float]] = baseline_cases.get(name)
+            if old is None:
+                continue
+            changes: List[str] = []
+            for metric in ("median_ms", "peak_kib"):
+                change: float = (result[metric] - old[metric]) / old[metric] * 100 if old[metric] else 0.0
+                regressed: bool = change > threshold
+                passed = passed and not regressed
+                changes.append(
+                    f"{metric} {old[metric]:10.2f} -> {result[metric]:10.2f} ({change:+6.1f}%)"
+                    + (" REGRESSION" if regressed else "")
+                )
+            print(f"  {name:<18} " + "   ".join(changes))
+    return passed
+
+
+def main() -> None:
+    """Main entry point.
+
+    Returns:
+        Nothing.
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser: argparse.ArgumentParser = subparsers.add_parser("run", help="Run the benchmarks.")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="The numbers of entries.")
+    run_parser.add_argument("--storage", choices=storage.STORAGES, default=storage.FOLDER, help="The layout.")
+    run_parser.add_argument("--repeat", type=int, default=5, help="How many times each case is timed.")
+    run_parser.add_argument(
+        "--operations", type=int, default=100, help="How many entries a case adds, removes, looks up or probes."
+    )
+    run_parser.add_argument("--seed", type=int, default=0, help="The random seed.")
+    run_parser.add_argument("--save", type=Path, help="Save the results to a json file.")
+    compare_parser: argparse.ArgumentParser = subparsers.add_parser("compare", help="Compare two saved runs.")
+    compare_parser.add_argument("baseline", type=Path, help="The saved baseline run.")
+    compare_parser.add_argument("results", type=Path, help="The saved run to compare to it.")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=20.0, help="How many percent slower or bigger is a regression."
+    )
+    arguments: argparse.Namespace = parser.parse_args()
+
+    if arguments.command == "compare":
+        baseline: Dict[str, Any] = json.loads(arguments.baseline.read_text())
+        current: Dict[str, Any] = json.loads(arguments.results.read_text())
+        sys.exit(0 if compare(baseline, current, arguments.threshold) else 1)
+
+    results: Results = run(arguments.sizes, arguments.storage, arguments.repeat, arguments.operations, arguments.seed)
+    if arguments.save:
+        record: Dict[str, Any] = {
+            "version": version,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "time": time.time(),
+            "storage": arguments.storage,
+            "repeat": arguments.repeat,
+            "operations": arguments.operations,
+            "results": results,
+        }
+        arguments.save.write_text(json.dumps(record, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
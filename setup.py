@@ -13,7 +13,7 @@ setuptools.setup(
     long_description=pathlib.Path("README.md").read_text().strip(),
     author="ALinuxPerson",
     author_email="micheal02052007@gmail.com",
-    python_requires=">=3.6.0",
+    python_requires=">=3.7.0",
     packages=setuptools.find_packages(
         exclude=["tests", "*.tests", "*.tests.*", "tests.*"]
     ),
@@ -31,7 +31,6 @@ setuptools.setup(
         "Operating System :: POSIX :: Linux",
         "Operating System :: Microsoft :: Windows :: Windows 10",
         "Operating System :: MacOS :: MacOS X",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Topic :: Software Development :: Libraries :: Python Modules",
@@ -0,0 +1,150 @@
+"""Testing for whereis.backup"""
+from whereis import Database, Entry
+from pathlib import Path
+import pytest
+import shutil
+import string
+import random
+import tarfile
+import os
+
+
+def generate_random_string(max_chars: int = 8) -> str:
+    """Generates a random string.
+
+    Args:
+        max_chars: The maximum characters the string should have.
+
+    Returns:
+        Nothing.
+    """
+    return "".join([random.choice(string.ascii_letters) for _ in range(max_chars)])
+
+
+def _backed_up(destination: Path, root: Path) -> dict:
+    """Reads the files backed up from a folder.
+
+    Args:
+        destination: The mirrored folder or the archive.
+        root: The folder the files were backed up from.
+
+    Returns:
+        The content of each file, or the target of each symlink, keyed by their path relative to the folder.
+    """
+    prefix: str = "/".join(root.parts[1:]) + "/"
+    files = {}
+    if destination.is_dir():
+        for folder, folders, names in os.walk(destination / prefix):
+            for name in folders + names:
+                path: Path = Path(folder, name)
+                relative: str = path.relative_to(destination / prefix).as_posix()
+                if path.is_symlink():
+                    files[relative] = os.readlink(path)
+                elif path.is_file():
+                    files[relative] = path.read_bytes()
+        return files
+    with tarfile.open(destination) as archive:
+        for member in archive:
+            relative = member.name[len(prefix) :]
+            files[relative] = member.linkname if member.issym() else archive.extractfile(member).read()
+    return files
+
+
+@pytest.mark.parametrize("name", ["backup", "backup.tar", "backup.tar.gz"])
+def test_backup(name: str) -> None:
+    """Test backing up the config files of entries.
+
+    Failure:
+        If a file or a symlink to a folder isn't backed up, or differs from the source
+        If unchanged files are backed up again, or a changed one isn't
+        If a big file isn't backed up whole
+        If an entry whose locations can't be formatted isn't reported
+
+    Returns:
+        Nothing.
+    """
+    root: Path = Path().home() / generate_random_string()
+    destination: Path = Path().home() / generate_random_string() / name
+    sources = {
+        "nvim/init.lua": b"init",
+        "nvim/lua/plugins.lua": b"plugins",
+        "nvim/data.bin": os.urandom(3 * 1024 * 1024 + 7),
+        "zshrc": b"zshrc",
+    }
+    old: int = 1_000_000_000_000_000_000
+    for file, content in sources.items():
+        (root / file).parent.mkdir(parents=True, exist_ok=True)
+        (root / file).write_bytes(content)
+        os.utime(root / file, ns=(old, old))
+    (root / "zshrc.d").mkdir()
+    (root / "nvim" / "shared").symlink_to(root / "zshrc.d")
+    entries = [
+        Entry("nvim", [str(root), "nvim"], [str(root), "zshrc"]),
+        Entry("zsh", [str(root), "zshrc"], [str(root), "missing"]),
+        Entry("broken", ["{NOT_A_PLACEHOLDER}", "config"]),
+    ]
+    expected = {**sources, "nvim/shared": str(root / "zshrc.d")}
+
+    try:
+        with Database(Path().home() / generate_random_string()) as database:
+            result = database.backup(destination, entries, workers=2)
+            assert (result.copied, result.skipped) == (5, 0)
+            assert result.size == sum(len(content) for content in sources.values())
+            assert list(result.failed) == ["broken"]
+            backed_up = _backed_up(destination, root)
+            assert {file: backed_up[file] for file in expected} == expected
+
+            result = database.backup(destination, entries, workers=2)
+            if name.endswith(".gz"):
+                assert (result.copied, result.skipped) == (5, 0)
+            else:
+                assert (result.copied, result.skipped) == (0, 5)
+
+            (root / "nvim" / "init.lua").write_bytes(b"changed")
+            os.utime(root / "nvim" / "init.lua", ns=(old + 1, old + 1))
+            result = database.backup(destination, entries, workers=2)
+            assert result.copied == (5 if name.endswith(".gz") else 1)
+            assert _backed_up(destination, root)["nvim/init.lua"] == b"changed"
+            assert not list(destination.parent.glob(".*"))
+    finally:
+        shutil.rmtree(root)
+        shutil.rmtree(destination.parent)
+
+
+def test_resume() -> None:
+    """Test resuming an archive left by an interrupted backup.
+
+    Failure:
+        If the complete members of the interrupted archive are read from the files again
+        If the archive is missing members, or has a truncated one
+
+    Returns:
+        Nothing.
+    """
+    root: Path = Path().home() / generate_random_string()
+    destination: Path = Path().home() / generate_random_string() / "backup.tar"
+    old: int = 1_000_000_000_000_000_000
+    root.mkdir()
+    for index in range(10):
+        (root / f"{index}.conf").write_bytes(str(index).encode() * 1000)
+        os.utime(root / f"{index}.conf", ns=(old, old))
+    entries = [Entry("tool", [str(root)])]
+
+    try:
+        with Database(Path().home() / generate_random_string()) as database:
+            database.backup(destination, entries)
+            # as if the backup had been interrupted in the middle of the fifth member
+            partial: Path = destination.with_name(f".{destination.name}.partial")
+            with tarfile.open(destination) as archive:
+                members = archive.getmembers()
+            os.replace(destination, partial)
+            os.truncate(partial, members[4].offset_data + 100)
+
+            result = database.backup(destination, entries)
+            assert (result.copied, result.skipped) == (6, 4)
+            assert not partial.exists()
+            backed_up = _backed_up(destination, root)
+            assert backed_up == {f"{index}.conf": str(index).encode() * 1000 for index in range(10)}
+    finally:
+        shutil.rmtree(root)
+        shutil.rmtree(destination.parent)
@@ -0,0 +1,159 @@
+"""Testing for whereis.cli"""
+from whereis import Database, cli, commands, daemon
+from whereis.cli import app
+from whereis.index import CACHE_FOLDER, SOCKET_NAME
+from typer.testing import CliRunner  # type: ignore
+from pathlib import Path
+import string
+import random
+import json
+import pytest
+import subprocess
+import sys
+
+runner: CliRunner = CliRunner()
+
+
+def generate_random_string(max_chars: int = 8) -> str:
+    """Generates a random string.
+
+    Args:
+        max_chars: The maximum characters the string should have.
+
+    Returns:
+        Nothing.
+    """
+    return "".join([random.choice(string.ascii_letters) for _ in range(max_chars)])
+
+
+def test_find_many() -> None:
+    """Test finding many entries at once.
+
+    Failure:
+        If an entry given as an argument or through stdin isn't found
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location):
+        result = runner.invoke(
+            app,
+            ["--database-location", str(location), "find", "grub", "--stdin"],
+            input="zsh\n\n",
+        )
+        assert result.exit_code == 0
+        assert "/etc/default/grub" in result.stdout
+        assert ".zshrc" in result.stdout
+
+
+def test_find_missing_exit_code() -> None:
+    """Test that finding many entries fails when one of them is missing.
+
+    Failure:
+        If the entries that exist aren't printed
+        If the exit code isn't 1, through typer or through the fast path
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location):
+        arguments = ["--database-location", str(location), "find", "grub", "nothing", "zsh", "--format", "tsv"]
+        result = runner.invoke(app, arguments)
+        assert result.exit_code == 1
+        assert "/etc/default/grub" in result.stdout
+        assert ".zshrc" in result.stdout
+        with pytest.raises(SystemExit) as exit_info:
+            commands.run_fast(arguments)
+        assert exit_info.value.code == 1
+
+
+def test_find_ndjson() -> None:
+    """Test finding entries with a machine-readable output.
+
+    Failure:
+        If each found entry isn't written as one json line with its probed locations
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location):
+        result = runner.invoke(
+            app,
+            ["--database-location", str(location), "find", "grub", "zsh", "--format", "ndjson"],
+        )
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        assert [record["name"] for record in records] == ["grub", "zsh"]
+        assert records[0]["locations"][0]["path"] == "/etc/default/grub"
+
+
+def test_find_fast_path(capsys) -> None:
+    """Test running find without the typer frontend.
+
+    Failure:
+        If a simple find invocation isn't run
+        If an invocation the fast path doesn't understand isn't handed to typer
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location):
+        assert commands.run_fast(
+            ["--database-location", str(location), "find", "--format=tsv", "grub"]
+        )
+        assert capsys.readouterr().out.splitlines()[1].startswith("grub\t/etc/default/grub")
+        assert not commands.run_fast(["find", "--help"])
+        assert not commands.run_fast(["find", "grub", "--format", "xml"])
+        assert not commands.run_fast(["database", "--info"])
+
+
+def test_find_startup() -> None:
+    """Test that find doesn't import the modules only other commands need, in a new interpreter.
+
+    Failure:
+        If find imports typer, or the modules of backups, fingerprints, discovery, watching, search or transfers,
+        once the index is compiled
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location):
+        arguments = [sys.executable, "-X", "importtime", "-m", "whereis", "--database-location", str(location)]
+        for _ in range(2):  # the first run compiles the index
+            process: subprocess.CompletedProcess = subprocess.run(
+                arguments + ["find", "grub"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+                cwd=str(Path(__file__).parent.parent),
+            )
+            assert process.returncode == 0
+        lines = process.stderr.splitlines()
+        modules = {line.split("|")[-1].strip() for line in lines if line.startswith("import time:")}
+        assert "whereis.core" in modules
+        for module in ("concurrent.futures", "hashlib", "orjson", "tarfile", "typer", "whereis.backup"):
+            assert module not in modules
+        for module in ("discover", "fingerprint", "owner", "search", "transfer", "watch"):
+            assert f"whereis.{module}" not in modules
+
+
+def test_serve_project(monkeypatch) -> None:
+    """Test that the daemon refuses to serve a project layer.
+
+    Failure:
+        If the daemon starts with a project layer, which clients without one would then connect to
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location):
+        monkeypatch.setattr(cli, "project_location", location)
+        monkeypatch.setattr(daemon, "Server", None)  # fails if the daemon is started
+        result = runner.invoke(app, ["--database-location", str(location), "serve"])
+        assert result.exception is None
+        assert not (location / CACHE_FOLDER / SOCKET_NAME).exists()
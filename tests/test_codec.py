@@ -0,0 +1,45 @@
+"""Testing for whereis.codec"""
+from whereis import codec
+import pytest
+
+
+@pytest.mark.parametrize("entry_codec", codec.available(), ids=lambda entry_codec: entry_codec.name)
+def test_round_trip(entry_codec: codec.Codec) -> None:
+    """Test encoding raw entries and decoding them back.
+
+    Failure:
+        If a raw entry isn't the same once decoded, including tombstones, undecodable file names and unknown keys
+        If malformed data doesn't raise a ValueError
+
+    Returns:
+        Nothing.
+    """
+    raw_entries = [
+        {"name": "zsh", "locations": [["{HOME}", ".zshrc"], ["{HOME}", ".zsh_profile"], []]},
+        {"name": "removed", "removed": True},
+        {"name": "surrogate\udc80", "locations": [["etc", "café", "\udcff"]]},
+        {"name": "null\0", "locations": [["etc", "a\0b"]]},
+        {"name": "unknown", "locations": "not a list", "extra": {"key": [1, 2.5, None]}},
+    ]
+    for raw_entry in raw_entries:
+        assert entry_codec.decode(entry_codec.encode(raw_entry)) == raw_entry
+
+    packed: bytes = entry_codec.encode(raw_entries[0])
+    for malformed in (b"", packed[:-3], packed + b"\0"):
+        with pytest.raises(ValueError):
+            entry_codec.decode(malformed)
+
+
+def test_json_codec() -> None:
+    """Test picking the fastest json codec.
+
+    Failure:
+        If orjson isn't used when it's installed, or the json it writes can't be read by the json codec
+
+    Returns:
+        Nothing.
+    """
+    names = [entry_codec.name for entry_codec in codec.available()]
+    assert codec.json_codec().name == (codec.ORJSON if codec.ORJSON in names else codec.JSON)
+    raw_entry = {"name": "grub", "locations": [["etc", "default", "grub"]]}
+    assert codec.JsonCodec().decode(codec.json_codec().encode(raw_entry)) == raw_entry
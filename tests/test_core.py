@@ -1,9 +1,10 @@
 """Testing for whereis.core"""
-from whereis import Database, Entry, exceptions
+from whereis import Database, Entry, exceptions, utils
 import pytest  # type: ignore
 import os
+import shutil
 from pathlib import Path
-from typing import Dict, Union, List
+from typing import Any, Dict, Union, List
 import string
 import random
 
@@ -47,6 +48,33 @@ def test_entry_attributes() -> None:
     assert entry.to_json == json_string
 
 
+def test_entry_placeholders(monkeypatch) -> None:
+    """Test formatting entry locations with placeholders.
+
+    Failure:
+        If {XDG_CONFIG_HOME} isn't replaced by $XDG_CONFIG_HOME
+        If {ENV:NAME} isn't replaced by $NAME, inside or as a whole part
+        If an unknown placeholder doesn't raise a FormatMapError
+
+    Returns:
+        Nothing.
+    """
+    monkeypatch.setenv("XDG_CONFIG_HOME", "/xdg")
+    monkeypatch.setenv("WHEREIS_TEST", "value")
+    utils.format_map.cache_clear()
+    try:
+        entry: Entry = Entry(
+            "Test", ["{XDG_CONFIG_HOME}", "nvim"], ["etc", "{ENV:WHEREIS_TEST}.d"]
+        )
+        assert entry.locations == [Path("/xdg/nvim"), Path("/etc/value.d")]
+        with pytest.raises(exceptions.FormatMapError):
+            _ = Entry("Test", ["{UNKNOWN}", "file"]).locations
+        with pytest.raises(exceptions.FormatMapError):
+            _ = Entry("Test", ["{ENV:WHEREIS_UNSET}"]).locations
+    finally:
+        utils.format_map.cache_clear()
+
+
 def test_entry_equality() -> None:
     """Test entry equality
 
@@ -83,6 +111,36 @@ def test_entry_locations_exists() -> None:
     os.remove(existing)
 
 
+def test_entry_locations_status() -> None:
+    """Test Entry.locations_status()
+
+    Failures:
+        If the status of a file, a folder, a symlink or a missing location is wrong.
+
+    Returns:
+        Nothing.
+    """
+    folder: Path = Path().home() / generate_random_string()
+    folder.mkdir()
+    (folder / "file").write_text("where-is")
+    (folder / "link").symlink_to(folder / "file")
+    try:
+        entry: Entry = Entry(
+            "Test",
+            [str(folder), "file"],
+            [str(folder)],
+            [str(folder), "link"],
+            [str(folder), "missing"],
+        )
+        file, directory, link, missing = entry.locations_status().values()
+        assert file.exists and file.is_file and not file.is_dir and file.size == 8
+        assert directory.exists and directory.is_dir and not directory.is_file
+        assert link.exists and link.is_file and link.is_symlink
+        assert not missing.exists and missing.size is None and missing.mtime is None
+    finally:
+        shutil.rmtree(folder)
+
+
 def test_database_attributes_and_context_manager_and_database_creation_and_deletion() -> None:
     """Test database attributes, context manager, and database creation and deletion.
 
@@ -154,3 +212,99 @@ def test_remove_entry_from_database() -> None:
         assert entry not in database.entries
         with pytest.raises(exceptions.EntryNotFoundError):
             database.remove(entry)
+
+
+def test_database_entries_cache(monkeypatch) -> None:
+    """Test the cached database entries.
+
+    Failure:
+        If the entries get parsed again after adding or removing an entry
+        If an entry written by another process isn't in the database entries
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    entry: Entry = Entry("Test", ["{HOME}", "johndoe"], ["etc"])
+    with Database(location) as database:
+        assert len(database.entries) == 2
+
+        def read_entry(path: Path, decoder: Any = None) -> None:
+            raise AssertionError(f"'{path}' was parsed again.")
+
+        monkeypatch.setattr(Database, "_read_entry", staticmethod(read_entry))
+        database += entry
+        assert entry in database.entries
+        database -= entry
+        assert entry not in database.entries
+        monkeypatch.undo()
+
+        Database(location).add(entry)
+        assert entry in database.entries
+
+
+def test_database_get_and_contains() -> None:
+    """Test looking up entries by name.
+
+    Failure:
+        If an existing entry or entry name isn't in the database
+        If an entry with the same name but other locations is in the database
+        If Database.get() doesn't return the added entry
+        If equal entries don't hash the same
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    entry: Entry = Entry("Test", ["{HOME}", "johndoe"], ["etc"])
+    with Database(location) as database:
+        assert "grub" in database
+        assert "Test" not in database
+        database += entry
+        assert entry in database
+        assert "Test" in database
+        assert Entry("Test", ["lib"]) not in database
+        assert database.get("Test") is entry
+        assert Database(location).get("Test") == entry
+        assert len({entry, Entry("Test", ["{HOME}", "johndoe"], ["etc"])}) == 1
+
+
+def test_entry_compact_representation() -> None:
+    """Test the compact entry representation.
+
+    Failure:
+        If an entry has a __dict__
+        If equal location parts of different entries aren't the same object
+        If the resolved locations aren't cached
+
+    Returns:
+        Nothing.
+    """
+    entry: Entry = Entry("Test", ["{HOME}", "".join(["john", "doe"])])
+    other_entry: Entry = Entry("Other", ["{HOME}", "".join(["john", "doe"])])
+    assert not hasattr(entry, "__dict__")
+    assert entry.to_dict["locations"][0][1] is other_entry.to_dict["locations"][0][1]
+    assert entry.locations[0] is entry.locations[0]
+
+
+def test_database_scan() -> None:
+    """Test scanning the database entries.
+
+    Failure:
+        If an entry isn't scanned exactly once
+        If the scanned status of a location is wrong
+        If an entry that can't be formatted doesn't hold its error
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    entry: Entry = Entry("Test", ["{HOME}"], ["{HOME}", generate_random_string()])
+    broken_entry: Entry = Entry("Broken", ["{UNKNOWN}"])
+    with Database(location) as database:
+        database += entry
+        database += broken_entry
+        results = {result.entry.name: result for result in database.scan(workers=2)}
+        assert sorted(results) == ["Broken", "Test", "grub", "zsh"]
+        assert [status.exists for status in results["Test"].status.values()] == [True, False]
+        assert isinstance(results["Broken"].error, exceptions.FormatMapError)
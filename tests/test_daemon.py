@@ -0,0 +1,100 @@
+"""Testing for whereis.daemon"""
+from whereis import Database, Entry, commands, exceptions
+from whereis.daemon import Client, Server, socket_path
+from whereis.output import Format
+from pathlib import Path
+import pytest
+import socket
+import stat
+import threading
+import string
+import random
+import time
+
+
+def generate_random_string(max_chars: int = 8) -> str:
+    """Generates a random string.
+
+    Args:
+        max_chars: The maximum characters the string should have.
+
+    Returns:
+        Nothing.
+    """
+    return "".join([random.choice(string.ascii_letters) for _ in range(max_chars)])
+
+
+def test_daemon_requests(capsys, monkeypatch) -> None:
+    """Test answering requests through the daemon.
+
+    Failure:
+        If the daemon doesn't answer find, scan, search and owner requests like the database would
+        If find doesn't go through the daemon while it's running
+        If an entry added while the daemon is running isn't found
+        If the socket isn't removed when the daemon stops
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location) as database:
+        assert Client.connect(location) is None
+        with Server(database, interval=0.1) as server:
+            thread: threading.Thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                with Client.connect(location) as client:  # type: ignore
+                    assert list(client.request("ping"))[0]["entries"] == 2
+                    found = list(client.request("find", name="grub"))
+                    assert found[0]["status"]["locations"][0]["path"] == "/etc/default/grub"
+                    assert list(client.request("find", name="nothing")) == [{"missing": "nothing"}]
+                    scanned = list(client.request("scan", workers=2))
+                    assert sorted(response["status"]["name"] for response in scanned) == ["grub", "zsh"]
+                    searched = list(client.request("search", query="zsh_", limit=1))
+                    assert [response["result"]["name"] for response in searched] == ["zsh"]
+                    owners = list(client.request("owner", path="/etc/default/grub"))
+                    assert owners == [{"owner": {"name": "grub", "location": "/etc/default/grub", "exact": True}}]
+                    assert "error" in list(client.request("nothing"))[0]
+
+                Database(location).add(Entry("Test", ["etc"]))
+                time.sleep(0.3)
+                monkeypatch.setattr(commands, "get_database", lambda *args, **kwargs: None)
+                commands.find(location, ["Test"], False, True, Format.tsv)
+                assert capsys.readouterr().out.splitlines()[1].startswith("Test\t/etc\t")
+            finally:
+                server.shutdown()
+                thread.join()
+        assert not socket_path(location).exists()
+
+
+def test_daemon_socket() -> None:
+    """Test how the daemon takes over the socket of a database.
+
+    Failure:
+        If a socket left behind by a daemon that crashed isn't replaced
+        If the socket can be used by other users
+        If a second daemon starts while one serves the database, or removes its socket
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location) as database:
+        path: Path = socket_path(location)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        stale: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(str(path))
+        stale.close()
+        with Server(database, interval=0.1) as server:
+            thread: threading.Thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                assert stat.S_IMODE(path.stat().st_mode) == 0o600
+                with pytest.raises(exceptions.DaemonError):
+                    Server(database)
+                with Client.connect(location) as client:  # type: ignore
+                    assert list(client.request("ping"))[0]["entries"] == 2
+            finally:
+                server.shutdown()
+                thread.join()
+        assert not path.exists()
@@ -0,0 +1,73 @@
+"""Testing for whereis.discover"""
+from whereis import Database, Entry, discover
+from pathlib import Path
+import shutil
+import string
+import random
+import os
+
+
+def generate_random_string(max_chars: int = 8) -> str:
+    """Generates a random string.
+
+    Args:
+        max_chars: The maximum characters the string should have.
+
+    Returns:
+        Nothing.
+    """
+    return "".join([random.choice(string.ascii_letters) for _ in range(max_chars)])
+
+
+def test_discover(monkeypatch) -> None:
+    """Test proposing entries for the config files found in a root.
+
+    Failure:
+        If config files aren't grouped by tool, or a folder with too many config files isn't proposed instead
+        If visible files, pruned folders, history files or files deeper than the maximum depth are proposed
+        If a config file already in an entry is proposed
+        If unchanged folders are listed again, or a changed folder isn't
+
+    Returns:
+        Nothing.
+    """
+    variable: str = f"WHEREIS_TEST_{generate_random_string()}"
+    home: Path = Path().home() / generate_random_string()
+    files = [
+        ".zshrc",
+        ".zsh_profile",
+        ".zsh_history",
+        ".gitconfig",
+        "Documents/notes.conf",
+        ".cache/tool/settings.conf",
+        ".tool/deep/deeper/settings.conf",
+        *(f".vim/plugin/{index}.vim" for index in range(discover.MAX_LOCATIONS + 1)),
+    ]
+    for file in files:
+        (home / file).parent.mkdir(parents=True, exist_ok=True)
+        (home / file).write_text("")
+    old: int = 1_000_000_000_000_000_000
+    for folder, _, _ in os.walk(home):
+        os.utime(folder, ns=(old, old))
+    monkeypatch.setenv(variable, str(home))
+    roots = [discover.Root((f"{{ENV:{variable}}}",), hidden_only=True)]
+
+    try:
+        with Database(Path().home() / generate_random_string()) as database:
+            database += Entry("git", [f"{{ENV:{variable}}}", ".gitconfig"])  # type: ignore
+            discovery = database.discover(roots, workers=4)
+            assert [entry.to_dict for entry in discovery.entries] == [
+                {"name": "vim", "locations": [[f"{{ENV:{variable}}}", ".vim"]]},
+                {
+                    "name": "zsh",
+                    "locations": [[f"{{ENV:{variable}}}", ".zsh_profile"], [f"{{ENV:{variable}}}", ".zshrc"]],
+                },
+            ]
+            assert discovery.listed == 5 and discovery.reused == 0
+
+            (home / ".vim" / "vimrc").write_text("")
+            discovery = database.discover(roots, workers=4)
+            assert (discovery.listed, discovery.reused) == (1, 4)
+            assert len(discovery.entries) == 2
+    finally:
+        shutil.rmtree(home)
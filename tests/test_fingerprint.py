@@ -0,0 +1,76 @@
+"""Testing for whereis.fingerprint"""
+from whereis import Database, Entry, exceptions
+from pathlib import Path
+import shutil
+import string
+import random
+import os
+
+
+def generate_random_string(max_chars: int = 8) -> str:
+    """Generates a random string.
+
+    Args:
+        max_chars: The maximum characters the string should have.
+
+    Returns:
+        Nothing.
+    """
+    return "".join([random.choice(string.ascii_letters) for _ in range(max_chars)])
+
+
+def test_fingerprint() -> None:
+    """Test fingerprinting the config files of entries.
+
+    Failure:
+        If the digest of an entry changes between runs although its files didn't
+        If the digest of an entry doesn't change when a file is modified, created or deleted
+        If an unchanged file is read again, or a changed one isn't
+        If an entry whose locations can't be formatted doesn't get an error
+
+    Returns:
+        Nothing.
+    """
+    root: Path = Path().home() / generate_random_string()
+    files = ["nvim/init.lua", "nvim/lua/plugins.lua", "nvim/lua/options.lua", "zshrc"]
+    old: int = 1_000_000_000_000_000_000
+    for file in files:
+        (root / file).parent.mkdir(parents=True, exist_ok=True)
+        (root / file).write_text(file)
+        os.utime(root / file, ns=(old, old))
+    entries = [
+        Entry("nvim", [str(root), "nvim"], [str(root), "zshrc"]),
+        Entry("zsh", [str(root), "zshrc"], [str(root), "missing"]),
+        Entry("broken", ["{NOT_A_PLACEHOLDER}", "config"]),
+    ]
+
+    try:
+        with Database(Path().home() / generate_random_string()) as database:
+            first = database.fingerprint(entries, workers=2)
+            assert (first.hashed, first.reused) == (4, 0)
+            nvim, zsh, broken = first.fingerprints
+            assert sorted(nvim.files) == sorted(root / file for file in files)
+            assert list(zsh.files) == [root / "zshrc"] and zsh.files[root / "zshrc"] == nvim.files[root / "zshrc"]
+            assert broken.digest is None and isinstance(broken.error, exceptions.FormatMapError)
+
+            second = database.fingerprint(entries, workers=2)
+            assert (second.hashed, second.reused) == (0, 4)
+            assert [found.digest for found in second.fingerprints] == [found.digest for found in first.fingerprints]
+            assert database.fingerprint(entries, cache=False).hashed == 4
+
+            (root / "nvim" / "init.lua").write_text("changed")
+            third = database.fingerprint(entries)
+            assert (third.hashed, third.reused) == (1, 3)
+            assert third.fingerprints[0].digest != nvim.digest and third.fingerprints[1].digest == zsh.digest
+
+            (root / "nvim" / "init.lua").write_text("nvim/init.lua")
+            os.utime(root / "nvim" / "init.lua", ns=(old, old))
+            assert database.fingerprint(entries).fingerprints[0].digest == nvim.digest
+            (root / "nvim" / "lua" / "new.lua").write_text("")
+            assert database.fingerprint(entries).fingerprints[0].digest != nvim.digest
+            (root / "nvim" / "lua" / "new.lua").unlink()
+            (root / "missing").write_text("")
+            fourth = database.fingerprint(entries)
+            assert fourth.fingerprints[0].digest == nvim.digest and fourth.fingerprints[1].digest != zsh.digest
+    finally:
+        shutil.rmtree(root)
@@ -0,0 +1,121 @@
+"""Testing for whereis.index"""
+from whereis import Database, Entry
+from whereis.index import CACHE_FOLDER, INDEX_NAME
+from pathlib import Path
+import string
+import random
+
+
+def generate_random_string(max_chars: int = 8) -> str:
+    """Generates a random string.
+
+    Args:
+        max_chars: The maximum characters the string should have.
+
+    Returns:
+        Nothing.
+    """
+    return "".join([random.choice(string.ascii_letters) for _ in range(max_chars)])
+
+
+def test_index_lookup() -> None:
+    """Test looking up entries through the compiled index.
+
+    Failure:
+        If the index file isn't written next to the json entries
+        If an existing entry can't be looked up
+        If a non-existing entry can be looked up
+        If the index names aren't sorted
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location) as database:
+        assert len(database.index) == 2
+        assert (location / CACHE_FOLDER / INDEX_NAME).exists()
+        assert database.get("grub") == Entry("grub", ["etc", "default", "grub"])
+        assert database.get("nothing") is None
+        assert database.index.names() == ["grub", "zsh"]
+
+
+def test_index_rebuilds_on_change() -> None:
+    """Test that the compiled index notices changes to the database folder.
+
+    Failure:
+        If an entry written by hand isn't found
+        If an entry removed by hand is still found
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location) as database:
+        assert database.get("Test") is None
+        (location / "Test.json").write_text(Entry("Test", ["etc"]).to_json)
+        assert database.get("Test") == Entry("Test", ["etc"])
+        assert Database(location).get("Test") == Entry("Test", ["etc"])
+        (location / "Test.json").unlink()
+        assert database.get("Test") is None
+
+
+def test_direct_lookup(monkeypatch) -> None:
+    """Test looking up entries by reading the file named after them.
+
+    Failure:
+        If the index is compiled even though the entry file matches
+        If an entry stored in a file named after something else isn't found
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location) as database:
+        (location / "grub.json").write_text(Entry("grub", ["boot", "grub"]).to_json)
+        (location / "other.json").write_text(Entry("Test", ["etc"]).to_json)
+        with monkeypatch.context() as patch:
+            patch.setattr(Database, "index", None)
+            assert Database(location).get("grub", direct=True) == Entry("grub", ["boot", "grub"])
+        assert database.get("Test", direct=True) == Entry("Test", ["etc"])
+        assert database.get("nothing", direct=True) is None
+
+
+def test_index_updated_on_write(monkeypatch) -> None:
+    """Test that adding and removing entries updates the compiled index instead of compiling it again.
+
+    Failure:
+        If the index is compiled again after an entry is added or removed
+        If another process doesn't see the added entry, or still sees the removed one
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location) as database:
+        assert database.get("grub") is not None
+        with monkeypatch.context() as patch:
+            patch.setattr("whereis.index._compile", None)
+            database.add(Entry("Test", ["etc"]))
+            assert (location / CACHE_FOLDER / INDEX_NAME).exists()
+            assert database.index.names() == ["Test", "grub", "zsh"]
+            assert Database(location).get("Test") == Entry("Test", ["etc"])
+            database.remove(Entry("Test", ["etc"]))
+            assert Database(location).get("Test") is None
+            assert database.index.names() == ["grub", "zsh"]
+
+
+def test_direct_lookup_corrupt_file() -> None:
+    """Test that a direct lookup falls back to the index when the file named after the entry can't be parsed.
+
+    Failure:
+        If a corrupt entry file raises an error instead of the entry being looked up in the index
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location) as database:
+        database.add(Entry("Test", ["etc"]))
+        assert database.index.get("Test") is not None
+        (location / "Test.json").write_text('{"name": "Test", "locations": [')
+        assert Database(location).get("Test", direct=True) == Entry("Test", ["etc"])
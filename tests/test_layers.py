@@ -0,0 +1,131 @@
+"""Testing for whereis.layers"""
+from whereis import Database, Entry, layers, storage
+from whereis.core import CATALOG_FOLDER
+from whereis.index import CACHE_FOLDER, json_files
+from pathlib import Path
+import pytest
+import shutil
+import string
+import random
+
+
+def generate_random_string(max_chars: int = 8) -> str:
+    """Generates a random string.
+
+    Args:
+        max_chars: The maximum characters the string should have.
+
+    Returns:
+        Nothing.
+    """
+    return "".join([random.choice(string.ascii_letters) for _ in range(max_chars)])
+
+
+@pytest.mark.parametrize("layout", storage.STORAGES)
+def test_catalog_layer(layout: str) -> None:
+    """Test reading the packaged entries in place, below the entries of the database.
+
+    Failure:
+        If creating a database copies the packaged entries, or they can't be found
+        If removing a packaged entry doesn't hide it from other database objects
+        If a removed packaged entry can't be added back
+        If a database without the catalog has packaged entries
+        If a direct lookup finds a packaged entry overridden in a file named after something else
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    database: Database = Database(location)
+    database.create(layout)
+    try:
+        assert json_files(location) == []
+        assert {entry.name for entry in database.entries} == {"grub", "zsh"}
+
+        database -= database.get("grub")  # type: ignore
+        assert database.get("grub") is None and Database(location).get("grub", direct=True) is None
+        assert {entry.name for entry in Database(location).entries} == {"zsh"}
+
+        database += Entry("grub", ["boot", "grub"])  # type: ignore
+        assert Database(location).get("grub") == Entry("grub", ["boot", "grub"])
+        assert [entry.name for entry in Database(location, catalog=False)] == ["grub"]
+
+        if layout == storage.FOLDER:  # an entry of the user layer in a file named after something else
+            (location / "override.json").write_text(Entry("zsh", ["tmp", "override"]).to_json)
+            assert Database(location).get("zsh", direct=True) == Entry("zsh", ["tmp", "override"])
+    finally:
+        database.delete()
+
+
+def test_legacy_database() -> None:
+    """Test opening a database created when the packaged entries were copied into it.
+
+    Failure:
+        If a packaged entry removed from the database is found again
+        If the database isn't marked as layered once upgraded, or a new database isn't
+        If the kept copies of the packaged entries aren't found
+        If a folder without a copy of a packaged entry is taken for a legacy database, or is written to
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    location.mkdir()
+    shutil.copy(str(CATALOG_FOLDER / "zsh.json"), str(location))
+    (location / "Test.json").write_text(Entry("Test", ["etc"]).to_json)
+    try:
+        database: Database = Database(location)
+        assert database.get("grub", direct=True) is None
+        assert {entry.name for entry in database.entries} == {"Test", "zsh"}
+        assert (location / layers.LAYERED_NAME).exists()
+        assert {entry.name for entry in Database(location).entries} == {"Test", "zsh"}
+
+        database += Entry("grub", ["boot", "grub"])  # type: ignore
+        assert Database(location).get("grub") == Entry("grub", ["boot", "grub"])
+    finally:
+        shutil.rmtree(location)
+    with Database(location) as database:
+        assert (location / layers.LAYERED_NAME).exists()
+        assert {entry.name for entry in database.entries} == {"grub", "zsh"}
+
+    location.mkdir()
+    (location / "mine.json").write_text(Entry("mine", ["etc"]).to_json)
+    try:
+        assert Database(location, catalog=False).get("mine") == Entry("mine", ["etc"])
+        assert {entry.name for entry in Database(location).entries} == {"grub", "mine", "zsh"}
+        assert sorted(path.name for path in location.iterdir() if path.name != CACHE_FOLDER) == ["mine.json"]
+    finally:
+        shutil.rmtree(location)
+
+
+def test_project_layer() -> None:
+    """Test layering the database of a project between the catalog and the database.
+
+    Failure:
+        If the project entries aren't found, or don't override the packaged ones
+        If the database entries don't override the project ones
+        If an entry added to the project folder isn't noticed
+        If anything is written to the project folder
+
+    Returns:
+        Nothing.
+    """
+    project: Path = Path().home() / generate_random_string()
+    project.mkdir()
+    (project / "zsh.json").write_text(Entry("zsh", ["project", ".zshrc"]).to_json)
+    (project / "tool.json").write_text(Entry("tool", ["project", "tool.toml"]).to_json)
+    try:
+        with Database(Path().home() / generate_random_string(), project=project) as database:
+            assert database.get("zsh") == Entry("zsh", ["project", ".zshrc"])
+            assert database.get("tool", direct=True) == Entry("tool", ["project", "tool.toml"])
+            assert database.get("grub") is not None
+
+            database -= database.get("tool")  # type: ignore
+            database += Entry("tool", ["user", "tool.toml"])  # type: ignore
+            assert database.get("tool") == Entry("tool", ["user", "tool.toml"])
+
+            (project / "other.json").write_text(Entry("other", ["project"]).to_json)
+            assert database.get("other") == Entry("other", ["project"])
+            assert sorted(path.name for path in project.iterdir()) == ["other.json", "tool.json", "zsh.json"]
+    finally:
+        shutil.rmtree(project)
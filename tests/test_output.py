@@ -0,0 +1,48 @@
+"""Testing for whereis.output"""
+from whereis.output import Format, RecordWriter, ENTRY_COLUMNS
+import io
+import json
+import pytest  # type: ignore
+
+
+def write_records(format_: Format) -> str:
+    """Writes two entry records.
+
+    Args:
+        format_: The output format.
+
+    Returns:
+        The output.
+    """
+    file: io.StringIO = io.StringIO()
+    with RecordWriter(format_, ENTRY_COLUMNS, file) as writer:
+        writer.write({"name": "grub", "locations": ["/etc/default/grub"]})
+        writer.write({"name": "tab\there", "locations": ["/a", "/b"]})
+    return file.getvalue()
+
+
+def test_record_writer() -> None:
+    """Test writing records in every machine-readable format.
+
+    Failure:
+        If the json output isn't an array of the records
+        If the ndjson output isn't one record per line
+        If the tsv output isn't one escaped row per location, after a header
+        If a record writer can be opened for the rich format
+
+    Returns:
+        Nothing.
+    """
+    assert [record["name"] for record in json.loads(write_records(Format.json))] == [
+        "grub",
+        "tab\there",
+    ]
+    assert len(write_records(Format.ndjson).splitlines()) == 2
+    assert write_records(Format.tsv).splitlines() == [
+        "name\tpath",
+        "grub\t/etc/default/grub",
+        "tab\\there\t/a",
+        "tab\\there\t/b",
+    ]
+    with pytest.raises(ValueError):
+        RecordWriter(Format.rich, ENTRY_COLUMNS)
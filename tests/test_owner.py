@@ -0,0 +1,55 @@
+"""Testing for whereis.owner"""
+from whereis import Database, Entry, owner
+from pathlib import Path
+import string
+import random
+
+
+def generate_random_string(max_chars: int = 8) -> str:
+    """Generates a random string.
+
+    Args:
+        max_chars: The maximum characters the string should have.
+
+    Returns:
+        Nothing.
+    """
+    return "".join([random.choice(string.ascii_letters) for _ in range(max_chars)])
+
+
+def test_owner_of(monkeypatch) -> None:
+    """Test finding the entries owning a path.
+
+    Failure:
+        If an entry isn't found from one of its locations
+        If an entry whose location is a parent folder of the path isn't found after the deeper entries
+        If an entry is found from a path that is only a prefix of its location
+        If added or removed entries aren't taken into account without building the trie again
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location) as database:
+        found = database.owner_of(Path("/etc/default/grub"))
+        assert [(item.entry.name, item.exact) for item in found] == [("grub", True)]
+        assert database.owner_of(Path().home() / ".zshrc")[0].entry.name == "zsh"
+        assert database.owner_of(Path("/etc/default")) == []
+        assert database.owner_of(Path("/etc/default/grub.d")) == []
+
+        database += Entry("etc", ["etc"])  # type: ignore
+        build = owner.PathTrie.build
+        monkeypatch.setattr(owner.PathTrie, "build", None)
+        database += Entry("default", ["etc", "default"])  # type: ignore
+        found = database.owner_of(Path("/etc/default/grub/../grub"))
+        assert [(item.entry.name, str(item.location), item.exact) for item in found] == [
+            ("grub", "/etc/default/grub", True),
+            ("default", "/etc/default", False),
+            ("etc", "/etc", False),
+        ]
+        database -= database.get("grub")  # type: ignore
+        assert [item.entry.name for item in database.owner_of(Path("/etc/default/grub"))] == ["default", "etc"]
+
+        monkeypatch.setattr(owner.PathTrie, "build", build)
+        Database(location).add(Entry("grub", ["etc", "default", "grub"]))
+        assert database.owner_of(Path("/etc/default/grub"))[0].entry.name == "grub"
@@ -0,0 +1,96 @@
+"""Testing for whereis.profiling"""
+from whereis import Database, commands, profiling
+from pathlib import Path
+import threading
+import string
+import random
+import json
+
+
+def generate_random_string(max_chars: int = 8) -> str:
+    """Generates a random string.
+
+    Args:
+        max_chars: The maximum characters the string should have.
+
+    Returns:
+        Nothing.
+    """
+    return "".join([random.choice(string.ascii_letters) for _ in range(max_chars)])
+
+
+def test_phases() -> None:
+    """Test recording the phases of a lookup.
+
+    Failure:
+        If a phase of the lookup isn't recorded, or is recorded while no profiler is running
+        If nested phases or phases of many threads aren't counted
+        If the memory allocated by a phase isn't in its peak
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location) as database:
+        with profiling.profile() as profiler:
+            entry = database.get("grub")
+            entry.locations_status()  # type: ignore
+        database.get("zsh")
+        phases = profiler.report()["phases"]
+        assert list(phases) == [
+            profiling.DATABASE_LOAD,
+            profiling.JSON_PARSE,
+            profiling.PATH_FORMATTING,
+            profiling.FILESYSTEM_STAT,
+        ]
+        assert phases[profiling.FILESYSTEM_STAT]["calls"] == len(entry.locations)  # type: ignore
+
+    with profiling.profile() as profiler:
+        with profiling.phase("outer"):
+            with profiling.phase("outer"):
+                kept = bytearray(1 << 20)
+        threads = [threading.Thread(target=lambda: profiling.timed("thread")(len)("")) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    report = profiler.report()
+    assert report["phases"]["outer"]["calls"] == 2 and report["phases"]["outer"]["peak_bytes"] >= len(kept)
+    assert report["phases"]["thread"]["calls"] == 4
+    assert report["peak_bytes"] >= len(kept)
+
+
+def test_profiled_command(capsys) -> None:
+    """Test profiling a command run by the fast path.
+
+    Failure:
+        If the json report or the cProfile stats aren't written
+        If the import phase isn't recorded
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    stats: Path = Path().home() / generate_random_string()
+    with Database(location):
+        try:
+            assert commands.run_fast(
+                [
+                    "--database-location",
+                    str(location),
+                    "--profile-report=-",
+                    "--profile-stats",
+                    str(stats),
+                    "find",
+                    "--format=tsv",
+                    "grub",
+                ]
+            )
+            captured = capsys.readouterr()
+            assert captured.out.splitlines()[1].startswith("grub\t/etc/default/grub")
+            report = json.loads(captured.err)
+            assert report["phases"][profiling.IMPORT]["calls"] == 1
+            assert report["phases"][profiling.RENDERING]["calls"] == 1
+            assert stats.stat().st_size > 0
+        finally:
+            stats.unlink()
@@ -0,0 +1,72 @@
+"""Testing for whereis.search"""
+from whereis import Database, Entry, search
+from whereis.index import CACHE_FOLDER
+from pathlib import Path
+import string
+import random
+
+
+def generate_random_string(max_chars: int = 8) -> str:
+    """Generates a random string.
+
+    Args:
+        max_chars: The maximum characters the string should have.
+
+    Returns:
+        Nothing.
+    """
+    return "".join([random.choice(string.ascii_letters) for _ in range(max_chars)])
+
+
+def test_search_ranking() -> None:
+    """Test ranking the entries matching a query.
+
+    Failure:
+        If the search index isn't compiled in the cache folder
+        If an exact match doesn't rank before a prefix match, or a prefix match before a fuzzy match
+        If a match on a location component isn't found
+        If there are more results than the limit
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location) as database:
+        database += Entry("neovim", ["{HOME}", ".config", "nvim", "init.vim"])  # type: ignore
+        database += Entry("nvim-qt", ["{HOME}", ".config", "nvim-qt"])  # type: ignore
+        database += Entry("Nvi", ["{HOME}", ".nvirc"])  # type: ignore
+
+        results = Database(location).search("nvi")
+        assert (location / CACHE_FOLDER / search.SEARCH_NAME).exists()
+        assert [result.entry.name for result in results] == ["Nvi", "nvim-qt", "neovim"]
+        assert results[0].score == 1.0 and results[0].match == "nvi"
+        assert results[2].match == "nvim"
+        assert database.search("neovm")[0].entry.name == "neovim"
+        assert database.search("init.vim")[0].entry.name == "neovim"
+        assert len(database.search("nvi", limit=1)) == 1
+        assert database.search("") == []
+
+
+def test_search_incremental(monkeypatch) -> None:
+    """Test keeping the search index up to date.
+
+    Failure:
+        If adding or removing an entry compiles the search index again
+        If an added entry isn't found, or a removed entry is still found
+        If the search index isn't compiled again when another process changes the database
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location) as database:
+        assert database.search("grub")[0].entry.name == "grub"
+        compile_ = search._compile
+        monkeypatch.setattr(search, "_compile", None)
+        database += Entry("grubby", ["etc", "grubby"])  # type: ignore
+        database -= database.get("grub")  # type: ignore
+        assert [result.entry.name for result in database.search("grub")] == ["grubby"]
+
+        monkeypatch.setattr(search, "_compile", compile_)
+        Database(location).add(Entry("grub", ["etc", "default", "grub"]))
+        assert [result.entry.name for result in database.search("grub")] == ["grub", "grubby"]
@@ -0,0 +1,211 @@
+"""Testing for whereis.storage"""
+from whereis import Database, Entry, exceptions, storage
+from whereis.index import json_files
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import pytest
+import string
+import random
+
+
+def generate_random_string(max_chars: int = 8) -> str:
+    """Generates a random string.
+
+    Args:
+        max_chars: The maximum characters the string should have.
+
+    Returns:
+        Nothing.
+    """
+    return "".join([random.choice(string.ascii_letters) for _ in range(max_chars)])
+
+
+def _write_entries(location: str, writer: int, count: int) -> None:
+    """Adds entries to a database, removing some of them, as a writer process of the stress test.
+
+    Args:
+        location: The database folder.
+        writer: The number of the writer, used in the entry names.
+        count: How many entries are added.
+
+    Returns:
+        Nothing.
+    """
+    database: Database = Database(Path(location))
+    for index in range(count):
+        database.add(Entry(f"writer {writer} {index}", ["etc", str(index)]))
+        if index % 5 == 4:
+            database.remove(database.get(f"writer {writer} {index - 1}"))  # type: ignore
+
+
+def _read_entries(location: str, rounds: int) -> None:
+    """Reads every entry of a database again and again, as a reader process of the stress test.
+
+    Args:
+        location: The database folder.
+        rounds: How many times the entries are read.
+
+    Returns:
+        Nothing.
+    """
+    for _ in range(rounds):
+        database: Database = Database(Path(location))
+        names = [entry.name for entry in database.entries]
+        assert len(names) == len(set(names)) and "zsh" in names
+        assert database.get("grub") is not None
+
+
+def _add_racing(location: str, count: int) -> int:
+    """Adds the same entries as the other processes of the race test.
+
+    Args:
+        location: The database folder.
+        count: How many entries are added.
+
+    Returns:
+        How many of the entries this process added.
+    """
+    database: Database = Database(Path(location))
+    added: int = 0
+    for index in range(count):
+        try:
+            database.add(Entry(f"race {index}", ["etc", str(index)]))
+            added += 1
+        except exceptions.EntryExistsError:
+            pass
+    return added
+
+
+@pytest.mark.parametrize("layout", storage.STORAGES)
+def test_concurrent_add(layout: str) -> None:
+    """Test many processes adding the same entries at once.
+
+    Failure:
+        If an entry is added by more than one process, or by none
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    database: Database = Database(location)
+    database.create(layout)
+    adders, count = 4, 30
+    try:
+        with ProcessPoolExecutor(adders) as executor:
+            futures = [executor.submit(_add_racing, str(location), count) for _ in range(adders)]
+            assert sum(future.result() for future in futures) == count
+        assert {entry.name for entry in Database(location).entries} == {"grub", "zsh"} | {
+            f"race {index}" for index in range(count)
+        }
+    finally:
+        database.delete()
+
+
+@pytest.mark.parametrize("layout", storage.STORAGES)
+def test_concurrent_access(layout: str) -> None:
+    """Stress test many processes reading and writing a database at once.
+
+    Failure:
+        If a reader sees a half-written entry, a duplicate entry, or misses an entry no one changed
+        If the entries of a writer are lost
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    database: Database = Database(location)
+    database.create(layout)
+    writers, readers, count = 4, 4, 25
+    try:
+        with ProcessPoolExecutor(writers + readers) as executor:
+            futures = [executor.submit(_write_entries, str(location), writer, count) for writer in range(writers)]
+            futures += [executor.submit(_read_entries, str(location), 30) for _ in range(readers)]
+            for future in futures:
+                future.result()
+        expected = {"grub", "zsh"} | {
+            f"writer {writer} {index}"
+            for writer in range(writers)
+            for index in range(count)
+            if index % 5 != 3
+        }
+        assert {entry.name for entry in Database(location).entries} == expected
+        assert list(location.glob(".*.tmp")) == []
+    finally:
+        database.delete()
+
+
+@pytest.mark.parametrize(
+    "layout, journal_name, torn",
+    [
+        (storage.JOURNAL, storage.JOURNAL_NAME, b'{"add": {"name": "torn"'),
+        (storage.BINARY, storage.BINARY_JOURNAL_NAME, b"\x20\x00\x00\x00atorn"),
+    ],
+)
+def test_journal_storage(monkeypatch, layout: str, journal_name: str, torn: bytes) -> None:
+    """Test storing entries in an append-only journal, of json lines or of binary frames.
+
+    Failure:
+        If a journal database has json files, or isn't detected as a journal database
+        If added or removed entries aren't seen by other database objects
+        If a record whose writer crashed isn't ignored, or isn't truncated before the next record
+        If the journal isn't compacted in the background once it's too big
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    database: Database = Database(location)
+    database.create(layout)
+    try:
+        assert json_files(location) == [] and storage.layout(location) == layout
+        assert {entry.name for entry in Database(location).entries} == {"grub", "zsh"}
+        database += Entry("Test", ["etc"])  # type: ignore
+        database -= database.get("grub")  # type: ignore
+        assert {entry.name for entry in Database(location).entries} == {"Test", "zsh"}
+
+        journal: Path = location / journal_name
+        with journal.open("ab") as file:
+            file.write(torn)
+        assert Database(location).get("torn") is None
+        Database(location).add(Entry("other", ["etc"]))
+        assert {entry.name for entry in Database(location).entries} == {"Test", "zsh", "other"}
+
+        monkeypatch.setattr(storage, "COMPACT_SIZE", 0)
+        database += Entry("compacted", ["etc"])  # type: ignore
+        database.storage.close()
+        assert journal.read_bytes() == b""
+        assert {entry.name for entry in Database(location).entries} == {"Test", "zsh", "other", "compacted"}
+    finally:
+        database.delete()
+
+
+def test_migrate() -> None:
+    """Test moving a database to another storage layout.
+
+    Failure:
+        If the entries aren't the same in the new layout
+        If the files of the old layout are left behind
+        If a database object opened before the migration doesn't notice it
+        If migrating to the layout the database already uses doesn't raise an error
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    with Database(location) as database:
+        database += Entry("Test", ["etc"])  # type: ignore
+        entries = set(database.entries)
+        other: Database = Database(location)
+        assert set(other.entries) == entries
+
+        database.migrate(storage.JOURNAL)
+        assert json_files(location) == []
+        assert set(database.entries) == entries and set(other.entries) == entries
+        assert other.storage.name == storage.JOURNAL
+        with pytest.raises(exceptions.StorageError):
+            database.migrate(storage.JOURNAL)
+
+        database.migrate(storage.FOLDER)
+        assert not (location / storage.JOURNAL_NAME).exists()
+        assert not (location / storage.SNAPSHOT_NAME).exists()
+        assert set(Database(location).entries) == entries
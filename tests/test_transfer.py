@@ -0,0 +1,80 @@
+"""Testing for whereis.transfer"""
+from whereis import Database, Entry, exceptions, storage, transfer
+from whereis.output import Format
+from pathlib import Path
+import pytest
+import string
+import random
+import io
+
+
+def generate_random_string(max_chars: int = 8) -> str:
+    """Generates a random string.
+
+    Args:
+        max_chars: The maximum characters the string should have.
+
+    Returns:
+        Nothing.
+    """
+    return "".join([random.choice(string.ascii_letters) for _ in range(max_chars)])
+
+
+def test_read_entries(monkeypatch) -> None:
+    """Test parsing the entries of a json array or of ndjson one at a time.
+
+    Failure:
+        If an array or ndjson isn't parsed the same when read in chunks smaller than an entry
+        If an empty file doesn't give any entry
+        If a malformed file doesn't raise an error
+
+    Returns:
+        Nothing.
+    """
+    monkeypatch.setattr(transfer, "CHUNK_SIZE", 7)
+    entries = [Entry(f"entry {index}", ["etc", str(index)]) for index in range(50)]
+    for format_ in (Format.json, Format.ndjson):
+        file = io.StringIO()
+        assert transfer.write_entries(entries, file, format_) == len(entries)
+        file.seek(0)
+        assert list(transfer.read_entries(file)) == entries
+
+    assert list(transfer.read_entries(io.StringIO(" \n [ ] "))) == []
+    assert list(transfer.read_entries(io.StringIO(""))) == []
+    for malformed in ('[{"name": "a", "locations": []} {}]', '[{"name": "a"', '{"name": "a"}\n{', "name"):
+        with pytest.raises(exceptions.EntryParseError):
+            list(transfer.read_entries(io.StringIO(malformed)))
+
+
+@pytest.mark.parametrize("layout", storage.STORAGES)
+def test_bulk_add(layout: str) -> None:
+    """Test adding entries in batches.
+
+    Failure:
+        If the added entries aren't seen by the same or another database object
+        If a name conflict isn't raised, or the batches before it aren't kept
+        If entries whose name is taken aren't skipped when asked
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    database: Database = Database(location)
+    database.create(layout)
+    try:
+        existing = set(database.entries)
+        entries = [Entry(f"entry {index}", ["etc", str(index)]) for index in range(25)]
+        assert database.bulk_add(iter(entries), batch_size=10) == 25
+        assert set(database.entries) == existing | set(entries)
+        assert set(Database(location).entries) == existing | set(entries)
+
+        conflicting = [Entry(f"new {index}", ["etc"]) for index in range(3)] + [Entry("zsh", ["etc"])]
+        with pytest.raises(exceptions.EntryExistsError):
+            database.bulk_add(conflicting, batch_size=2)
+        assert {entry.name for entry in Database(location).entries} >= {"new 0", "new 1"}
+        assert database.get("new 2") is None and database.get("zsh") != Entry("zsh", ["etc"])
+
+        assert database.bulk_add(conflicting, skip_existing=True) == 1
+        assert database.get("new 2") is not None
+    finally:
+        database.delete()
@@ -0,0 +1,148 @@
+"""Testing for whereis.watch"""
+from whereis import Database, Entry, watch
+from pathlib import Path
+import pytest
+import shutil
+import string
+import random
+import errno
+import sys
+import threading
+import time
+
+
+def generate_random_string(max_chars: int = 8) -> str:
+    """Generates a random string.
+
+    Args:
+        max_chars: The maximum characters the string should have.
+
+    Returns:
+        Nothing.
+    """
+    return "".join([random.choice(string.ascii_letters) for _ in range(max_chars)])
+
+
+@pytest.mark.parametrize("poll", [False, True], ids=["default", "poll"])
+def test_watch(poll: bool) -> None:
+    """Test watching the locations of entries.
+
+    Failure:
+        If a location being created, modified or deleted isn't reported, or is reported for the wrong entries
+        If a location whose folders don't exist yet isn't reported once they're created
+        If a location that is a folder isn't reported as modified when a file is added to it
+        If anything is reported when nothing changed
+
+    Returns:
+        Nothing.
+    """
+    root: Path = Path().home() / generate_random_string()
+    (root / "config").mkdir(parents=True)
+    entries = [
+        Entry("one", [str(root), "config", "one.conf"], [str(root), "missing", "deep", "one.conf"]),
+        Entry("two", [str(root), "config", "one.conf"], [str(root), "folder"]),
+    ]
+    location: Path = root / "config" / "one.conf"
+    try:
+        with watch.Watcher(entries, poll=poll, interval=0.02, max_interval=0.1) as watcher:
+            assert watcher.backend == (watch.POLL if poll or sys.platform != "linux" else watch.INOTIFY)
+            location.write_text("created")
+            assert watcher.poll(2) == [watch.Event(watch.CREATED, location, ("one", "two"))]
+            location.write_text("modified, and bigger")
+            assert watcher.poll(2) == [watch.Event(watch.MODIFIED, location, ("one", "two"))]
+
+            (root / "missing" / "deep").mkdir(parents=True)
+            (root / "missing" / "deep" / "one.conf").write_text("deep")
+            assert watcher.poll(2) == [watch.Event(watch.CREATED, root / "missing" / "deep" / "one.conf", ("one",))]
+
+            (root / "folder").mkdir()
+            assert watcher.poll(2) == [watch.Event(watch.CREATED, root / "folder", ("two",))]
+            (root / "folder" / "file").write_text("inside")
+            assert watcher.poll(2) == [watch.Event(watch.MODIFIED, root / "folder", ("two",))]
+
+            location.unlink()
+            assert watcher.poll(2) == [watch.Event(watch.DELETED, location, ("one", "two"))]
+            assert watcher.poll(0.2) == []
+    finally:
+        shutil.rmtree(root)
+
+
+@pytest.mark.parametrize("poll", [False, True], ids=["default", "poll"])
+def test_close_watcher(poll: bool) -> None:
+    """Test closing a watcher from another thread while it waits for changes.
+
+    Failure:
+        If the iteration doesn't end once the watcher is closed
+        If the watcher waits for changes after it's closed
+
+    Returns:
+        Nothing.
+    """
+    root: Path = Path().home() / generate_random_string()
+    watcher: watch.Watcher = watch.Watcher([Entry("one", [str(root), "one.conf"])], poll=poll, interval=0.02)
+    timer: threading.Timer = threading.Timer(0.2, watcher.close)
+    timer.start()
+    start: float = time.monotonic()
+    assert list(watcher) == []
+    assert watcher.poll() == []
+    assert time.monotonic() - start < 2
+    timer.join()
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="inotify is only available on linux")
+def test_coalesced_watches() -> None:
+    """Test watching many locations from a few folders.
+
+    Failure:
+        If the locations of a folder aren't watched with a single inotify watch
+        If a database doesn't watch the locations of every entry by default
+
+    Returns:
+        Nothing.
+    """
+    location: Path = Path().home() / generate_random_string()
+    root: Path = Path().home() / generate_random_string()
+    with Database(location) as database:
+        database.bulk_add(
+            Entry(f"entry {index}", [str(root), f"folder{index % 3}", f"{index}.conf"]) for index in range(3000)
+        )
+        with database.watch() as watcher:
+            assert len(watcher.locations) >= 3000
+            # the folders don't exist, they're all watched from the home folder (and the other entries' folders)
+            assert watcher.watch_count < 10
+            (root / "folder1").mkdir(parents=True)
+            try:
+                assert watcher.poll(0.2) == []
+                assert watcher.watch_count < 10
+                (root / "folder1" / "1.conf").write_text("one")
+                assert watcher.poll(2) == [watch.Event(watch.CREATED, root / "folder1" / "1.conf", ("entry 1",))]
+            finally:
+                shutil.rmtree(root)
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="inotify is only available on linux")
+def test_out_of_watches(monkeypatch) -> None:
+    """Test watching locations when inotify runs out of watches.
+
+    Failure:
+        If the locations whose folder can't be watched aren't polled instead, or their changes aren't reported
+
+    Returns:
+        Nothing.
+    """
+
+    def add(self, path: Path) -> int:
+        raise OSError(errno.ENOSPC, "No space left on device", str(path))
+
+    root: Path = Path().home() / generate_random_string()
+    root.mkdir()
+    location: Path = root / "one.conf"
+    monkeypatch.setattr(watch._Inotify, "add", add)
+    try:
+        with watch.Watcher([Entry("one", [str(root), "one.conf"])], interval=0.02, max_interval=0.1) as watcher:
+            assert watcher.backend == watch.INOTIFY and watcher.polled == [location]
+            location.write_text("created")
+            assert watcher.poll(2) == [watch.Event(watch.CREATED, location, ("one",))]
+            assert watcher.poll(0.2) == []
+    finally:
+        shutil.rmtree(root)
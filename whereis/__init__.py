@@ -14,10 +14,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """The where-is package itself."""
+from whereis import profiling  # first, so that the import of where-is can be timed
 from whereis.core import *
 from whereis import levels
-from rich.traceback import Traceback, TracebackType
-from rich.console import Console
+from types import TracebackType
 from typing import Type, Text
 import sys
 from whereis.__version__ import __version__ as version
@@ -37,6 +37,9 @@ def excepthook(
         Nothing.
     """
     levels.error(f"[bold]Exception[/] occurred, please wait for it to be processed...")
+    from rich.traceback import Traceback
+    from rich.console import Console
+
     traceback_console: Console = Console(file=sys.stderr)
 
     traceback_console.print(
@@ -77,5 +80,7 @@ def input(*prompt: Union[str, Text], markup: bool = True, emoji: bool = True) ->
     Returns:
         The text given out by the user.
     """
+    from rich.console import Console
+
     console: Console = Console()
     return console.input(*prompt, markup=markup, emoji=emoji)
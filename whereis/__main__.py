@@ -1,26 +1,28 @@
 """The main entry point for pip and `python -m`."""
 from typing import List
+import importlib.util
 import sys
 
 
 def process_imports(package_name: str) -> bool:
     """Processes imports to determine if they're installed or not.
 
+    Notes:
+        The package is only looked up, not imported.
+
     Args:
         package_name: The package name.
 
     Returns:
         True if the package is installed, else False.
     """
-    try:
-        __import__(package_name)
-        return True
-    except ImportError:
+    if importlib.util.find_spec(package_name) is None:
         print(
             f" [✗] The package {package_name} isn't installed on your system.",
             file=sys.stderr,
         )
         return False
+    return True
 
 
 def main() -> None:
@@ -33,6 +35,11 @@ def main() -> None:
     if False in (process_imports(package_name) for package_name in to_import):
         sys.exit(2)
 
+    from whereis.commands import run_fast
+
+    if run_fast(sys.argv[1:]):
+        return
+
     from whereis.cli import main as cli_main
 
     return cli_main()
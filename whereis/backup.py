@@ -0,0 +1,640 @@
+"""Backing up the config files of entries, to a mirrored folder or a tar archive.
+
+The locations of every entry are walked like when fingerprinting them, and each file is stored under its absolute path
+(without the leading separator) in the destination, so a file shared by many entries is only backed up once. Symlinks
+to folders are kept as symlinks, symlinks to files are followed.
+
+Files are copied in the kernel with `os.copy_file_range` or `os.sendfile` where the system has them, and read in chunks
+otherwise. A mirrored folder is written by a pool of threads, each file through a temporary file renamed over it, and
+the files whose size and mtime match the source are skipped, so an interrupted backup resumes where it stopped.
+
+An archive is written in order by a single thread, while a pool of threads reads the small files ahead of it: the
+memory used is bounded by the number of files read ahead. Each member records the device, inode, size and mtime of its
+file in a pax comment, and an uncompressed archive copies the members of the last archive (or of the one left by an
+interrupted backup) whose file didn't change, instead of reading the file again. Compressed archives are written from
+scratch every time.
+"""
+import collections
+import errno
+import os
+import stat
+import sys
+import tarfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from whereis import exceptions, utils
+from whereis.fingerprint import FILE, LINK, UNREADABLE, walk
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+    from whereis.core import Entry
+
+CHUNK_SIZE: int = 1024 * 1024
+# Files up to this size are read ahead of the archive, by the pool of threads.
+PREFETCH_SIZE: int = 1024 * 1024
+# The suffixes of archives, and their compression.
+ARCHIVE_SUFFIXES: Dict[str, str] = {".tar": "", ".tar.gz": "gz", ".tgz": "gz", ".tar.bz2": "bz2", ".tar.xz": "xz"}
+
+# The start of the pax comment of the members of an archive, followed by the device, inode, size and mtime of their
+# file. Extracting ignores comments.
+_KEY_COMMENT: str = "where-is key "
+# The start of the key of symlinks to folders, followed by their target.
+_LINK_KEY: str = "-> "
+# How many bytes are copied in the kernel at once.
+_KERNEL_CHUNK: int = 64 * 1024 * 1024
+# The errors of copying in the kernel meaning it isn't supported for these files.
+_UNSUPPORTED_ERRNOS = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.ETXTBSY)
+
+_KERNEL_COPIES: List[Callable[[int, int, int], int]] = []
+if hasattr(os, "copy_file_range"):
+    _KERNEL_COPIES.append(lambda source, target, count: os.copy_file_range(source, target, count))
+if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+    # sendfile only writes to sockets elsewhere
+    _KERNEL_COPIES.append(lambda source, target, count: os.sendfile(target, source, None, count))
+
+
+class Backup(NamedTuple):
+    """How many files were backed up or skipped, how many bytes were read, and why some files or entries failed."""
+
+    copied: int
+    skipped: int
+    size: int
+    failed: Dict[str, str]
+
+
+class _Item(NamedTuple):
+    """A file, or a symlink to a folder, to back up under a name."""
+
+    name: str
+    path: Path
+    stat: Optional[os.stat_result]
+    target: Optional[str]
+
+
+def is_archive(destination: Path) -> bool:
+    """Checks if a destination is an archive rather than a mirrored folder.
+
+    Args:
+        destination: The destination.
+
+    Returns:
+        True if the destination has the suffix of an archive and isn't an existing folder.
+    """
+    return destination.name.lower().endswith(tuple(ARCHIVE_SUFFIXES)) and not destination.is_dir()
+
+
+def _compression(destination: Path) -> str:
+    """Gets the compression of an archive from its suffix.
+
+    Args:
+        destination: The archive.
+
+    Returns:
+        The compression, empty for an uncompressed archive.
+    """
+    name: str = destination.name.lower()
+    return next(compression for suffix, compression in ARCHIVE_SUFFIXES.items() if name.endswith(suffix))
+
+
+def _key(result: os.stat_result) -> str:
+    """Gets the key of a file, as it's written in the pax header of its member.
+
+    Args:
+        result: The stat result of the file.
+
+    Returns:
+        Its device, inode, size and mtime.
+    """
+    return f"{result.st_dev}:{result.st_ino}:{result.st_size}:{result.st_mtime_ns}"
+
+
+def _items(
+    entries: Iterable["Entry"], excluded: List[Path], executor: "Executor"
+) -> Tuple[List[_Item], Dict[str, str]]:
+    """Lists the files of many entries.
+
+    Args:
+        entries: The entries.
+        excluded: The paths not to back up, like the destination itself.
+        executor: The pool of threads walking the locations.
+
+    Returns:
+        The files and symlinks to folders sorted by name, and the entries whose locations can't be formatted and the
+        folders that can't be listed.
+    """
+    failed: Dict[str, str] = {}
+    locations: List[Path] = []
+    for entry in entries:
+        try:
+            locations.extend(entry.locations)
+        except exceptions.FormatMapError as error:
+            failed[entry.name] = error.message
+    skipped: Tuple[str, ...] = tuple(str(path) for path in excluded)
+    items: Dict[str, _Item] = {}
+    for location, records in zip(locations, executor.map(walk, locations)):
+        for kind, relative, result, target in records:
+            path: Path = location / relative if relative else location
+            if any(str(path) == folder or str(path).startswith(folder + os.sep) for folder in skipped):
+                continue
+            if kind == UNREADABLE:
+                failed[str(path)] = "The folder can't be listed."
+            elif kind in (FILE, LINK):
+                name: str = "/".join(path.parts[1:])
+                items[name] = _Item(name, path, result, target)
+    return [items[name] for name in sorted(items)], failed
+
+
+def _transfer(source: int, target: int, count: Optional[int] = None) -> int:
+    """Copies a file to another, from their current positions.
+
+    Notes:
+        The file is copied in the kernel with copy_file_range or sendfile, if one of them is available and works for
+        these files. Otherwise, or if they don't copy anything (like for the files of /proc), it's read in chunks.
+
+    Args:
+        source: The file descriptor to copy from.
+        target: The file descriptor to copy to.
+        count: How many bytes to copy at most. Defaults to everything up to the end of the source.
+
+    Returns:
+        How many bytes were copied.
+
+    Raises:
+        OSError: If the files can't be read or written.
+    """
+    copied: int = 0
+    for kernel_copy in _KERNEL_COPIES:
+        try:
+            while count is None or copied < count:
+                sent: int = kernel_copy(
+                    source, target, _KERNEL_CHUNK if count is None else min(_KERNEL_CHUNK, count - copied)
+                )
+                if not sent:
+                    break
+                copied += sent
+        except OSError as error:
+            if copied or error.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+        if copied:
+            return copied
+    while count is None or copied < count:
+        data: bytes = os.read(source, CHUNK_SIZE if count is None else min(CHUNK_SIZE, count - copied))
+        if not data:
+            break
+        view: memoryview = memoryview(data)
+        while view:
+            view = view[os.write(target, view) :]
+        copied += len(data)
+    return copied
+
+
+def _copy(item: _Item, target: Path) -> int:
+    """Copies a file into a mirrored folder, through a temporary file renamed over the copy.
+
+    Notes:
+        The copy gets the permissions and the mtime of the file.
+
+    Args:
+        item: The file.
+        target: The copy.
+
+    Returns:
+        How many bytes were copied.
+
+    Raises:
+        OSError: If the file can't be read or the copy can't be written, the temporary file is removed first.
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary: Path = utils.temporary_path(target)
+    try:
+        with open(str(item.path), "rb", buffering=0) as source, open(str(temporary), "wb", buffering=0) as copy:
+            result: os.stat_result = os.fstat(source.fileno())
+            copied: int = _transfer(source.fileno(), copy.fileno())
+        os.chmod(str(temporary), stat.S_IMODE(result.st_mode))
+        os.utime(str(temporary), ns=(result.st_atime_ns, result.st_mtime_ns))
+        os.replace(str(temporary), str(target))
+    except BaseException:
+        try:
+            temporary.unlink()
+        except OSError:
+            pass
+        raise
+    return copied
+
+
+def _unchanged(item: _Item, target: Path) -> bool:
+    """Checks if the copy of a file in a mirrored folder is up to date.
+
+    Args:
+        item: The file.
+        target: The copy.
+
+    Returns:
+        True if the copy has the size and mtime of the file, and wasn't made within the same mtime tick.
+    """
+    try:
+        result: os.stat_result = os.stat(str(target), follow_symlinks=False)
+    except OSError:
+        return False
+    return (
+        stat.S_ISREG(result.st_mode)
+        and result.st_size == item.stat.st_size  # type: ignore
+        and result.st_mtime_ns == item.stat.st_mtime_ns  # type: ignore
+        and result.st_ctime_ns - result.st_mtime_ns >= utils.RACY_NS
+    )
+
+
+def _link(item: _Item, target: Path) -> bool:
+    """Mirrors a symlink to a folder.
+
+    Args:
+        item: The symlink.
+        target: The mirrored symlink.
+
+    Returns:
+        True if the symlink was created, False if it was already there.
+
+    Raises:
+        OSError: If the symlink can't be created.
+    """
+    try:
+        if os.readlink(str(target)) == item.target:
+            return False
+    except OSError:
+        pass
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary: Path = utils.temporary_path(target)
+    os.symlink(item.target, str(temporary))  # type: ignore
+    try:
+        os.replace(str(temporary), str(target))
+    except OSError:
+        temporary.unlink()
+        raise
+    return True
+
+
+def _mirror(items: List[_Item], destination: Path, workers: int, executor: "Executor") -> Backup:
+    """Backs files up to a mirrored folder.
+
+    Args:
+        items: The files.
+        destination: The folder.
+        workers: The number of threads copying files.
+        executor: The pool of threads.
+
+    Returns:
+        What was backed up.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    copied, skipped, size = 0, 0, 0
+    failed: Dict[str, str] = {}
+    pending: Dict["Future", _Item] = {}
+
+    def collect(done: Iterable["Future"]) -> None:
+        nonlocal copied, size
+        for future in done:
+            item: _Item = pending.pop(future)
+            try:
+                size += future.result()
+                copied += 1
+            except OSError as error:
+                failed[str(item.path)] = error.strerror or str(error)
+
+    for item in items:
+        target: Path = destination / item.name
+        if item.target is not None:
+            try:
+                if _link(item, target):
+                    copied += 1
+                else:
+                    skipped += 1
+            except OSError as error:
+                failed[str(item.path)] = error.strerror or str(error)
+        elif _unchanged(item, target):
+            skipped += 1
+        else:
+            pending[executor.submit(_copy, item, target)] = item
+            if len(pending) >= workers * 2:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+    collect(wait(pending).done)
+    return Backup(copied, skipped, size, failed)
+
+
+class _Archive:
+    def __init__(self, path: Path, compression: str) -> None:
+        """Initializes an _Archive object, creating the archive.
+
+        Args:
+            path: The archive.
+            compression: The compression, empty for none.
+
+        Raises:
+            OSError: If the archive can't be created.
+        """
+        self._file: BinaryIO = open(str(path), "wb", buffering=0)
+        self._stream: BinaryIO = self._file
+        if compression == "gz":
+            import gzip
+
+            self._stream = gzip.GzipFile(filename="", mode="wb", fileobj=self._file, mtime=0)  # type: ignore
+        elif compression == "bz2":
+            import bz2
+
+            self._stream = bz2.BZ2File(self._file, "wb")  # type: ignore
+        elif compression == "xz":
+            import lzma
+
+            self._stream = lzma.LZMAFile(self._file, "wb")  # type: ignore
+        self._offset: int = 0
+
+    def write(self, data: bytes) -> None:
+        """Writes to the archive.
+
+        Args:
+            data: The data.
+
+        Returns:
+            Nothing.
+        """
+        self._stream.write(data)
+        self._offset += len(data)
+
+    def copy(self, source: int, count: int) -> int:
+        """Copies a file to the archive, in the kernel if the archive isn't compressed.
+
+        Args:
+            source: The file descriptor to copy from, from its current position.
+            count: How many bytes to copy at most.
+
+        Returns:
+            How many bytes were copied.
+
+        Raises:
+            OSError: If the file can't be read or the archive can't be written.
+        """
+        copied: int = 0
+        if self._stream is self._file:
+            copied = _transfer(source, self._file.fileno(), count)
+        else:
+            while copied < count:
+                data: bytes = os.read(source, min(CHUNK_SIZE, count - copied))
+                if not data:
+                    break
+                self._stream.write(data)
+                copied += len(data)
+        self._offset += copied
+        return copied
+
+    def pad(self, size: int) -> None:
+        """Pads the archive to a multiple of a size.
+
+        Args:
+            size: The size.
+
+        Returns:
+            Nothing.
+        """
+        if self._offset % size:
+            self.write(tarfile.NUL * (size - self._offset % size))
+
+    def close(self, complete: bool = True) -> None:
+        """Closes the archive.
+
+        Args:
+            complete: Write the end of the archive first?
+
+        Returns:
+            Nothing.
+        """
+        try:
+            if complete:
+                self.write(tarfile.NUL * tarfile.BLOCKSIZE * 2)
+                self.pad(tarfile.RECORDSIZE)
+            if self._stream is not self._file:
+                self._stream.close()
+        finally:
+            self._file.close()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} object: offset={self._offset}>"
+
+
+def _header(item: _Item, result: Optional[os.stat_result], size: int, key: Optional[str]) -> bytes:
+    """Makes the header of a member.
+
+    Args:
+        item: The file, or the symlink to a folder.
+        result: The stat result of the file.
+        size: The size of the member.
+        key: The key of the file, if the member can be copied by the next backups.
+
+    Returns:
+        The header, in the pax format.
+    """
+    info: tarfile.TarInfo = tarfile.TarInfo(item.name)
+    if result is None:
+        info.type = tarfile.SYMTYPE
+        info.linkname = item.target  # type: ignore
+        info.mode = 0o777
+    else:
+        info.size = size
+        info.mode = stat.S_IMODE(result.st_mode)
+        info.mtime = result.st_mtime_ns / 1e9  # type: ignore
+        info.uid, info.gid = result.st_uid, result.st_gid
+    if key is not None:
+        info.pax_headers = {"comment": _KEY_COMMENT + key}
+    return info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+
+
+def _members(archives: List[Path]) -> Dict[str, Tuple[int, int, int, str]]:
+    """Lists the members of the last archives that can be copied.
+
+    Notes:
+        Compressed archives, and the members past the end of a truncated archive, are left out.
+
+    Args:
+        archives: The last archives, the members of the later ones replace those of the earlier ones.
+
+    Returns:
+        The index of the archive of each member, where it starts and ends, and the key of its file (or the target of
+        its symlink), keyed by name.
+    """
+    members: Dict[str, Tuple[int, int, int, str]] = {}
+    for index, path in enumerate(archives):
+        try:
+            size: int = path.stat().st_size
+            with tarfile.open(str(path), "r:") as archive:
+                for member in archive:
+                    comment: str = member.pax_headers.get("comment", "")
+                    end: int = member.offset_data + -(-member.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+                    if end > size:
+                        break
+                    if member.issym():
+                        members[member.name] = (index, member.offset, end, _LINK_KEY + member.linkname)
+                    elif member.isreg() and comment.startswith(_KEY_COMMENT):
+                        members[member.name] = (index, member.offset, end, comment[len(_KEY_COMMENT) :])
+        except (OSError, tarfile.TarError):
+            continue
+    return members
+
+
+def _read(path: Path) -> Tuple[bytes, os.stat_result]:
+    """Reads a small file ahead of the archive.
+
+    Args:
+        path: The file.
+
+    Returns:
+        The content of the file, and its stat result.
+
+    Raises:
+        OSError: If the file can't be read.
+    """
+    with open(str(path), "rb", buffering=0) as file:
+        return file.read(), os.fstat(file.fileno())  # type: ignore
+
+
+def _archive(items: List[_Item], destination: Path, workers: int, executor: "Executor") -> Backup:
+    """Backs files up to an archive.
+
+    Notes:
+        The archive is written to a hidden file next to it, renamed over it once complete. If that file is still
+        there from an interrupted backup, its members are copied as well.
+
+    Args:
+        items: The files.
+        destination: The archive.
+        workers: The number of threads reading files ahead.
+        executor: The pool of threads.
+
+    Returns:
+        What was backed up.
+
+    Raises:
+        OSError: If the archive can't be written.
+    """
+    compression: str = _compression(destination)
+    partial: Path = destination.with_name(f".{destination.name}.partial")
+    resumed: Path = destination.with_name(f".{destination.name}.resume")
+    if partial.exists():
+        os.replace(str(partial), str(resumed))
+    last: List[Path] = [destination, resumed]
+    members: Dict[str, Tuple[int, int, int, str]] = {} if compression else _members(last)
+    sources: Dict[int, BinaryIO] = {}
+    started_ns: int = time.time_ns()
+    copied, skipped, size = 0, 0, 0
+    failed: Dict[str, str] = {}
+    archive: _Archive = _Archive(partial, compression)
+
+    def reusable(item: _Item) -> bool:
+        member: Optional[Tuple[int, int, int, str]] = members.get(item.name)
+        if member is None:
+            return False
+        return member[3] == (_LINK_KEY + item.target if item.target is not None else _key(item.stat))  # type: ignore
+
+    def back_up(item: _Item, future: Optional["Future"]) -> None:
+        nonlocal copied, skipped, size
+        if reusable(item):
+            index, start, end, _ = members[item.name]
+            if index not in sources:
+                sources[index] = open(str(last[index]), "rb", buffering=0)
+            os.lseek(sources[index].fileno(), start, os.SEEK_SET)
+            if archive.copy(sources[index].fileno(), end - start) != end - start:
+                raise OSError(errno.EIO, f"'{last[index]}' was truncated while being copied")
+            skipped += 1
+        elif item.target is not None:
+            archive.write(_header(item, None, 0, None))
+            copied += 1
+        else:
+            try:
+                if future is not None:
+                    data, result = future.result()
+                else:
+                    file: BinaryIO = open(str(item.path), "rb", buffering=0)
+                    result = os.fstat(file.fileno())
+            except OSError as error:
+                failed[str(item.path)] = error.strerror or str(error)
+                return
+            key: Optional[str] = _key(result) if started_ns - result.st_mtime_ns >= utils.RACY_NS else None
+            if future is not None:
+                archive.write(_header(item, result, len(data), key))
+                archive.write(data)
+                size += len(data)
+            else:
+                with file:
+                    archive.write(_header(item, result, result.st_size, key))
+                    read: int = archive.copy(file.fileno(), result.st_size)
+                if read < result.st_size:
+                    # the size is already in the header, the rest of the member is zeroed
+                    archive.write(tarfile.NUL * (result.st_size - read))
+                    failed[str(item.path)] = "The file shrank while being backed up."
+                size += read
+            archive.pad(tarfile.BLOCKSIZE)
+            copied += 1
+
+    complete: bool = False
+    try:
+        ahead: Deque[Tuple[_Item, Optional["Future"]]] = collections.deque()
+        for item in items:
+            prefetch: bool = (
+                item.target is None and item.stat.st_size <= PREFETCH_SIZE and not reusable(item)  # type: ignore
+            )
+            ahead.append((item, executor.submit(_read, item.path) if prefetch else None))
+            if len(ahead) >= workers * 2:
+                back_up(*ahead.popleft())
+        while ahead:
+            back_up(*ahead.popleft())
+        complete = True
+    finally:
+        archive.close(complete)
+        for source in sources.values():
+            source.close()
+    os.replace(str(partial), str(destination))
+    try:
+        resumed.unlink()
+    except OSError:
+        pass
+    return Backup(copied, skipped, size, failed)
+
+
+def backup(entries: Iterable["Entry"], destination: Path, workers: int = utils.DEFAULT_WORKERS) -> Backup:
+    """Backs the config files of many entries up to a mirrored folder or an archive.
+
+    Notes:
+        Files removed since the last backup aren't removed from a mirrored folder, they are left out of an archive.
+
+    Args:
+        entries: The entries.
+        destination: The folder, or the archive if it ends with the suffix of an archive.
+        workers: The number of threads walking locations, and copying files or reading them ahead of the archive.
+
+    Returns:
+        What was backed up.
+
+    Raises:
+        OSError: If the destination can't be written.
+        ValueError: If there isn't at least one worker.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    utils.check_workers(workers)
+    destination = Path(os.path.abspath(destination))
+    archive: bool = is_archive(destination)
+    excluded: List[Path] = [destination]
+    if archive:
+        excluded += [
+            destination.with_name(f".{destination.name}.partial"),
+            destination.with_name(f".{destination.name}.resume"),
+        ]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        items, failed = _items(entries, excluded, executor)
+        if archive:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            result: Backup = _archive(items, destination, workers, executor)
+        else:
+            destination.mkdir(parents=True, exist_ok=True)
+            result = _mirror(items, destination, workers, executor)
+    failed.update(result.failed)
+    return result._replace(failed=failed)
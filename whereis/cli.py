@@ -1,16 +1,48 @@
 """The cli frontend for where-is."""
+import contextlib
 import typer
+import os
+import signal
+import sys
 from pathlib import Path
-from whereis import utils, levels, Database, Entry, input, version, exceptions
-from typing import Optional, List
-from rich import print
-from rich.console import Console
+from whereis import utils, levels, commands, Database, Entry, input, version, exceptions, transfer
+from whereis.commands import print
+from whereis.discover import DEFAULT_DEPTH
+from whereis.search import DEFAULT_LIMIT
+from whereis.watch import CREATED, DEFAULT_INTERVAL, DEFAULT_MAX_INTERVAL, DELETED, MODIFIED
+from whereis.storage import Layout
+from whereis.output import (
+    Format,
+    Record,
+    RecordWriter,
+    STATUS_COLUMNS,
+    ENTRY_COLUMNS,
+    SEARCH_COLUMNS,
+    OWNER_COLUMNS,
+    EVENT_COLUMNS,
+    FINGERPRINT_COLUMNS,
+    status_record,
+    entry_record,
+    owner_record,
+    event_record,
+    fingerprint_record,
+)
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, List
+
+if TYPE_CHECKING:
+    from rich.table import Table
+    from whereis.backup import Backup
+    from whereis.daemon import Client
+    from whereis.discover import Discovery
+    from whereis.fingerprint import Fingerprints
+    from whereis.watch import Watcher
 
 app: typer.Typer = typer.Typer(
     help="An elegant way to find configuration files (and folders)."
 )
-is_verbose: bool = False
 database_location: Path = utils.config_folder()
+project_location: Optional[Path] = None
+_EVENT_COLORS: Dict[str, str] = {CREATED: "green", MODIFIED: "yellow", DELETED: "red"}
 VERSION_STRING: str = f"""[bold dark_blue]  ---       [/][italic]where-is[/] {version} Copyright (C) 2020
 [bold dark_blue] /          [/]Made by [italic bold]ALinuxPerson[/]. This project uses the [italic bold]GNU GPLv3[/] license.
 [bold dark_blue]<  ?
@@ -18,46 +50,15 @@ VERSION_STRING: str = f"""[bold dark_blue]  ---       [/][italic]where-is[/] {ve
 [bold dark_blue]  ---       [/]and you are welcome to redistribute it under certain conditions."""
 
 
-def _log(message: str) -> None:
-    return levels.debug(message) if is_verbose else None
-
-
-def _get_entry(
-    entry_name: str, database: Database, no_err: bool = False
-) -> Optional[Entry]:
-    """Gets an entry safely.
-
-    This function prevents exceptions from being printed out from core and instead replaces them with not so verbose,
-    user friendly messages.
-
-    Args:
-        entry_name: The entry name.
-        database: The database.
-        no_err: Should no errors be displayed?
-
-    Returns:
-        An entry if no error was encountered, else nothing.
-    """
-    for entry_ in database.entries:
-        _log(f"Checking if [bold]'{entry_.name}'[/] == [bold]'{entry_name}'[/]...")
-        try:
-            if entry_.name == entry_name:
-                _log(f"Got entry, {entry_}")
-                return entry_
-        except exceptions.FormatMapError as error:
-            levels.error(f"Entry formatting error: [italic]{error.message}")
-            return None
-    else:
-        if not no_err:
-            levels.error(f"Couldn't find entry '{entry_name}' in the database.")
-        else:
-            _log(
-                f"Couldn't find any entry, but the no_err argument is True, so not printing any errors."
-            )
-        return None
-
-
-def _eval_db_opts(info: bool, add: bool, remove: bool, delete: bool) -> bool:
+def _eval_db_opts(
+    info: bool,
+    add: bool,
+    remove: bool,
+    delete: bool,
+    migrate: bool = False,
+    import_: bool = False,
+    export: bool = False,
+) -> bool:
     """Evaluates the options given by the user in the `where-is database [OPTIONS]` argument.
 
     The `where-is database [OPTIONS]` arguments are all mutually exclusive, which means this needs to be implemented to
@@ -68,55 +69,28 @@ def _eval_db_opts(info: bool, add: bool, remove: bool, delete: bool) -> bool:
         add: The add option.
         remove: The remove option.
         delete: The delete option.
+        migrate: The migrate option.
+        import_: The import option.
+        export: The export option.
 
     Returns:
         True if the options are mutually exclusive, else False.
     """
-    _log(
+    commands.log(
         f"Got options:\n"
-        f"info: {info}, add: {add}, remove: {remove}, delete: {delete}"
+        f"info: {info}, add: {add}, remove: {remove}, delete: {delete}, migrate: {migrate}, "
+        f"import: {import_}, export: {export}"
     )
-    opts: List[bool] = [info, add, remove, delete]
+    opts: List[bool] = [info, add, remove, delete, migrate, import_, export]
     if opts.count(True) > 1:
         levels.error(
-            f"The info, add, remove and delete options are mutually exclusive with each other."
+            f"The info, add, remove, delete, migrate, import and export options are mutually exclusive with each "
+            f"other."
         )
         return False
     return True
 
 
-def _get_database(location: Path) -> Optional[Database]:
-    """Gets a database object safely.
-
-    This function prevents exceptions from being printed out from core and instead replaces them with not so verbose,
-    user friendly messages. If the database doesn't exist, this function creates it automatically.
-
-    Args:
-        location: The location where the database is.
-
-    Returns:
-        A database object if no error was encountered, else nothing.
-    """
-    database: Database = Database(location)
-    if not database.exists():
-        try:
-            levels.info("Database doesn't exist, creating...")
-            database.create()
-        except PermissionError as error:
-            levels.error(
-                f"Can't create database at location '{location}': [italic]{error}"
-            )
-            return None
-    try:
-        _: List[Entry] = database.entries
-    except exceptions.EntryParseError as error:
-        levels.error(f"Database error: [italic]{error.message}")
-        return None
-    _log(f"Got database, {database}")
-
-    return database
-
-
 def _add_entry(database: Database) -> bool:
     """Adds an entry safely.
 
@@ -130,7 +104,7 @@ def _add_entry(database: Database) -> bool:
     """
     levels.info("Enter the name of the entry.")
     entry_name: str = input("[blue]Entry name: ")
-    if entry_name in [entry.name for entry in database.entries]:
+    if entry_name in database:
         levels.error("That entry already exists.")
         return False
     entry_locations: List[str] = []
@@ -160,7 +134,7 @@ def _rm_entry(database: Database) -> None:
         Nothing.
     """
     levels.info("Enter the name of the entry: ")
-    entry: Optional[Entry] = _get_entry(input("[blue]Entry name: "), database)
+    entry: Optional[Entry] = commands.get_entry(input("[blue]Entry name: "), database)
     if not entry:
         return
     database -= entry  # type: ignore
@@ -186,6 +160,213 @@ def _del_db(database: Database) -> None:
         levels.error(f"Error: [italic]{error}")
 
 
+def _migrate_db(database: Database, storage: str) -> None:
+    """Moves the entries of a database to another storage layout safely.
+
+    Args:
+        database: The database object.
+        storage: The name of the new layout.
+
+    Returns:
+        Nothing.
+    """
+    try:
+        database.migrate(storage)
+        levels.success(f"Successfully moved the database to the {storage} storage.")
+    except exceptions.StorageError as error:
+        levels.error(f"Error: [italic]{error.message}")
+    except exceptions.EntryParseError as error:
+        levels.error(f"Database error: [italic]{error.message}")
+
+
+def _import_entries(database: Database, file: Path, batch_size: int, skip_existing: bool) -> None:
+    """Adds the entries of a json array or ndjson file to a database safely.
+
+    Args:
+        database: The database object.
+        file: The file, or '-' for stdin.
+        batch_size: How many entries are written at once.
+        skip_existing: Whether entries whose name is taken are skipped.
+
+    Returns:
+        Nothing.
+    """
+    try:
+        if str(file) == "-":
+            added: int = database.bulk_add(transfer.read_entries(sys.stdin), batch_size, skip_existing)
+        else:
+            with file.open(encoding="utf-8") as stream:
+                added = database.bulk_add(
+                    transfer.read_entries(stream, str(file)), batch_size, skip_existing
+                )
+        levels.success(f"Imported {added} entries.")
+    except OSError as error:
+        levels.error(f"Unable to read '{file}': [italic]{error.strerror}")
+    except (exceptions.EntryExistsError, exceptions.EntryParseError) as error:
+        levels.error(f"Import error: [italic]{error.message}")
+    except ValueError as error:
+        levels.error(f"Import error: [italic]{error}")
+
+
+def _export_entries(database: Database, file: Path, format_: Format) -> None:
+    """Writes every entry of a database to a file safely.
+
+    Args:
+        database: The database object.
+        file: The file, or '-' for stdout.
+        format_: The output format, guessed from the suffix of the file if it's rich.
+
+    Returns:
+        Nothing.
+    """
+    if format_ is Format.rich:
+        format_ = Format.ndjson if file.suffix in (".ndjson", ".jsonl") else Format.json
+    if format_ not in (Format.json, Format.ndjson):
+        return levels.error("Entries can only be exported as json or ndjson.")
+    try:
+        if str(file) == "-":
+            transfer.write_entries(database, sys.stdout, format_)
+            return
+        # the entries are written next to the file first, so that a failed export doesn't leave half a file
+        temporary: Path = file.with_name(f".{file.name}.{os.getpid()}.tmp")
+        try:
+            with temporary.open("w", encoding="utf-8") as stream:
+                exported: int = transfer.write_entries(database, stream, format_)
+            os.replace(temporary, file)
+        finally:
+            if temporary.exists():
+                temporary.unlink()
+        levels.success(f"Exported {exported} entries to '{file}'.")
+    except OSError as error:
+        levels.error(f"Unable to write '{file}': [italic]{error.strerror}")
+    except exceptions.EntryParseError as error:
+        levels.error(f"Database error: [italic]{error.message}")
+
+
+def _print_scan_record(
+    record: Record, existing: bool, writer: Optional[RecordWriter]
+) -> None:
+    """Prints the status record of a scanned entry.
+
+    Args:
+        record: The status record.
+        existing: Only print the record if a location exists?
+        writer: The record writer, or nothing to render the record with rich.
+
+    Returns:
+        Nothing.
+    """
+    found: List[str] = [
+        location["path"] for location in record["locations"] if location["exists"]
+    ]
+    if existing and not found:
+        return
+    if writer:
+        return writer.write(record)
+    if "error" in record:
+        levels.error(f"[bold]{record['name']}[/]: [italic]{record['error']}")
+        return
+    color: str = "green4" if found else "red"
+    print(f"[bold]{record['name']}[/] [{color}]{len(found)}/{len(record['locations'])}")
+    for location in found:
+        print(f"  [magenta]{location}")
+
+
+def _search_table(records: List[Record]) -> "Table":
+    """Generates a table of search results.
+
+    Args:
+        records: The search records.
+
+    Returns:
+        A table, usable by rich print instances.
+    """
+    from rich.table import Table
+
+    table: Table = Table(title="[bold purple]Entries found")
+    for column in ["Name", "Score", "Match", "Locations"]:
+        table.add_column(column)
+    for record in records:
+        table.add_row(
+            f"[bold]{record['name']}",
+            f"{record['score']:.2f}",
+            f"[italic]{record['match']}",
+            "\n".join(f"[magenta]{location}" for location in record["locations"]),
+        )
+    return table
+
+
+def _owner_table(records: List[Record]) -> "Table":
+    """Generates a table of the entries owning a path.
+
+    Args:
+        records: The owner records.
+
+    Returns:
+        A table, usable by rich print instances.
+    """
+    from rich.table import Table
+
+    table: Table = Table(title="[bold purple]Owners found")
+    for column in ["Name", "Location", "Exact"]:
+        table.add_column(column)
+    for record in records:
+        exact: bool = record["exact"]
+        table.add_row(
+            f"[bold]{record['name']}",
+            f"[magenta]{record['location']}",
+            f"[green4]{exact}" if exact else f"[yellow]{exact}",
+        )
+    return table
+
+
+def _discover_table(entries: List[Entry]) -> "Table":
+    """Generates a table of proposed entries.
+
+    Args:
+        entries: The proposed entries.
+
+    Returns:
+        A table, usable by rich print instances.
+    """
+    from rich.table import Table
+
+    table: Table = Table(title="[bold purple]Entries proposed")
+    for column in ["Name", "Locations"]:
+        table.add_column(column)
+    for entry in entries:
+        table.add_row(
+            f"[bold]{entry.name}",
+            "\n".join(f"[magenta]{location}" for location in entry.locations),
+        )
+    return table
+
+
+def _fingerprint_table(records: List[Record]) -> "Table":
+    """Generates a table of entry fingerprints.
+
+    Args:
+        records: The fingerprint records.
+
+    Returns:
+        A table, usable by rich print instances.
+    """
+    from rich.table import Table
+
+    table: Table = Table(title="[bold purple]Fingerprints")
+    table.add_column("Name")
+    table.add_column("Digest", overflow="fold")
+    table.add_column("Files")
+    for record in records:
+        unreadable: int = sum(digest is None for digest in record["files"].values())
+        table.add_row(
+            f"[bold]{record['name']}",
+            f"[cyan]{record['digest']}",
+            f"{len(record['files'])}" + (f" [red]({unreadable} unreadable)" if unreadable else ""),
+        )
+    return table
+
+
 def _show_version(value: bool) -> None:
     """Shows the formatted version.
 
@@ -196,6 +377,8 @@ def _show_version(value: bool) -> None:
         Nothing.
     """
     if value:
+        from rich.console import Console
+
         console: Console = Console()
         console.print(VERSION_STRING, style="blue")
         raise typer.Exit()
@@ -204,6 +387,7 @@ def _show_version(value: bool) -> None:
 # noinspection PyUnusedLocal
 @app.callback()
 def root(
+    ctx: typer.Context,
     verbose: bool = typer.Option(False, help="Enable verbose output."),
     version_: bool = typer.Option(
         None,
@@ -214,37 +398,444 @@ def root(
     database_location_: Path = typer.Option(
         None, "--database-location", help="Specify the database location."
     ),
+    project_location_: Path = typer.Option(
+        None, "--project", help="Layer the database of a project folder below the database."
+    ),
+    profile: bool = typer.Option(
+        False, "--profile", help="Print the time and peak memory of each phase to stderr."
+    ),
+    profile_report: Path = typer.Option(
+        None, "--profile-report", help="Write the profile as json to a file ('-' for stderr)."
+    ),
+    profile_stats: Path = typer.Option(
+        None, "--profile-stats", help="Dump the cProfile stats of the command to a file."
+    ),
 ) -> None:
     """The root arguments.
 
     Args:
+        ctx: The click context, the profile is shown when it's closed.
         verbose: Enable verbose output.
         version_: Show version.
         database_location_: Specify the database location.
+        project_location_: Specify the project database location.
+        profile: Print the profile of the command.
+        profile_report: Write the profile of the command as json.
+        profile_stats: Dump the cProfile stats of the command.
 
     Returns:
         Nothing.
     """
-    global is_verbose
-    global database_location
+    global database_location, project_location
 
     if verbose:
-        is_verbose = True
+        commands.is_verbose = True
 
     if database_location_:
         database_location = database_location_
 
+    if project_location_:
+        project_location = project_location_
+
+    if profile or profile_report or profile_stats:
+        stack: contextlib.ExitStack = contextlib.ExitStack()
+        stack.enter_context(commands.profiled(profile, profile_report, profile_stats))
+        ctx.call_on_close(stack.close)
+
+
+def _list_entries(database: Database, format_: Format) -> None:
+    """Streams every entry of a database in a machine-readable format.
+
+    Args:
+        database: The database object.
+        format_: The output format.
+
+    Returns:
+        Nothing.
+    """
+    with RecordWriter(format_, ENTRY_COLUMNS) as writer:
+        for entry in database:
+            try:
+                writer.write(entry_record(entry.name, entry.locations))
+            except exceptions.FormatMapError as error:
+                levels.error(f"Entry formatting error: [italic]{error.message}")
+
 
 @app.command()
-def find(name: str = typer.Argument(..., help="The name of the entry.")) -> None:
-    """Find an entry with the name NAME"""
-    database: Optional[Database] = _get_database(database_location)
+def find(
+    names: List[str] = typer.Argument(None, help="The names of the entries."),
+    stdin: bool = typer.Option(
+        False, "--stdin", help="Read more entry names from stdin, one per line."
+    ),
+    direct: bool = typer.Option(
+        True,
+        "--direct/--no-direct",
+        help="Only read the entry file named after NAME, scanning the database if it doesn't match.",
+    ),
+    format_: Format = typer.Option(Format.rich, "--format", help="The output format."),
+    daemon: bool = typer.Option(
+        True, "--daemon/--no-daemon", help="Ask the daemon serving the database, if it's running."
+    ),
+) -> None:
+    """Find the entries with the names NAMES"""
+    if not commands.find(
+        database_location, list(names or []), stdin, direct, format_, daemon, project_location
+    ):
+        raise typer.Exit(code=1)
+
+
+@app.command("scan")
+def cli_scan(
+    workers: int = typer.Option(
+        utils.DEFAULT_WORKERS,
+        "--workers",
+        "-j",
+        min=1,
+        help="The number of threads checking locations.",
+    ),
+    existing: bool = typer.Option(
+        False, "--existing", help="Only show entries with an existing location."
+    ),
+    format_: Format = typer.Option(Format.rich, "--format", help="The output format."),
+    daemon: bool = typer.Option(
+        True, "--daemon/--no-daemon", help="Ask the daemon serving the database, if it's running."
+    ),
+) -> None:
+    """Check which locations of every entry exist, concurrently."""
+    client: Optional["Client"] = (
+        commands.connect_daemon(database_location) if daemon and not project_location else None
+    )
+    database: Optional[Database] = None if client else commands.get_database(
+        database_location, project=project_location
+    )
+    if not client and not database:
+        return
+    writer: Optional[RecordWriter] = commands.open_writer(format_, STATUS_COLUMNS)
+    try:
+        if client:
+            for response in client.request("scan", workers=workers):
+                if "error" in response:
+                    levels.error(f"Error: [italic]{response['error']}")
+                else:
+                    _print_scan_record(response["status"], existing, writer)
+        else:
+            for result in database.scan(workers=workers):  # type: ignore
+                _print_scan_record(
+                    status_record(result.entry.name, result.status, result.error), existing, writer
+                )
+    except exceptions.DaemonError as error:
+        levels.error(f"Daemon error: [italic]{error.message}")
+    finally:
+        if writer:
+            writer.close()
+        if client:
+            client.close()
+
+
+@app.command("search")
+def cli_search(
+    query: str = typer.Argument(..., help="The query."),
+    limit: int = typer.Option(
+        DEFAULT_LIMIT, "--limit", "-n", min=1, help="The maximum number of results."
+    ),
+    format_: Format = typer.Option(Format.rich, "--format", help="The output format."),
+    daemon: bool = typer.Option(
+        True, "--daemon/--no-daemon", help="Ask the daemon serving the database, if it's running."
+    ),
+) -> None:
+    """Search for entries whose name or locations look like QUERY"""
+    client: Optional["Client"] = (
+        commands.connect_daemon(database_location) if daemon and not project_location else None
+    )
+    database: Optional[Database] = None if client else commands.get_database(
+        database_location, validate=False, project=project_location
+    )
+    if not client and not database:
+        return
+    records: Iterator[Record]
+    try:
+        if client:
+            with client:
+                responses: List[Record] = list(client.request("search", query=query, limit=limit))
+            for response in responses:
+                if "error" in response:
+                    return levels.error(f"Error: [italic]{response['error']}")
+            records = (response["result"] for response in responses)
+        else:
+            records = map(commands.result_record, database.search(query, limit))  # type: ignore
+    except exceptions.DaemonError as error:
+        return levels.error(f"Daemon error: [italic]{error.message}")
+    except exceptions.EntryParseError as error:
+        return levels.error(f"Database error: [italic]{error.message}")
+    if format_ is not Format.rich:
+        with RecordWriter(format_, SEARCH_COLUMNS) as writer:
+            for record in records:
+                writer.write(record)
+        return
+    results: List[Record] = list(records)
+    if not results:
+        return levels.info(f"No entry looks like '{query}'.")
+    print(_search_table(results))
+
+
+@app.command()
+def owner(
+    path: Path = typer.Argument(..., help="The path."),
+    format_: Format = typer.Option(Format.rich, "--format", help="The output format."),
+    daemon: bool = typer.Option(
+        True, "--daemon/--no-daemon", help="Ask the daemon serving the database, if it's running."
+    ),
+) -> None:
+    """Find the entries PATH belongs to, either as one of their locations or inside one"""
+    path = Path(os.path.abspath(os.path.expanduser(str(path))))
+    client: Optional["Client"] = (
+        commands.connect_daemon(database_location) if daemon and not project_location else None
+    )
+    database: Optional[Database] = None if client else commands.get_database(
+        database_location, validate=False, project=project_location
+    )
+    if not client and not database:
+        return
+    records: List[Record]
+    try:
+        if client:
+            with client:
+                responses: List[Record] = list(client.request("owner", path=str(path)))
+            for response in responses:
+                if "error" in response:
+                    return levels.error(f"Error: [italic]{response['error']}")
+            records = [response["owner"] for response in responses]
+        else:
+            records = [
+                owner_record(found.entry.name, found.location, found.exact)
+                for found in database.owner_of(path)  # type: ignore
+            ]
+    except exceptions.DaemonError as error:
+        return levels.error(f"Daemon error: [italic]{error.message}")
+    except exceptions.EntryParseError as error:
+        return levels.error(f"Database error: [italic]{error.message}")
+    if format_ is not Format.rich:
+        with RecordWriter(format_, OWNER_COLUMNS) as writer:
+            for record in records:
+                writer.write(record)
+        return
+    if not records:
+        return levels.info(f"No entry owns '{path}'.")
+    print(_owner_table(records))
+
+
+@app.command("discover")
+def cli_discover(
+    depth: int = typer.Option(
+        DEFAULT_DEPTH, "--depth", min=1, help="How deep config files can be under the folders walked."
+    ),
+    workers: int = typer.Option(
+        utils.DEFAULT_WORKERS, "--workers", "-j", min=1, help="The number of threads listing folders."
+    ),
+    cache: bool = typer.Option(
+        True, "--cache/--no-cache", help="Only list the folders that changed since the last discovery."
+    ),
+    format_: Format = typer.Option(Format.rich, "--format", help="The output format."),
+) -> None:
+    """Propose entries for the config files in the home folder, the config folder and /etc that aren't in one"""
+    database: Optional[Database] = commands.get_database(
+        database_location, validate=False, project=project_location
+    )
     if not database:
         return
-    entry_: Optional[Entry] = _get_entry(name, database)
-    if not entry_:
+    try:
+        discovery: Discovery = database.discover(max_depth=depth, workers=workers, cache=cache)
+    except exceptions.EntryParseError as error:
+        return levels.error(f"Database error: [italic]{error.message}")
+    levels.info(
+        f"Proposed {len(discovery.entries)} entries, "
+        f"listed {discovery.listed} folders and reused {discovery.reused} unchanged ones."
+    )
+    if format_ is Format.rich:
+        if discovery.entries:
+            print(_discover_table(discovery.entries))
+        return
+    with RecordWriter(format_, ENTRY_COLUMNS) as writer:
+        for entry in discovery.entries:
+            if format_ is Format.tsv:
+                writer.write(entry_record(entry.name, entry.locations))
+            else:
+                writer.write(entry.to_dict)
+
+
+@app.command("fingerprint")
+def cli_fingerprint(
+    names: Optional[List[str]] = typer.Argument(
+        None, help="The entries to fingerprint. Defaults to every entry of the database."
+    ),
+    workers: int = typer.Option(
+        utils.DEFAULT_WORKERS, "--workers", "-j", min=1, help="The number of threads hashing files."
+    ),
+    cache: bool = typer.Option(
+        True, "--cache/--no-cache", help="Only read the files that changed since the last fingerprint."
+    ),
+    format_: Format = typer.Option(Format.rich, "--format", help="The output format."),
+) -> None:
+    """Hash the content of the config files of entries, to tell if they changed between runs"""
+    database: Optional[Database] = commands.get_database(
+        database_location, project=project_location
+    )
+    if not database:
+        return
+    entries: List[Entry] = []
+    for name in names or []:
+        entry_: Optional[Entry] = commands.get_entry(name, database)
+        if not entry_:
+            return
+        entries.append(entry_)
+    try:
+        fingerprints: Fingerprints = database.fingerprint(entries or None, workers, cache)
+    except exceptions.EntryParseError as error:
+        return levels.error(f"Database error: [italic]{error.message}")
+    levels.info(
+        f"Fingerprinted {len(fingerprints.fingerprints)} entries, "
+        f"hashed {fingerprints.hashed} files and reused {fingerprints.reused} unchanged ones."
+    )
+    records: List[Record] = [
+        fingerprint_record(found.entry.name, found.digest, found.files, found.error)
+        for found in fingerprints.fingerprints
+    ]
+    if format_ is not Format.rich:
+        with RecordWriter(format_, FINGERPRINT_COLUMNS) as writer:
+            for record in records:
+                writer.write(record)
+        return
+    for record in records:
+        if "error" in record:
+            levels.error(f"[bold]{record['name']}[/]: [italic]{record['error']}")
+    if any("error" not in record for record in records):
+        print(_fingerprint_table([record for record in records if "error" not in record]))
+
+
+@app.command("backup")
+def cli_backup(
+    destination: Path = typer.Option(
+        ...,
+        "--to",
+        help="The folder to mirror the config files in, or the archive ('.tar', '.tar.gz', '.tar.xz'...) to write.",
+    ),
+    names: Optional[List[str]] = typer.Argument(
+        None, help="The entries to back up. Defaults to every entry of the database."
+    ),
+    workers: int = typer.Option(
+        utils.DEFAULT_WORKERS, "--workers", "-j", min=1, help="The number of threads copying or reading files."
+    ),
+) -> None:
+    """Back the config files of entries up, only copying the files that changed since the last backup"""
+    database: Optional[Database] = commands.get_database(
+        database_location, project=project_location
+    )
+    if not database:
+        return
+    entries: List[Entry] = []
+    for name in names or []:
+        entry_: Optional[Entry] = commands.get_entry(name, database)
+        if not entry_:
+            return
+        entries.append(entry_)
+    destination = Path(os.path.expanduser(str(destination)))
+    try:
+        result: Backup = database.backup(destination, entries or None, workers)
+    except OSError as error:
+        return levels.error(f"Unable to write '{destination}': [italic]{error.strerror or error}")
+    except exceptions.EntryParseError as error:
+        return levels.error(f"Database error: [italic]{error.message}")
+    for path, reason in result.failed.items():
+        levels.warn(f"[bold]{path}[/]: [italic]{reason}")
+    levels.success(
+        f"Backed up {result.copied} files ({result.size / 2 ** 20:.1f} MiB) to '{destination}', "
+        f"skipped {result.skipped} unchanged ones."
+    )
+
+
+@app.command("watch")
+def cli_watch(
+    names: Optional[List[str]] = typer.Argument(
+        None, help="The entries to watch. Defaults to every entry of the database."
+    ),
+    poll: bool = typer.Option(False, "--poll", help="Poll the locations even if inotify is available."),
+    interval: float = typer.Option(
+        DEFAULT_INTERVAL, "--interval", min=0.01, help="The shortest time between two polls, in seconds."
+    ),
+    max_interval: float = typer.Option(
+        DEFAULT_MAX_INTERVAL, "--max-interval", min=0.01, help="The longest time between two polls, in seconds."
+    ),
+    format_: Format = typer.Option(Format.rich, "--format", help="The output format."),
+) -> None:
+    """Stream the locations of entries being created, modified or deleted, until interrupted."""
+    database: Optional[Database] = commands.get_database(
+        database_location, project=project_location
+    )
+    if not database:
+        return
+    entries: List[Entry] = []
+    for name in names or []:
+        entry_: Optional[Entry] = commands.get_entry(name, database)
+        if not entry_:
+            return
+        entries.append(entry_)
+    try:
+        watcher: Watcher = database.watch(entries or None, poll, interval, max(interval, max_interval))
+    except exceptions.EntryParseError as error:
+        return levels.error(f"Database error: [italic]{error.message}")
+    except exceptions.FormatMapError as error:
+        return levels.error(f"Entry formatting error: [italic]{error.message}")
+    commands.log(f"Watching {len(watcher.locations)} locations with {watcher.backend}, {watcher}")
+    writer: Optional[RecordWriter] = commands.open_writer(format_, EVENT_COLUMNS)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        with watcher:
+            for event in watcher:
+                for name in event.names:
+                    if writer:
+                        writer.write(event_record(event.kind, name, event.path))
+                    else:
+                        print(f"[{_EVENT_COLORS[event.kind]}]{event.kind}[/] [magenta]{event.path}[/] ({name})")
+                if writer:
+                    writer.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if writer:
+            writer.close()
+
+
+@app.command()
+def serve(
+    interval: float = typer.Option(
+        1.0, "--interval", min=0.1, help="How often to check the database for changes, in seconds."
+    ),
+) -> None:
+    """Keep the database warm and answer find, scan, search and owner requests over a unix socket, until interrupted."""
+    from whereis.daemon import Server
+
+    if project_location:
+        # the socket is found from the database location alone, clients without --project would get its entries
+        levels.error("The daemon can't serve a project layer, run it without --project.")
         return
-    print(entry_)
+    database: Optional[Database] = commands.get_database(database_location)
+    if not database:
+        return
+    try:
+        server: Server = Server(database, interval)
+    except exceptions.DaemonError as error:
+        levels.error(f"Daemon error: [italic]{error.message}")
+        return
+    except (exceptions.EntryParseError, OSError) as error:
+        levels.error(f"Can't start the daemon: [italic]{error}")
+        return
+    levels.info(f"Serving the database at '{database.location}', press ctrl-C to stop.")
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            levels.info("Stopped serving the database.")
 
 
 @app.command("database")
@@ -255,14 +846,39 @@ def cli_database(
         False, "--remove", help="Remove an entry from a database."
     ),
     delete: bool = typer.Option(False, "--delete", help="Deletes the database."),
+    migrate: Optional[Layout] = typer.Option(
+        None, "--migrate", help="Move the entries of the database to another storage layout."
+    ),
+    import_: Optional[Path] = typer.Option(
+        None, "--import", help="Add the entries of a json array or ndjson file ('-' for stdin)."
+    ),
+    export: Optional[Path] = typer.Option(
+        None, "--export", help="Write every entry to a json or ndjson file ('-' for stdout)."
+    ),
+    batch_size: int = typer.Option(
+        transfer.DEFAULT_BATCH, "--batch-size", help="How many entries '--import' writes at once."
+    ),
+    skip_existing: bool = typer.Option(
+        False, "--skip-existing", help="Skip imported entries whose name is taken instead of stopping."
+    ),
+    format_: Format = typer.Option(
+        Format.rich, "--format", help="The output format of '--info' and '--export'."
+    ),
 ) -> None:
     """Query, add and remove entries from the database and perform operations on the database itself."""
-    database: Optional[Database] = _get_database(
-        database_location
+    database: Optional[Database] = commands.get_database(
+        database_location, project=project_location
     ) if not delete else Database(database_location)
-    if not _eval_db_opts(info, add, remove, delete) or not database:
+    if (
+        not _eval_db_opts(
+            info, add, remove, delete, migrate is not None, import_ is not None, export is not None
+        )
+        or not database
+    ):
         return
-    if info:
+    if info and format_ is not Format.rich:
+        _list_entries(database, format_)
+    elif info:
         try:
             return print(database)
         except exceptions.FormatMapError as error:
@@ -275,6 +891,12 @@ def cli_database(
         _rm_entry(database)
     elif delete:
         _del_db(database)
+    elif migrate:
+        _migrate_db(database, migrate.value)
+    elif import_:
+        _import_entries(database, import_, batch_size, skip_existing)
+    elif export:
+        _export_entries(database, export, format_)
     else:
         levels.info(
             "What do you want to do? pass the [bold]'--help'[/] argument to get help."
@@ -0,0 +1,284 @@
+"""Encoding raw entries to bytes and back.
+
+Three codecs are available:
+    json: the standard library json module. This is the format of the json files and of the journal layout.
+    orjson: the same json, encoded and decoded by orjson. It is used instead of the json codec whenever orjson can be
+        imported, as both read and write the same files.
+    binary: entries packed with struct, smaller than json and without any quoting or escaping. It's the format of the
+        binary layout, which is meant for databases only changed through where-is.
+
+Every codec decodes what it encoded, and raises a ValueError for data it can't decode.
+"""
+import abc
+import json
+import struct
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from whereis.index import RawEntry
+
+JSON: str = "json"
+ORJSON: str = "orjson"
+BINARY: str = "binary"
+
+# flags, location count and length of the strings of a packed entry
+_ENTRY: struct.Struct = struct.Struct("<BHI")
+_REMOVED: int = 1
+_LOCATIONS: int = 2
+_HAS_EXTRA: int = 4
+# the entry can't be packed (one of its strings has a null character), it's kept as json
+_JSON_ONLY: int = 8
+_SEPARATOR: str = "\0"
+
+
+class Codec(abc.ABC):
+    name: str = ""
+
+    @abc.abstractmethod
+    def encode(self, value: Any) -> bytes:
+        """Encodes a value.
+
+        Args:
+            value: The value, a raw entry (or for the json codecs, anything json can encode).
+
+        Returns:
+            The encoded value.
+
+        Raises:
+            ValueError: If the value can't be encoded.
+        """
+
+    @abc.abstractmethod
+    def decode(self, data: bytes) -> Any:
+        """Decodes a value.
+
+        Args:
+            data: The encoded value.
+
+        Returns:
+            The value.
+
+        Raises:
+            ValueError: If the data can't be decoded.
+        """
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} object: name={self.name}>"
+
+
+class JsonCodec(Codec):
+    name = JSON
+
+    def encode(self, value: Any) -> bytes:
+        try:
+            return json.dumps(value, separators=(",", ":")).encode()
+        except TypeError as error:
+            raise ValueError(str(error)) from None
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    name = ORJSON
+
+    def __init__(self) -> None:
+        """Initializes an OrjsonCodec object.
+
+        Raises:
+            ImportError: If orjson isn't installed.
+        """
+        import orjson
+
+        self._orjson = orjson
+
+    def encode(self, value: Any) -> bytes:
+        """Encodes a value as json.
+
+        Notes:
+            orjson refuses lone surrogates (like the undecodable bytes of file names), those values are encoded by the
+            json codec instead.
+
+        Args:
+            value: The value.
+
+        Returns:
+            The json.
+
+        Raises:
+            ValueError: If the value can't be encoded.
+        """
+        try:
+            return self._orjson.dumps(value)
+        except TypeError:
+            return super().encode(value)
+
+    def decode(self, data: bytes) -> Any:
+        try:
+            return self._orjson.loads(data)
+        except ValueError:
+            return super().decode(data)
+
+
+class BinaryCodec(Codec):
+    """Packs raw entries with struct.
+
+    A packed entry is its flags, its location count and the length of its strings, then the part count of each location
+    and its strings: the name and every part, separated by null characters and decoded at once. Anything else the raw
+    entry has (or locations which aren't lists of strings) is kept as json at the end.
+    """
+
+    name = BINARY
+
+    def encode(self, value: Any) -> bytes:
+        if not isinstance(value, dict) or not isinstance(value.get("name"), str):
+            raise ValueError(f"Not an entry: {value}")
+        extra: Dict[str, Any] = {
+            key: item for key, item in value.items() if key not in ("name", "locations", "removed")
+        }
+        flags: int = _REMOVED if value.get("removed") is True else 0
+        if value.get("removed") not in (None, True):
+            extra["removed"] = value["removed"]
+        locations: List[List[str]] = []
+        if "locations" in value:
+            if isinstance(value["locations"], list) and all(
+                isinstance(location, list) and all(isinstance(part, str) for part in location)
+                for location in value["locations"]
+            ):
+                flags |= _LOCATIONS
+                locations = value["locations"]
+            else:
+                extra["locations"] = value["locations"]
+        strings: List[str] = [value["name"]]
+        for location in locations:
+            strings.extend(location)
+        if any(_SEPARATOR in string for string in strings):
+            encoded: bytes = json.dumps(value, separators=(",", ":")).encode()
+            return _ENTRY.pack(_JSON_ONLY, 0, len(encoded)) + encoded
+        packed: bytes = _SEPARATOR.join(strings).encode("utf-8", "surrogatepass")
+        try:
+            header: bytes = _ENTRY.pack(flags | (_HAS_EXTRA if extra else 0), len(locations), len(packed))
+            counts: bytes = bytes(len(location) for location in locations)
+        except (struct.error, ValueError):
+            raise ValueError(f"Entry too big to be packed: {value['name']}") from None
+        if not extra:
+            return header + counts + packed
+        return header + counts + packed + json.dumps(extra, separators=(",", ":")).encode()
+
+    def decode(self, data: bytes) -> "RawEntry":
+        try:
+            return self._unpack(data)
+        except (struct.error, TypeError) as error:
+            raise ValueError(f"Malformed packed entry: {error}") from None
+
+    @staticmethod
+    def _unpack(data: bytes) -> "RawEntry":
+        """Unpacks an entry.
+
+        Args:
+            data: The packed entry.
+
+        Returns:
+            The raw entry.
+
+        Raises:
+            struct.error: If the data is too short.
+            ValueError: If the strings aren't utf-8, if they don't match the part counts or if the json isn't valid.
+            TypeError: If the json at the end isn't an object.
+        """
+        flags, count, length = _ENTRY.unpack_from(data)
+        start: int = _ENTRY.size + count
+        end: int = start + length
+        if end > len(data) or (end != len(data) and not flags & (_HAS_EXTRA | _JSON_ONLY)):
+            raise ValueError("The data isn't a single entry")
+        if flags & _JSON_ONLY:
+            raw_entry: Dict[str, Any] = json.loads(data[start:end])
+            if not isinstance(raw_entry, dict):
+                raise TypeError("not an object")
+            return raw_entry  # type: ignore
+        strings: List[str] = data[start:end].decode("utf-8", "surrogatepass").split(_SEPARATOR)
+        raw_entry = {"name": strings[0]}
+        if flags & _LOCATIONS:
+            locations: List[List[str]] = []
+            position: int = 1
+            for parts in data[_ENTRY.size : start]:
+                locations.append(strings[position : position + parts])
+                position += parts
+            if position != len(strings):
+                raise ValueError("The strings don't match the locations")
+            raw_entry["locations"] = locations
+        elif len(strings) != 1:
+            raise ValueError("The strings don't match the locations")
+        if flags & _REMOVED:
+            raw_entry["removed"] = True
+        if flags & _HAS_EXTRA:
+            raw_entry.update(json.loads(data[end:]))
+        return raw_entry  # type: ignore
+
+
+class _FastestJsonCodec(Codec):
+    """The orjson codec if orjson can be imported, else the json codec, only picked when it's first used.
+
+    Importing orjson takes longer than parsing a few small json files, so commands that don't encode or decode
+    anything with this codec don't pay for it. Once picked, its methods replace the methods of this object.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a _FastestJsonCodec object, without picking the codec."""
+        self._codec: Optional[Codec] = None
+
+    @property
+    def name(self) -> str:  # type: ignore
+        return self._pick().name
+
+    def _pick(self) -> Codec:
+        """Picks the fastest json codec available, once.
+
+        Returns:
+            The codec.
+        """
+        if self._codec is None:
+            try:
+                self._codec = OrjsonCodec()
+            except ImportError:
+                self._codec = JsonCodec()
+            self.encode = self._codec.encode  # type: ignore
+            self.decode = self._codec.decode  # type: ignore
+        return self._codec
+
+    def encode(self, value: Any) -> bytes:
+        return self._pick().encode(value)
+
+    def decode(self, data: bytes) -> Any:
+        return self._pick().decode(data)
+
+
+CODECS: Tuple[str, ...] = (JSON, ORJSON, BINARY)
+_json_codec: Codec = _FastestJsonCodec()
+
+
+def json_codec() -> Codec:
+    """Gets the fastest json codec available.
+
+    Notes:
+        orjson is only imported on the first encode or decode.
+
+    Returns:
+        The orjson codec if orjson can be imported, else the json codec.
+    """
+    return _json_codec
+
+
+def available() -> List[Codec]:
+    """Gets every codec that can be used here.
+
+    Returns:
+        The codecs, without the orjson codec if orjson isn't installed.
+    """
+    codecs: List[Codec] = [JsonCodec()]
+    try:
+        codecs.append(OrjsonCodec())
+    except ImportError:
+        pass
+    codecs.append(BinaryCodec())
+    return codecs
@@ -0,0 +1,443 @@
+"""The commands of where-is that don't depend on typer.
+
+The cli frontend is built on typer, which is slow to import compared to the time a lookup takes. Simple invocations
+of the hot commands are parsed here and run without loading typer (or rich, for machine-readable output).
+"""
+from pathlib import Path
+from whereis import levels, profiling, utils, Database, Entry, exceptions, status_table
+from whereis.index import CACHE_FOLDER, SOCKET_NAME, Index
+from whereis.output import (
+    Format,
+    Record,
+    RecordWriter,
+    STATUS_COLUMNS,
+    search_record,
+    status_from_record,
+    status_record,
+)
+from typing import TYPE_CHECKING, Any, Iterator, List, NamedTuple, Optional, Tuple
+import contextlib
+import sys
+
+if TYPE_CHECKING:
+    from whereis.daemon import Client
+    from whereis.search import SearchResult
+
+is_verbose: bool = False
+
+
+@profiling.timed(profiling.RENDERING)
+def print(*objects: Any) -> None:
+    """Prints objects with rich.
+
+    Notes:
+        rich is only imported when something is printed with it, so that machine-readable output doesn't pay for it.
+
+    Args:
+        *objects: The objects to print.
+
+    Returns:
+        Nothing.
+    """
+    from rich import print as rich_print
+
+    rich_print(*objects)
+
+
+@contextlib.contextmanager
+def profiled(table: bool, report: Optional[Path] = None, stats: Optional[Path] = None) -> Iterator[None]:
+    """Profiles a command, from the import of where-is until it exits.
+
+    Args:
+        table: Print the summary table of the phases to stderr?
+        report: Where to write the json report, if anywhere ("-" is stderr).
+        stats: Where to dump the cProfile stats, if anywhere.
+
+    Returns:
+        A context manager, the command should run inside it.
+    """
+    profiler: profiling.Profiler = profiling.Profiler(stats=stats)
+    profiler.start(since_import=True)
+    try:
+        yield
+    finally:
+        profiler.stop()
+        if table:
+            from rich.console import Console
+
+            Console(file=sys.stderr).print(profiler.table())
+        if report is not None:
+            import json
+
+            dumped: str = json.dumps(profiler.report(), indent=2) + "\n"
+            if str(report) == "-":
+                sys.stderr.write(dumped)
+            else:
+                report.write_text(dumped)
+
+
+def log(message: str) -> None:
+    """Prints a debug message if verbose output is enabled.
+
+    Args:
+        message: The message.
+
+    Returns:
+        Nothing.
+    """
+    return levels.debug(message) if is_verbose else None
+
+
+def get_entry(
+    entry_name: str, database: Database, no_err: bool = False, direct: bool = False
+) -> Optional[Entry]:
+    """Gets an entry safely.
+
+    This function prevents exceptions from being printed out from core and instead replaces them with not so verbose,
+    user friendly messages.
+
+    Args:
+        entry_name: The entry name.
+        database: The database.
+        no_err: Should no errors be displayed?
+        direct: Read the file named after the entry first?
+
+    Returns:
+        An entry if no error was encountered, else nothing.
+    """
+    try:
+        entry_: Optional[Entry] = database.get(entry_name, direct=direct)
+        if entry_:
+            log(f"Got entry, {entry_}")
+            return entry_
+    except exceptions.FormatMapError as error:
+        levels.error(f"Entry formatting error: [italic]{error.message}")
+        return None
+    except exceptions.EntryParseError as error:
+        levels.error(f"Database error: [italic]{error.message}")
+        return None
+    if not no_err:
+        levels.error(f"Couldn't find entry '{entry_name}' in the database.")
+    else:
+        log(
+            f"Couldn't find any entry, but the no_err argument is True, so not printing any errors."
+        )
+    return None
+
+
+def get_database(
+    location: Path, validate: bool = True, project: Optional[Path] = None
+) -> Optional[Database]:
+    """Gets a database object safely.
+
+    This function prevents exceptions from being printed out from core and instead replaces them with not so verbose,
+    user friendly messages. If the database doesn't exist, this function creates it automatically.
+
+    Args:
+        location: The location where the database is.
+        validate: Should every entry be parsed to validate the database?
+        project: The folder of a project database to layer below it, if any.
+
+    Returns:
+        A database object if no error was encountered, else nothing.
+    """
+    database: Database = Database(location, project)
+    if not database.exists():
+        try:
+            levels.info("Database doesn't exist, creating...")
+            database.create()
+        except PermissionError as error:
+            levels.error(
+                f"Can't create database at location '{location}': [italic]{error}"
+            )
+            return None
+    try:
+        _: Optional[Index] = database.index if validate else None
+    except exceptions.EntryParseError as error:
+        levels.error(f"Database error: [italic]{error.message}")
+        return None
+    log(f"Got database, {database}")
+
+    return database
+
+
+def connect_daemon(location: Path) -> Optional["Client"]:
+    """Connects to the daemon serving a database, if it's running.
+
+    Notes:
+        The daemon module is only imported if the socket of the daemon exists.
+
+    Args:
+        location: The location where the database is.
+
+    Returns:
+        A client connected to the daemon, or nothing if it isn't running.
+    """
+    if not (location / CACHE_FOLDER / SOCKET_NAME).exists():
+        return None
+    from whereis.daemon import Client
+
+    client: Optional[Client] = Client.connect(location)
+    if client:
+        log(f"Got daemon, {client}")
+    return client
+
+
+def open_writer(format_: Format, columns: List[str]) -> Optional[RecordWriter]:
+    """Opens a record writer for a machine-readable output format.
+
+    Args:
+        format_: The output format.
+        columns: The tsv columns.
+
+    Returns:
+        A record writer, or nothing if the output should be rendered by rich.
+    """
+    return None if format_ is Format.rich else RecordWriter(format_, columns)
+
+
+def print_entry(entry: Entry, writer: Optional[RecordWriter], title: bool) -> None:
+    """Prints the locations of an entry safely.
+
+    Args:
+        entry: The entry.
+        writer: The record writer, or nothing to render the entry with rich.
+        title: Print the entry name before rendering it with rich?
+
+    Returns:
+        Nothing.
+    """
+    try:
+        if writer:
+            return writer.write(status_record(entry.name, entry.locations_status()))
+        if title:
+            print(f"[bold]{entry.name}")
+        print(entry)
+    except exceptions.FormatMapError as error:
+        levels.error(f"Entry formatting error: [italic]{error.message}")
+
+
+def print_served_entry(
+    client: "Client", name: str, writer: Optional[RecordWriter], title: bool
+) -> bool:
+    """Prints the locations of an entry found by the daemon.
+
+    Args:
+        client: The client connected to the daemon.
+        name: The entry name.
+        writer: The record writer, or nothing to render the entry with rich.
+        title: Print the entry name before rendering it with rich?
+
+    Returns:
+        True if the entry was found, else False.
+
+    Raises:
+        DaemonError: If the daemon stops answering.
+    """
+    found: bool = True
+    for response in client.request("find", name=name):
+        if "missing" in response:
+            levels.error(f"Couldn't find entry '{name}' in the database.")
+            found = False
+        elif "error" in response:
+            levels.error(f"Error: [italic]{response['error']}")
+            found = False
+        elif writer:
+            writer.write(response["status"])
+        else:
+            if title:
+                print(f"[bold]{name}")
+            print(status_table(status_from_record(response["status"])))
+    return found
+
+
+def result_record(result: "SearchResult") -> Record:
+    """Makes the record of a search result.
+
+    Args:
+        result: The search result.
+
+    Returns:
+        The record, without locations if they can't be formatted.
+    """
+    try:
+        locations: List[Path] = result.entry.locations
+    except exceptions.FormatMapError:
+        locations = []
+    return search_record(result.entry.name, result.score, result.match, locations)
+
+
+def read_names(names: List[str], stdin: bool) -> Iterator[str]:
+    """Iterates over entry names given as arguments and, optionally, through stdin.
+
+    Args:
+        names: The entry names given as arguments.
+        stdin: Read more entry names from stdin, one per line?
+
+    Returns:
+        The entry names, read from stdin lazily.
+    """
+    yield from names
+    if stdin:
+        for line in sys.stdin:
+            name: str = line.strip()
+            if name:
+                yield name
+
+
+def find(
+    location: Path,
+    names: List[str],
+    stdin: bool,
+    direct: bool,
+    format_: Format,
+    daemon: bool = True,
+    project: Optional[Path] = None,
+) -> bool:
+    """Finds the entries with the given names and prints their locations.
+
+    Args:
+        location: The location where the database is.
+        names: The entry names.
+        stdin: Read more entry names from stdin, one per line?
+        direct: Read the file named after each entry first?
+        format_: The output format.
+        daemon: Ask the daemon serving the database, if it's running? Never with a project layer.
+        project: The folder of a project database to layer below it, if any.
+
+    Returns:
+        True if every entry was found, else False.
+    """
+    if not names and not stdin:
+        levels.error("Pass the name of an entry, or the [bold]'--stdin'[/] option.")
+        return False
+    client: Optional["Client"] = connect_daemon(location) if daemon and project is None else None
+    database: Optional[Database] = None if client else get_database(
+        location, validate=not direct, project=project
+    )
+    if not client and not database:
+        return False
+    batch: bool = stdin or len(names) > 1
+    writer: Optional[RecordWriter] = open_writer(format_, STATUS_COLUMNS)
+    found: bool = True
+    try:
+        for name in read_names(names, stdin):
+            if client:
+                found = print_served_entry(client, name, writer, batch) and found
+                continue
+            entry_: Optional[Entry] = get_entry(name, database, direct=direct)  # type: ignore
+            if entry_:
+                print_entry(entry_, writer, batch)
+            else:
+                found = False
+    except exceptions.DaemonError as error:
+        levels.error(f"Daemon error: [italic]{error.message}")
+        found = False
+    finally:
+        if writer:
+            writer.close()
+        if client:
+            client.close()
+    return found
+
+
+class _FindArguments(NamedTuple):
+    location: Path
+    names: List[str]
+    stdin: bool
+    direct: bool
+    format_: Format
+    daemon: bool
+
+
+class _ProfileArguments(NamedTuple):
+    table: bool
+    report: Optional[Path]
+    stats: Optional[Path]
+
+
+def _parse_find(arguments: List[str]) -> Optional[Tuple[_FindArguments, _ProfileArguments]]:
+    """Parses the arguments of a simple `where-is [ROOT OPTIONS] find [OPTIONS] NAMES...` invocation.
+
+    Args:
+        arguments: The command line arguments, without the program name.
+
+    Returns:
+        The parsed find and profile arguments, or nothing if the invocation isn't simple enough to be parsed here.
+    """
+    global is_verbose
+
+    location: Path = utils.config_folder()
+    names: List[str] = []
+    stdin, direct, verbose, daemon, format_ = False, True, False, True, Format.rich
+    profile, profile_report, profile_stats = False, None, None
+    arguments = list(arguments)
+    while arguments and arguments[0] != "find":
+        option, _, value = arguments.pop(0).partition("=")
+        if option in ("--verbose", "--no-verbose"):
+            verbose = option == "--verbose"
+        elif option == "--database-location" and (value or arguments):
+            location = Path(value or arguments.pop(0))
+        elif option == "--profile" and not value:
+            profile = True
+        elif option == "--profile-report" and (value or arguments):
+            profile_report = Path(value or arguments.pop(0))
+        elif option == "--profile-stats" and (value or arguments):
+            profile_stats = Path(value or arguments.pop(0))
+        else:
+            return None
+    if not arguments:
+        return None
+    arguments.pop(0)
+    while arguments:
+        argument: str = arguments.pop(0)
+        option, _, value = argument.partition("=")
+        if argument == "--":
+            names.extend(arguments)
+            break
+        elif not argument.startswith("-"):
+            names.append(argument)
+        elif argument == "--stdin":
+            stdin = True
+        elif argument in ("--direct", "--no-direct"):
+            direct = argument == "--direct"
+        elif argument in ("--daemon", "--no-daemon"):
+            daemon = argument == "--daemon"
+        elif option == "--format" and (value or arguments):
+            try:
+                format_ = Format(value or arguments.pop(0))
+            except ValueError:
+                return None
+        else:
+            return None
+    is_verbose = is_verbose or verbose
+    return (
+        _FindArguments(location, names, stdin, direct, format_, daemon),
+        _ProfileArguments(profile, profile_report, profile_stats),
+    )
+
+
+def run_fast(arguments: List[str]) -> bool:
+    """Runs simple invocations of the hot commands without loading typer.
+
+    Args:
+        arguments: The command line arguments, without the program name.
+
+    Returns:
+        True if the invocation was run, else False (it should be handed to the typer frontend).
+
+    Raises:
+        SystemExit: With the exit code 1, if an entry wasn't found.
+    """
+    parsed: Optional[Tuple[_FindArguments, _ProfileArguments]] = _parse_find(arguments)
+    if parsed is None:
+        return False
+    find_arguments, profile_arguments = parsed
+    if not any(profile_arguments):
+        found: bool = find(*find_arguments)
+    else:
+        with profiled(*profile_arguments):
+            found = find(*find_arguments)
+    if not found:
+        sys.exit(1)
+    return True
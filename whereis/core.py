@@ -1,24 +1,156 @@
 """The core of where-is. This is where the CLI frontend gets its objects from."""
 import json
-from typing import List, Dict, Union
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Dict, Optional, Set, Tuple, Union
 from pathlib import Path
 import os
-from whereis import exceptions, utils
-import shutil
-from rich.table import Table
-from rich.tabulate import tabulate_mapping
+import re
+import sys
+from whereis import exceptions, profiling, scan, utils
+from whereis.index import Index, RawEntry, Snapshot, CACHE_FOLDER, INDEX_NAME, SEARCH_NAME
+from whereis.layers import CATALOG_INDEX, LAYERED_NAME, Layer, LayeredStorage, project_index, upgrade
+from whereis.storage import FOLDER, layout, open_storage
+from whereis.status import LocationStatus
+
+if TYPE_CHECKING:
+    from rich.table import Table
+    from whereis.backup import Backup
+    from whereis.codec import Codec
+    from whereis.discover import Discovery, Root
+    from whereis.fingerprint import Fingerprints
+    from whereis.owner import Owner, PathTrie
+    from whereis.search import SearchIndex, SearchResult
+    from whereis.watch import Watcher
+
+# A compiled location template: every part of the path is either kept as is, or split into a tuple alternating
+# literal text and placeholder names.
+Template = Tuple[Union[str, Tuple[str, ...]], ...]
+_PLACEHOLDER = re.compile(r"\{(ENV:[^{}]+|[A-Z][A-Z0-9_]*)\}")
+# The entries packaged with where-is, the bottom layer of every database.
+CATALOG_FOLDER: Path = Path(__file__).parent / "database"
+
+
+def _compile_template(parts: Tuple[str, ...]) -> Template:
+    """Compiles the parts of a location into a template.
+
+    Args:
+        parts: The parts of the location.
+
+    Returns:
+        The compiled template.
+    """
+    template: List[Union[str, Tuple[str, ...]]] = []
+    for part in parts:
+        pieces: List[str] = _PLACEHOLDER.split(part)
+        template.append(part if len(pieces) == 1 else tuple(pieces))
+    return tuple(template)
+
+
+@profiling.timed(profiling.PATH_FORMATTING)
+def _expand_template(template: Template) -> Path:
+    """Expands a compiled template with the format map.
+
+    Args:
+        template: The compiled template.
+
+    Returns:
+        The formatted path.
+
+    Raises:
+        FormatMapError: If a placeholder isn't in the format map.
+    """
+    format_map: Dict[str, Path] = utils.format_map()
+    parts: List[Union[str, Path]] = []
+    try:
+        for part in template:
+            if isinstance(part, str):
+                parts.append(part)
+            elif len(part) == 3 and not part[0] and not part[2]:
+                parts.append(format_map[part[1]])
+            else:
+                parts.append(
+                    "".join(
+                        str(format_map[piece]) if index % 2 else piece
+                        for index, piece in enumerate(part)
+                    )
+                )
+    except KeyError:
+        source: Path = Path(
+            *(
+                part
+                if isinstance(part, str)
+                else "".join(
+                    f"{{{piece}}}" if index % 2 else piece
+                    for index, piece in enumerate(part)
+                )
+                for part in template
+            )
+        )
+        raise exceptions.FormatMapError(
+            f"Format map not supported for path '{source}'."
+        ) from None
+    return Path(*parts)
+
+
+def status_table(status: Dict[Path, LocationStatus]) -> "Table":
+    """Generates a table of the status of locations.
+
+    Args:
+        status: The status of each location.
+
+    Returns:
+        A table object, usable by rich print instances.
+    """
+    from rich.table import Table
+
+    columns: List[str] = ["Locations", "Exists", "Is File", "Is Folder"]
+    table: Table = Table(title="[bold purple]Config files found")
+    for column in columns:
+        table.add_column(column)
+    for location, location_status in status.items():
+        exists: bool = location_status.exists
+        formatted_location: str = f"[magenta]{location}"
+        formatted_exists: str = f"[red]{exists}" if not exists else f"[green4]{exists}"
+
+        if exists and location_status.is_file:
+            is_file: str = "[green4]True"
+        elif exists and not location_status.is_file:
+            is_file = "[red]False"
+        else:
+            is_file = "[red italic]Unknown"
+
+        if exists and location_status.is_dir:
+            is_dir: str = "[green]True"
+        elif exists and not location_status.is_dir:
+            is_dir = "[red]False"
+        else:
+            is_dir = "[red italic]Unknown"
+
+        table.add_row(formatted_location, formatted_exists, is_file, is_dir)
+
+    return table
 
 
 class Entry:
+    __slots__ = ("_name", "_locations", "_hash", "_resolved", "_format_map")
+
     def __init__(self, name: str, *locations: List[str]) -> None:
         """Initializes an Entry object.
 
+        Notes:
+            The name and location parts are interned, so that parts shared by many entries (like '{HOME}' or
+            '.config') are only stored once.
+
         Args:
             name: The name of an entry.
             *locations: The locations the entry stores.
         """
-        self._name = name
-        self._locations = locations
+        self._name: str = sys.intern(name)
+        self._locations: Tuple[Tuple[str, ...], ...] = tuple(
+            tuple(sys.intern(part) for part in location) for location in locations
+        )
+        self._hash: int = hash((self._name, self._locations))
+        self._resolved: Optional[Tuple[Path, ...]] = None
+        self._format_map: Optional[Dict[str, Path]] = None
 
     @property
     def name(self) -> str:
@@ -39,14 +171,27 @@ class Entry:
                 {HOME}: Your home folder.
                 {WHEREIS_CONFIG}: The where-is configuration folder.
                 {CONFIG_FOLDER}: The configuration folder.
+                {XDG_CONFIG_HOME}: $XDG_CONFIG_HOME, or the .config folder in your home folder.
+                {ENV:NAME}: The value of the environment variable NAME.
+            The locations are resolved once and cached until the format map is resolved again.
 
         Returns:
             All of the locations an entry has.
+
+        Raises:
+            FormatMapError: If a location has a placeholder that isn't in the format map.
         """
-        return [
-            Path(self._format_path(Path(os.path.join(os.path.sep, *location))))
-            for location in self._locations
-        ]
+        format_map: Dict[str, Path] = utils.format_map()
+        if self._resolved is None or self._format_map is not format_map:
+            # the templates aren't kept, they're only needed again if the format map is resolved again
+            self._resolved = tuple(
+                _expand_template(
+                    _compile_template(Path(os.path.join(os.path.sep, *location)).parts)
+                )
+                for location in self._locations
+            )
+            self._format_map = format_map
+        return list(self._resolved)
 
     @property
     def to_dict(self) -> Dict[str, Union[str, List[List[str]]]]:
@@ -57,7 +202,7 @@ class Entry:
         """
         return {
             "name": self.name,
-            "locations": list(self._locations),
+            "locations": [list(location) for location in self._locations],
         }
 
     @property
@@ -69,6 +214,26 @@ class Entry:
         """
         return json.dumps(self.to_dict)
 
+    @classmethod
+    def from_dict(cls, raw_entry: RawEntry) -> "Entry":
+        """Converts a dictionary to an entry object, the reverse of to_dict.
+
+        Args:
+            raw_entry: The entry as a dictionary.
+
+        Returns:
+            An entry object.
+
+        Raises:
+            EntryParseError: If the dictionary doesn't follow the json schema.
+        """
+        try:
+            return cls(raw_entry["name"], *raw_entry["locations"])  # type: ignore
+        except (KeyError, TypeError):
+            raise exceptions.EntryParseError(
+                f"JSON schema incorrect: {raw_entry}"
+            ) from None
+
     @staticmethod
     def _format_path(path: Path) -> Path:
         """Formats a path.
@@ -78,25 +243,23 @@ class Entry:
 
         Returns:
             The formatted path.
+
+        Raises:
+            FormatMapError: If the path has a placeholder that isn't in the format map.
         """
-        format_map: Dict[str, Path] = {
-            "HOME": Path().home(),
-            "WHEREIS_CONFIG": utils.config_folder(),
-            "CONFIG_FOLDER": utils.config_folder().parent,
-        }
-        try:
-            path_parts: List[str] = list(path.parts)
-            for index, part in enumerate(path_parts):
-                for name, value in format_map.items():
-                    if name in part:
-                        del path_parts[index]
-                        path_parts[index:index] = list(value.parts)
-
-            return Path(*path_parts)
-        except (KeyError, IndexError, ValueError):
-            raise exceptions.FormatMapError(
-                f"Format map not supported for path '{path}'."
-            ) from None
+        return _expand_template(_compile_template(path.parts))
+
+    def locations_status(self) -> Dict[Path, LocationStatus]:
+        """Probes the status of each location.
+
+        Notes:
+            Each location is stat'd once (twice if it's a symlink), every consumer of the status should share it
+            instead of querying the filesystem again.
+
+        Returns:
+            A dictionary of locations and their status.
+        """
+        return {location: LocationStatus.probe(location) for location in self.locations}
 
     def locations_exists(self) -> Dict[Path, bool]:
         """Does each location exist?
@@ -104,58 +267,59 @@ class Entry:
         Returns:
             A dictionary of locations and whether that location exists.
         """
-        return {location: location.exists() for location in self.locations}
+        return {
+            location: status.exists
+            for location, status in self.locations_status().items()
+        }
 
     def __eq__(self, other) -> bool:
         try:
-            return self.name == other.name and self.locations == other.locations
+            return self._name == other._name and self._locations == other._locations
         except AttributeError:
             return False
 
-    def __rich__(self) -> Table:
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __rich__(self) -> "Table":
         """A shortcut to generate a table to generate configuration files found.
 
         Returns:
             A table object, usable by rich print instances.
         """
-        columns: List[str] = ["Locations", "Exists", "Is File", "Is Folder"]
-        table: Table = Table(title="[bold purple]Config files found")
-        for column in columns:
-            table.add_column(column)
-        for location, exists in self.locations_exists().items():
-            formatted_location: str = f"[magenta]{location}"
-            formatted_exists: str = f"[red]{exists}" if not exists else f"[green4]{exists}"
-
-            if exists and location.is_file():
-                is_file: str = "[green4]True"
-            elif exists and not location.is_file():
-                is_file = "[red]False"
-            else:
-                is_file = "[red italic]Unknown"
-
-            if exists and location.is_dir():
-                is_dir: str = "[green]True"
-            elif exists and not location.is_dir():
-                is_dir = "[red]False"
-            else:
-                is_dir = "[red italic]Unknown"
-
-            table.add_row(formatted_location, formatted_exists, is_file, is_dir)
-
-        return table
+        return status_table(self.locations_status())
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__} object: name='{self.name}' locations={self.locations}>"
 
 
 class Database:
-    def __init__(self, location: Path = utils.config_folder()) -> None:
+    def __init__(
+        self, location: Path = utils.config_folder(), project: Optional[Path] = None, catalog: bool = True
+    ) -> None:
         """Initializes a Database object.
 
+        Notes:
+            The database reads the entries packaged with where-is in place, then the entries of the project folder,
+            then its own entries, each overriding the entries with the same name below it. Only the database folder
+            is written to.
+
         Args:
             location: The location where the database is. Defaults to the config folder.
+            project: The folder of a project database layered below this one, if any.
+            catalog: Layer the entries packaged with where-is below the others?
         """
         self._location = location
+        self._project = project
+        self._catalog = catalog
+        self._storage: Optional[LayeredStorage] = None
+        self._index: Optional[Index] = None
+        self._entries: Dict[str, Entry] = {}
+        self._snapshot: Optional[Snapshot] = None
+        self._search_index: Optional["SearchIndex"] = None
+        self._search_snapshot: Optional[Snapshot] = None
+        self._owners: Optional["PathTrie"] = None
+        self._owners_key: Optional[Tuple[Dict[str, Entry], Dict[str, Path]]] = None
 
     @property
     def location(self) -> Path:
@@ -170,29 +334,121 @@ class Database:
         return self._location
 
     @property
-    def _database(self) -> List[Dict[str, Union[str, List[List[str]]]]]:
-        """All of the database entries in raw, waiting to be processed.
+    def project(self) -> Optional[Path]:
+        """The folder of the project database layered below this one.
 
         Returns:
-            A list of dictionaries if the file owning that dictionary's suffix is '.json'.
+            The project folder, or nothing if there isn't a project layer.
+        """
+        return self._project
+
+    @staticmethod
+    @profiling.timed(profiling.JSON_PARSE)
+    def _read_entry(path: Path, decoder: Optional["Codec"] = None) -> RawEntry:
+        """Reads a database entry in raw, waiting to be processed.
+
+        Args:
+            path: The json file of the entry.
+            decoder: The json codec decoding it. Defaults to the fastest one available.
+
+        Returns:
+            The dictionary stored in the file.
 
         Raises:
             EntryParseError: If the entry JSON can't be decoded.
         """
-        ret: List[Dict[str, Union[str, List[List[str]]]]] = []
-        for entry in self.location.iterdir():
-            if entry.suffix == ".json":
-                try:
-                    ret.append(json.loads(entry.read_text()))
-                except json.decoder.JSONDecodeError as error:
-                    raise exceptions.EntryParseError(
-                        f"Error parsing '{entry.absolute()}': {error}"
-                    ) from None
+        from whereis.codec import json_codec
 
-        return ret
+        try:
+            return (decoder or json_codec()).decode(path.read_bytes())
+        except ValueError as error:
+            raise exceptions.EntryParseError(
+                f"Error parsing '{path.absolute()}': {error}"
+            ) from None
+
+    @property
+    def storage(self) -> LayeredStorage:
+        """The storage of the database, in the layout detected from its folder, over the read-only layers.
+
+        Notes:
+            A database created before the catalog was layered is upgraded when its storage is opened over the
+            catalog, hiding the packaged entries which were removed from it.
+
+        Returns:
+            The storage object.
+        """
+        if self._storage is None:
+            self._storage = self._open_storage(layout(self.location))
+            if self._catalog:
+                upgrade(self._storage.user, self._storage.layers[0].storage)
+        return self._storage
+
+    def _open_storage(self, name: str) -> LayeredStorage:
+        """Opens the storage of the database in a layout, over the read-only layers.
+
+        Args:
+            name: The name of the layout.
+
+        Returns:
+            The storage object, reading json files with Database._read_entry.
+
+        Raises:
+            StorageError: If the layout is unknown.
+        """
+
+        def reader(path: Path, decoder: "Codec") -> RawEntry:
+            return self._read_entry(path, decoder)
+
+        layers: List[Layer] = []
+        if self._catalog:
+            layers.append(
+                Layer(
+                    open_storage(FOLDER, CATALOG_FOLDER, reader),
+                    self.location / CACHE_FOLDER / CATALOG_INDEX,
+                )
+            )
+        if self._project is not None:
+            layers.append(
+                Layer(
+                    open_storage(layout(self._project), self._project, reader),
+                    project_index(self.location, self._project),
+                )
+            )
+        return LayeredStorage(open_storage(name, self.location, reader), layers)
+
+    @property
+    def index(self) -> Index:
+        """The compiled index of the database.
+
+        Notes:
+            The index is compiled again if the database changed since it was last compiled. The layout of the
+            database is detected again at the same time, in case another process migrated it.
+
+        Returns:
+            An up to date index of the database entries.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed while compiling the index.
+        """
+        if self._index is None or self._index.is_stale():
+            self._invalidate()
+            if self._storage is not None and self._storage.name != layout(self.location):
+                self._storage = None
+            self._index = Index.load(self.storage)
+        return self._index
+
+    def _invalidate(self) -> None:
+        """Closes the index so that it gets loaded again on next access.
+
+        Returns:
+            Nothing.
+        """
+        if self._index is not None:
+            self._index.close()
+            self._index = None
 
     @staticmethod
-    def _entry_from_json(raw_entry: Dict[str, Union[str, List[List[str]]]]) -> Entry:
+    def _entry_from_json(raw_entry: RawEntry) -> Entry:
         """Converts a json dict to an Entry object.
 
         Args:
@@ -204,25 +460,212 @@ class Database:
         Raises:
             EntryParseError: If the raw entry doesn't follow the json schema.
         """
-        try:
-            return Entry(raw_entry["name"], *raw_entry["locations"])  # type: ignore
-        except KeyError:
-            raise exceptions.EntryParseError(
-                f"JSON schema incorrect: {raw_entry}"
-            ) from None
+        return Entry.from_dict(raw_entry)
+
+    def _cached_entries(self) -> Tuple[Dict[str, Entry], Snapshot]:
+        """Gets the cached entries, parsing them again if the database folder changed.
+
+        Returns:
+            The cached entries keyed by their name and the snapshot of the database folder they are up to date with.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+        """
+        snapshot: Optional[Snapshot] = (
+            self.storage.refresh(self._snapshot) if self._snapshot else None
+        )
+        if snapshot is None:
+            index: Index = self.index
+            self._entries = {}
+            for raw_entry in index:
+                entry: Entry = self._entry_from_json(raw_entry)
+                self._entries.setdefault(entry.name, entry)
+            snapshot = index.snapshot
+        self._snapshot = snapshot
+        return self._entries, snapshot
+
+    def _clear_cache(self) -> None:
+        """Clears the cached entries so that they get parsed again on next access.
+
+        Returns:
+            Nothing.
+        """
+        self._entries = {}
+        self._snapshot = None
+
+    def refresh(self) -> bool:
+        """Parses the entries again if the database folder changed.
+
+        Notes:
+            This is meant for long running processes, which keep the entries warm instead of parsing them on the next
+            access.
+
+        Returns:
+            True if the entries were parsed again, else False.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+        """
+        entries: Dict[str, Entry] = self._entries
+        return self._cached_entries()[0] is not entries
 
     @property
     def entries(self) -> List[Entry]:
         """A list of all entries.
 
+        Notes:
+            The entries are cached, they only get parsed again when the database folder changes.
+
         Returns:
             A list of entry objects from the database location.
         """
-        return [self._entry_from_json(raw_entry) for raw_entry in self._database]
+        entries, _ = self._cached_entries()
+        return list(entries.values())
+
+    def _read_direct(self, name: str) -> Optional[Entry]:
+        """Reads an entry from the json file named after it, without scanning the database.
+
+        Notes:
+            Only databases in the folder layout store entries in files named after them.
+
+        Args:
+            name: The entry name.
+
+        Returns:
+            The entry object if the file exists and its name matches, else nothing.
+
+        Raises:
+            EntryParseError: If the file can't be parsed.
+        """
+        raw_entry: Optional[RawEntry] = self.storage.read_direct(name)
+        return None if raw_entry is None else self._entry_from_json(raw_entry)
+
+    def get(self, name: str, direct: bool = False) -> Optional[Entry]:
+        """Gets an entry by its name.
+
+        Notes:
+            If the entries are cached the lookup doesn't touch the database folder, else only the compiled index is
+            searched. In direct mode only the file named after the entry is read, and the index is only used if the
+            file is missing, can't be parsed or holds another entry (which can happen in hand-edited databases).
+
+        Args:
+            name: The entry name.
+            direct: Read the file named after the entry first?
+
+        Returns:
+            The entry object if it's in the database, else nothing.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+        """
+        if self._snapshot is not None:
+            entries, _ = self._cached_entries()
+            return entries.get(name)
+        if direct:
+            try:
+                entry: Optional[Entry] = self._read_direct(name)
+            except exceptions.EntryParseError:
+                entry = None
+            if entry is not None:
+                return entry
+        raw_entry: Optional[RawEntry] = self.index.get(name)
+        return None if raw_entry is None else self._entry_from_json(raw_entry)
+
+    def _refresh_index(self) -> Optional[Snapshot]:
+        """Checks if the loaded index is still up to date, before this process changes the database.
+
+        Returns:
+            The refreshed snapshot of the index, or nothing if it has to be loaded again.
+        """
+        if self._index is None or self._index.is_stale():
+            return None
+        return self._index.snapshot
+
+    def _update_index(
+        self, snapshot: Optional[Snapshot], written: List[Entry], removed: List[str], overwritten: bool
+    ) -> None:
+        """Updates the compiled index after this process wrote or removed some entries.
+
+        Notes:
+            The index is updated from its loaded copy instead of being compiled from the database again. If it
+            wasn't up to date, or if an entry was overwritten without the database knowing it, it's closed (and
+            removed, if the storage doesn't tell writes apart) so that it gets compiled again on next access.
+            In the folder layout, the compiled search index is removed: overwriting an entry in place doesn't change
+            the mtime of the database folder, so other processes couldn't tell it's stale.
+
+        Args:
+            snapshot: The snapshot of the index, refreshed before the change.
+            written: The written entries.
+            removed: The names of the removed entries.
+            overwritten: Whether an entry was overwritten without the database knowing it.
+
+        Returns:
+            Nothing.
+        """
+        if snapshot is None or overwritten:
+            self._invalidate()
+            if not self.storage.exact:
+                self._remove_compiled()
+            return
+        names: List[str] = [entry.name for entry in written] or removed
+        self._index = self._index.updated(  # type: ignore
+            self.storage.updated(snapshot, names, 1 if written else -1),
+            [entry.to_dict for entry in written],
+            removed,
+        )
+        if not self.storage.exact:
+            self._remove_compiled(SEARCH_NAME)
+
+    def _remove_compiled(self, *names: str) -> None:
+        """Removes the compiled index and search index files.
+
+        Args:
+            names: The names of the files to remove. Defaults to both.
+
+        Returns:
+            Nothing.
+        """
+        for name in names or (INDEX_NAME, SEARCH_NAME):
+            try:
+                (self.location / CACHE_FOLDER / name).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _refresh_search(self) -> Optional[Snapshot]:
+        """Checks if the search index is still up to date, before this process changes the database.
+
+        Returns:
+            The refreshed snapshot of the search index, or nothing if it has to be loaded again.
+        """
+        return self.storage.refresh(self._search_snapshot) if self._search_snapshot else None
+
+    def _update_search(self, snapshot: Optional[Snapshot], entry: Entry, delta: int) -> None:
+        """Updates the search index in place after this process wrote a single entry.
+
+        Args:
+            snapshot: The snapshot of the search index, refreshed before the change.
+            entry: The added or removed entry.
+            delta: 1 if the entry was added, -1 if it was removed and 0 if it was overwritten.
+
+        Returns:
+            Nothing.
+        """
+        if snapshot is None:
+            self._search_snapshot = None
+            return
+        if delta < 0:
+            self._search_index.remove(entry)  # type: ignore
+        else:
+            self._search_index.add(entry)  # type: ignore
+        self._search_snapshot = self.storage.updated(snapshot, [entry.name], delta)
 
     def add(self, entry: Entry) -> None:
         """Adds an entry to the database.
 
+        Notes:
+            The entry is checked and written under the writer lock of the database, so that two processes can't add
+            the same entry. The cached entries are updated in place instead of being parsed again.
+
         Args:
             entry: The entry object.
 
@@ -230,16 +673,31 @@ class Database:
             Nothing.
 
         Raises:
-            EntryExistsError: If the entry object exists in the database entries.
+            EntryExistsError: If an entry with the same name exists in the database entries.
         """
-        if entry in self.entries:
-            raise exceptions.EntryExistsError("The database entry exists.")
-        new_entry: Path = self.location / f"{entry.name}.json"
-        new_entry.write_text(entry.to_json)
+        with self.storage.lock():  # no other process can add the entry between the check and the write
+            entries, snapshot = self._cached_entries()
+            if entry.name in entries:
+                raise exceptions.EntryExistsError("The database entry exists.")
+            index_snapshot: Optional[Snapshot] = self._refresh_index()
+            search_snapshot: Optional[Snapshot] = self._refresh_search()
+            overwritten: bool = self.storage.write(entry.to_dict)
+            self._update_index(index_snapshot, [entry], [], overwritten)
+            self._update_search(search_snapshot, entry, 0 if overwritten else 1)
+            if overwritten:
+                # the overwritten entry can't be told apart in the cache
+                return self._clear_cache()
+            entries[entry.name] = entry
+            if self._owners is not None:
+                self._owners.add(entry)
+            self._snapshot = self.storage.updated(snapshot, [entry.name], 1)
 
     def remove(self, entry: Entry) -> None:
         """Removes an entry from the database.
 
+        Notes:
+            The cached entries are updated in place instead of being parsed again.
+
         Args:
             entry: The entry object.
 
@@ -249,26 +707,416 @@ class Database:
         Raises:
             EntryDoesNotExistError: If the entry object doesn't exist in the database entries.
         """
-        if entry not in self.entries:
-            raise exceptions.EntryNotFoundError("The database entry must exist.")
-        entry_to_delete: Path = self.location / f"{entry.name}.json"
-        entry_to_delete.unlink()
+        with self.storage.lock():
+            entries, snapshot = self._cached_entries()
+            if entries.get(entry.name) != entry:
+                raise exceptions.EntryNotFoundError("The database entry must exist.")
+            index_snapshot: Optional[Snapshot] = self._refresh_index()
+            search_snapshot: Optional[Snapshot] = self._refresh_search()
+            self.storage.delete(entry.name)
+            self._update_index(index_snapshot, [], [entry.name], False)
+            self._update_search(search_snapshot, entry, -1)
+            del entries[entry.name]
+            if self._owners is not None:
+                self._owners.remove(entry)
+            self._snapshot = self.storage.updated(snapshot, [entry.name], -1)
+
+    def bulk_add(
+        self, entries: Iterable[Entry], batch_size: Optional[int] = None, skip_existing: bool = False
+    ) -> int:
+        """Adds many entries to the database, in batches.
+
+        Notes:
+            The names of the database entries are read once from the index, instead of the entries being parsed
+            for every added entry, and each batch is written with a single storage write. A batch is all or
+            nothing in the journal layout; in the folder layout, the files of a batch are only moved in place once
+            they're all written.
+            The entries are consumed lazily, so a conflict stops the import with the batches before it added.
+
+        Args:
+            entries: The entry objects.
+            batch_size: How many entries are written at once. Defaults to transfer.DEFAULT_BATCH.
+            skip_existing: Whether entries whose name is taken are skipped instead of raising an error.
+
+        Returns:
+            The number of entries added.
+
+        Raises:
+            ValueError: If the batch size is lower than 1.
+            EntryExistsError: If an entry has the name of a database entry or of an entry before it.
+        """
+        if batch_size is None:
+            from whereis.transfer import DEFAULT_BATCH
+
+            batch_size = DEFAULT_BATCH
+        if batch_size < 1:
+            raise ValueError("The batch size must be at least 1.")
+        names: Set[str] = set(self._cached_entries()[0] if self._snapshot else self.index.names())
+        batch: List[Entry] = []
+        added: int = 0
+        for entry in entries:
+            if entry.name in names:
+                if skip_existing:
+                    continue
+                raise exceptions.EntryExistsError(f"The database entry '{entry.name}' exists.")
+            names.add(entry.name)
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                added += self._add_batch(batch, skip_existing)
+                batch = []
+        return added + self._add_batch(batch, skip_existing)
+
+    def _add_batch(self, batch: List[Entry], skip_existing: bool) -> int:
+        """Writes a batch of entries to the storage, updating the cached entries in place.
+
+        Notes:
+            The names are checked again under the writer lock of the database, in case another process added one
+            of them since.
+
+        Args:
+            batch: The entry objects, whose names weren't in the database.
+            skip_existing: Whether entries whose name was taken since are skipped instead of raising an error.
+
+        Returns:
+            The number of entries written.
+
+        Raises:
+            EntryExistsError: If another process added an entry with the name of one of them.
+        """
+        if not batch:
+            return 0
+        with self.storage.lock():
+            return self._write_batch(batch, skip_existing)
+
+    def _write_batch(self, batch: List[Entry], skip_existing: bool) -> int:
+        """Writes a batch of entries to the storage, while holding the writer lock.
+
+        Args:
+            batch: The entry objects.
+            skip_existing: Whether entries whose name is taken are skipped instead of raising an error.
+
+        Returns:
+            The number of entries written.
+
+        Raises:
+            EntryExistsError: If an entry has the name of a database entry.
+        """
+        snapshot: Optional[Snapshot] = (
+            self.storage.refresh(self._snapshot) if self._snapshot else None
+        )
+        taken: Set[str] = (
+            {entry.name for entry in batch if entry.name in self._entries}
+            if snapshot is not None
+            else {entry.name for entry in batch if self.index.get(entry.name) is not None}
+        )
+        if taken and not skip_existing:
+            raise exceptions.EntryExistsError(f"The database entry '{min(taken)}' exists.")
+        batch = [entry for entry in batch if entry.name not in taken]
+        if not batch:
+            return 0
+        index_snapshot: Optional[Snapshot] = self._refresh_index()
+        overwritten: bool = self.storage.write_batch([entry.to_dict for entry in batch])
+        self._update_index(index_snapshot, batch, [], overwritten)
+        # a batch is usually too big for the search index to be worth updating in memory
+        self._search_snapshot = None
+        if snapshot is None or overwritten:
+            self._clear_cache()
+            return len(batch)
+        for entry in batch:
+            self._entries[entry.name] = entry
+            if self._owners is not None:
+                self._owners.add(entry)
+        self._snapshot = self.storage.updated(snapshot, [entry.name for entry in batch], 1)
+        return len(batch)
+
+    def scan(
+        self, entries: Optional[Iterable[Entry]] = None, workers: int = utils.DEFAULT_WORKERS
+    ) -> Iterator[scan.ScanResult]:
+        """Probes the locations of the database entries concurrently.
+
+        Args:
+            entries: The entries to probe. Defaults to every entry of the database.
+            workers: The number of threads probing locations.
+
+        Returns:
+            The results, in the order they complete.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+        """
+        return scan.scan(self.entries if entries is None else entries, workers)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List["SearchResult"]:
+        """Searches for the entries whose name or location components match a query, even loosely.
+
+        Notes:
+            The search index is compiled in the cache folder, so that searching doesn't parse every entry. Entries
+            added or removed through this object are indexed in memory on top of it, the search index is only
+            compiled again when the database folder is changed by something else.
+
+        Args:
+            query: The query.
+            limit: The maximum number of results. Defaults to search.DEFAULT_LIMIT.
+
+        Returns:
+            The best results, sorted by descending score then by name.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+        """
+        from whereis.search import DEFAULT_LIMIT, SearchIndex, SearchResult
+
+        snapshot: Optional[Snapshot] = self._refresh_search()
+        if snapshot is None:
+            index: Index = self.index
+            self._search_index = SearchIndex.load(self.location, index)
+            snapshot = index.snapshot
+        self._search_snapshot = snapshot
+        results: List[SearchResult] = []
+        for match in self._search_index.search(query, DEFAULT_LIMIT if limit is None else limit):  # type: ignore
+            entry: Optional[Entry] = self.get(match.name)
+            if entry is not None:
+                results.append(SearchResult(entry, match.score, match.term))
+        return results
+
+    def owner_of(self, path: Path) -> List["Owner"]:
+        """Finds the entries owning a path, either because it's one of their locations or because it's inside one.
+
+        Notes:
+            The formatted locations of every entry are put in a trie the first time, after that a lookup only walks
+            the components of the path. The trie is updated in place by add() and remove(), and built again when the
+            entries are parsed again or the format map is resolved again.
+            Symlinks aren't resolved, the path is compared to the locations as they are written.
+
+        Args:
+            path: The path, made absolute against the current directory if it's relative.
+
+        Returns:
+            The owners, from the deepest location to the shallowest.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+        """
+        from whereis.owner import Owner, PathTrie
+
+        entries, _ = self._cached_entries()
+        format_map: Dict[str, Path] = utils.format_map()
+        if (
+            self._owners is None
+            or self._owners_key is None
+            or self._owners_key[0] is not entries
+            or self._owners_key[1] is not format_map
+        ):
+            self._owners = PathTrie.build(entries.values())
+            self._owners_key = (entries, format_map)
+        return [
+            Owner(entries[match.name], match.location, match.exact)
+            for match in self._owners.owners(path)
+        ]
+
+    def discover(
+        self,
+        roots: Optional[Iterable["Root"]] = None,
+        max_depth: Optional[int] = None,
+        workers: int = utils.DEFAULT_WORKERS,
+        cache: bool = True,
+    ) -> "Discovery":
+        """Walks the filesystem for config files that aren't in an entry yet, and proposes entries for them.
+
+        Notes:
+            The proposed entries aren't added to the database. Config files that are a location of an entry, or that
+            are inside one, aren't proposed again, but a proposed entry can have the name of an existing entry.
+            The folder listings are remembered in the cache folder, so that the next discoveries only list the
+            folders that changed since.
+
+        Args:
+            roots: The folders to walk. Defaults to discover.ROOTS.
+            max_depth: The maximum number of components of a config file path under its root. Defaults to
+                discover.DEFAULT_DEPTH.
+            workers: The number of threads listing folders.
+            cache: Remember the folder listings for the next discoveries, and reuse the last ones?
+
+        Returns:
+            The proposed entries, and how many folders were listed or reused.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+            ValueError: If there isn't at least one worker.
+        """
+        from whereis.discover import DEFAULT_DEPTH, DISCOVER_NAME, ROOTS, discover
+
+        self.owner_of(Path(os.sep))  # builds the path trie
+        trie: PathTrie = self._owners  # type: ignore
+        return discover(
+            ROOTS if roots is None else roots,
+            DEFAULT_DEPTH if max_depth is None else max_depth,
+            workers,
+            self.location / CACHE_FOLDER / DISCOVER_NAME if cache else None,
+            lambda path: bool(trie.owners(path)),
+            [self.location],
+        )
+
+    def fingerprint(
+        self,
+        entries: Optional[Iterable[Entry]] = None,
+        workers: int = utils.DEFAULT_WORKERS,
+        cache: bool = True,
+    ) -> "Fingerprints":
+        """Fingerprints the content of the config files of the database entries.
+
+        Notes:
+            The digest of every file is remembered in the cache folder, so that the next runs only read the files
+            whose inode, size or mtime changed since.
+
+        Args:
+            entries: The entries to fingerprint. Defaults to every entry of the database.
+            workers: The number of threads walking locations and hashing files.
+            cache: Remember the file digests for the next runs, and reuse the last ones?
+
+        Returns:
+            The fingerprint of each entry, and how many files were hashed or reused.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+            ValueError: If there isn't at least one worker.
+        """
+        from whereis.fingerprint import FINGERPRINT_NAME, fingerprint
+
+        return fingerprint(
+            self.entries if entries is None else entries,
+            workers,
+            self.location / CACHE_FOLDER / FINGERPRINT_NAME if cache else None,
+        )
+
+    def backup(
+        self, destination: Path, entries: Optional[Iterable[Entry]] = None, workers: int = utils.DEFAULT_WORKERS
+    ) -> "Backup":
+        """Backs the config files of the database entries up to a mirrored folder or a tar archive.
+
+        Notes:
+            Files are stored under their absolute path in the destination. Running the backup again only copies the
+            files that changed since, or that an interrupted backup didn't get to.
+
+        Args:
+            destination: The folder, or the archive if it ends with '.tar', '.tar.gz', '.tgz', '.tar.bz2' or '.tar.xz'.
+            entries: The entries to back up. Defaults to every entry of the database.
+            workers: The number of threads walking locations, and copying files or reading them ahead of the archive.
 
-    def create(self) -> None:
+        Returns:
+            How many files were backed up or skipped, how many bytes were read, and why some files or entries failed.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+            OSError: If the destination can't be written.
+            ValueError: If there isn't at least one worker.
+        """
+        from whereis.backup import backup
+
+        return backup(self.entries if entries is None else entries, destination, workers)
+
+    def watch(
+        self,
+        entries: Optional[Iterable[Entry]] = None,
+        poll: bool = False,
+        interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+    ) -> "Watcher":
+        """Watches the locations of the database entries for changes.
+
+        Notes:
+            The entries and their locations are read once, entries added or removed afterwards aren't watched.
+
+        Args:
+            entries: The entries to watch. Defaults to every entry of the database.
+            poll: Poll the locations even if inotify is available?
+            interval: The shortest time between two polls, in seconds. Defaults to watch.DEFAULT_INTERVAL.
+            max_interval: The longest time between two polls, in seconds. Defaults to watch.DEFAULT_MAX_INTERVAL.
+
+        Returns:
+            The watcher, which should be closed once done with.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+            FormatMapError: If a location has a placeholder that isn't in the format map.
+            ValueError: If the intervals aren't positive, or the shortest one is longer than the longest one.
+        """
+        from whereis.watch import DEFAULT_INTERVAL, DEFAULT_MAX_INTERVAL, Watcher
+
+        return Watcher(
+            self.entries if entries is None else entries,
+            poll,
+            DEFAULT_INTERVAL if interval is None else interval,
+            DEFAULT_MAX_INTERVAL if max_interval is None else max_interval,
+        )
+
+    def create(self, storage: str = FOLDER) -> None:
         """Creates the database if it doesn't exist.
 
+        Notes:
+            The database starts empty, the packaged entries are read in place instead of being copied.
+
+        Args:
+            storage: The layout of the database, either 'folder' or 'journal'.
+
         Returns:
             Nothing.
 
         Raises:
             DatabaseExistsError: If the database exists.
+            StorageError: If the layout is unknown.
         """
         if self.exists():
             raise exceptions.DatabaseExistsError("The database already exists!")
-        sample_db: Path = Path(__file__).parent / "database"
+        new_storage: LayeredStorage = self._open_storage(storage)
         Path(self.location).mkdir()
-        for path in sample_db.iterdir():
-            shutil.copyfile(str(path), str(self.location / path.name))
+        (self.location / LAYERED_NAME).touch()
+        new_storage.initialize([])
+        self._storage = new_storage
+
+    def migrate(self, storage: str) -> None:
+        """Moves the entries of the database to another layout.
+
+        Notes:
+            The entries are written in the new layout before the files of the old one are removed, and the layout
+            detected from the folder only switches once they're all written. Only the entries of the database folder
+            are moved, the read-only layers stay where they are.
+
+        Args:
+            storage: The new layout, either 'folder' or 'journal'.
+
+        Returns:
+            Nothing.
+
+        Raises:
+            StorageError: If the layout is unknown, or if the database already uses it.
+            EntryParseError: If an entry can't be parsed.
+        """
+        old_storage: LayeredStorage = self.storage
+        if old_storage.name == storage:
+            raise exceptions.StorageError(f"The database already uses the {storage} storage.")
+        new_storage: LayeredStorage = self._open_storage(storage)
+        new_storage.user.initialize(old_storage.user.read())
+        old_storage.user.clear()
+        self._invalidate()
+        self._remove_compiled()
+        self._storage = new_storage
+        self._clear_cache()
+        self._search_snapshot = None
+
+    def compact(self) -> bool:
+        """Compacts the storage of the database, if its layout needs it.
+
+        Notes:
+            Databases in the journal layout are compacted in the background when the journal grows too big, this
+            compacts them right away.
+
+        Returns:
+            True if the storage was compacted, else False.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+        """
+        return self.storage.compact()
 
     def delete(self) -> None:
         """Deletes the database if it exists.
@@ -285,6 +1133,14 @@ class Database:
         """
         if not self.location.exists():
             raise exceptions.DatabaseNotFoundError("The database doesn't exist!")
+        import shutil
+
+        self.storage.close()
+        self._invalidate()
+        self._clear_cache()
+        self._search_snapshot = None
+        self._owners = None
+        self._storage = None
         return shutil.rmtree(self.location)
 
     def exists(self) -> bool:
@@ -295,14 +1151,18 @@ class Database:
         """
         return self.location.exists()
 
-    def __rich__(self) -> Table:
+    def __rich__(self) -> "Table":
         """A shortcut to generate database info.
 
         Returns:
             A table, usable by rich print instances.
         """
-        map_: Dict[str, Union[Path, List[Entry], bool]] = {
+        from rich.tabulate import tabulate_mapping
+
+        map_: Dict[str, Union[Path, List[Entry], bool, str]] = {
             "Location": self.location,
+            "Storage": self.storage.name,
+            "Project": self.project or "None",
             "Entries": self.entries,
             "Exists": self.exists(),
         }
@@ -310,6 +1170,38 @@ class Database:
 
         return table
 
+    def __contains__(self, item: Union[Entry, str]) -> bool:
+        """Checks if an entry or an entry name is in the database.
+
+        Args:
+            item: The entry object or the entry name.
+
+        Returns:
+            True if the entry is in the database, else False.
+        """
+        if isinstance(item, Entry):
+            return self.get(item.name) == item
+        return self.get(item) is not None
+
+    def __iter__(self) -> Iterator[Entry]:
+        """Iterates over the entries without caching them.
+
+        Notes:
+            If the entries are already cached they are iterated over, else they're streamed from the compiled
+            index so that only one entry is in memory at a time.
+
+        Returns:
+            An iterator over the entry objects.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+        """
+        if self._snapshot is not None:
+            yield from self.entries
+            return
+        for raw_entry in self.index:
+            yield self._entry_from_json(raw_entry)
+
     def __add__(self, other: Entry):
         """A python native shortcut of database.add().
 
@@ -0,0 +1,373 @@
+"""A daemon keeping a database warm, serving lookups over a unix domain socket.
+
+The socket is stored in the `.cache` folder of the database. Requests and responses are json objects, one per line.
+Every request is answered by any number of responses, followed by `{"end": true}`:
+
+    {"command": "ping"}                     -> {"version": VERSION, "entries": COUNT}
+    {"command": "find", "name": NAME}       -> {"status": STATUS RECORD} | {"missing": NAME} | {"error": MESSAGE}
+    {"command": "scan", "workers": WORKERS} -> {"status": STATUS RECORD} for every entry
+    {"command": "search", "query": QUERY, "limit": LIMIT} -> {"result": SEARCH RECORD} for every result
+    {"command": "owner", "path": ABSOLUTE PATH}           -> {"owner": OWNER RECORD} for every owner
+
+A connection can send many requests, one after the other.
+"""
+import json
+import os
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+from whereis import exceptions, levels, owner, scan, search, utils
+from whereis.__version__ import __version__ as version
+from whereis.commands import result_record
+from whereis.core import Database, Entry
+from whereis.index import CACHE_FOLDER, SOCKET_NAME
+from whereis.output import Record, owner_record, status_record
+
+# How often the daemon checks whether the database folder changed, in seconds.
+DEFAULT_INTERVAL: float = 1.0
+# How long the client waits for the daemon to answer, in seconds.
+DEFAULT_TIMEOUT: float = 10.0
+
+_END: bytes = b'{"end": true}\n'
+
+
+def socket_path(location: Path) -> Path:
+    """Gets the path of the socket of the daemon serving a database.
+
+    Args:
+        location: The database location.
+
+    Returns:
+        The socket path.
+    """
+    return location / CACHE_FOLDER / SOCKET_NAME
+
+
+class Client:
+    def __init__(self, location: Path, timeout: float = DEFAULT_TIMEOUT) -> None:
+        """Initializes a Client object, connecting to the daemon serving a database.
+
+        Args:
+            location: The database location.
+            timeout: How long to wait for the daemon to answer, in seconds.
+
+        Raises:
+            OSError: If the daemon isn't running.
+        """
+        self._location = location
+        self._socket: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.settimeout(timeout)
+            self._socket.connect(str(socket_path(location)))
+        except OSError:
+            self._socket.close()
+            raise
+        self._file: BinaryIO = self._socket.makefile("rwb")
+
+    @classmethod
+    def connect(cls, location: Path) -> Optional["Client"]:
+        """Connects to the daemon serving a database, if it's running.
+
+        Args:
+            location: The database location.
+
+        Returns:
+            A client, or nothing if the daemon isn't running.
+        """
+        if not hasattr(socket, "AF_UNIX") or not socket_path(location).exists():
+            return None
+        try:
+            return cls(location)
+        except OSError:
+            return None
+
+    def request(self, command: str, **arguments: Any) -> Iterator[Record]:
+        """Sends a request to the daemon.
+
+        Notes:
+            The responses have to be read entirely before sending another request.
+
+        Args:
+            command: The command.
+            **arguments: The arguments of the command.
+
+        Returns:
+            The responses of the daemon.
+
+        Raises:
+            DaemonError: If the daemon stops answering.
+        """
+        try:
+            self._file.write(json.dumps({"command": command, **arguments}).encode() + b"\n")
+            self._file.flush()
+            for line in self._file:
+                if line == _END:
+                    return
+                yield json.loads(line)
+        except OSError as error:
+            raise exceptions.DaemonError(f"The daemon stopped answering: {error}") from None
+        raise exceptions.DaemonError("The daemon closed the connection.")
+
+    def close(self) -> None:
+        """Closes the connection to the daemon.
+
+        Returns:
+            Nothing.
+        """
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} object: location={self._location}>"
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "Server"
+
+    def handle(self) -> None:
+        """Answers the requests of a connection.
+
+        Returns:
+            Nothing.
+        """
+        try:
+            self._handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client went away
+
+    def _handle(self) -> None:
+        """Answers the requests of a connection, one line at a time.
+
+        Returns:
+            Nothing.
+        """
+        for line in self.rfile:
+            try:
+                request: Dict[str, Any] = json.loads(line)
+                responses: Iterator[Record] = self.server.respond(request)
+                for response in responses:
+                    self.wfile.write(json.dumps(response).encode() + b"\n")
+            except (ValueError, TypeError, KeyError, AttributeError):
+                self.wfile.write(json.dumps({"error": "Invalid request."}).encode() + b"\n")
+            except exceptions.EntryParseError as error:
+                self.wfile.write(json.dumps({"error": error.message}).encode() + b"\n")
+            self.wfile.write(_END)
+            self.wfile.flush()
+
+
+def _answers(location: Path) -> bool:
+    """Checks if a daemon answers on the socket of a database.
+
+    Args:
+        location: The database location.
+
+    Returns:
+        True if a daemon answered a ping, else False (the socket may be left behind by a daemon that crashed).
+    """
+    client: Optional[Client] = Client.connect(location)
+    if client is None:
+        return False
+    try:
+        with client:
+            return any("version" in response for response in client.request("ping"))
+    except (exceptions.DaemonError, ValueError):
+        return False
+
+
+# not available on windows, where the server refuses to start
+_UnixServer: type = getattr(socketserver, "ThreadingUnixStreamServer", socketserver.ThreadingTCPServer)
+
+
+class Server(_UnixServer):  # type: ignore
+    daemon_threads = True
+
+    def __init__(self, database: Database, interval: float = DEFAULT_INTERVAL) -> None:
+        """Initializes a Server object, binding the socket of a database.
+
+        Notes:
+            The socket is created with a umask only letting the user in, so it's never reachable by others, even
+            before its mode is set.
+
+        Args:
+            database: The database to serve.
+            interval: How often to check whether the database folder changed, in seconds.
+
+        Raises:
+            DaemonError: If unix domain sockets aren't supported, or if a daemon already serves the database.
+            EntryParseError: If an entry can't be parsed.
+            OSError: If the socket can't be bound.
+        """
+        if not hasattr(socket, "AF_UNIX"):
+            raise exceptions.DaemonError("Unix domain sockets aren't supported on this platform.")
+        self._check_serving(database.location)
+        self._database = database
+        self._inode: Optional[int] = None
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self.warm()
+
+        path: Path = socket_path(database.location)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._check_serving(database.location)  # again, warming up can take a while
+        if path.is_socket():
+            path.unlink()  # left behind by a daemon that didn't exit cleanly
+        super().__init__(str(path), _Handler, bind_and_activate=False)
+        try:
+            umask: int = os.umask(0o077)
+            try:
+                self.server_bind()
+            finally:
+                os.umask(umask)
+            self._inode = path.stat().st_ino
+            os.chmod(path, 0o600)
+            self.server_activate()
+        except OSError:
+            self.server_close()
+            raise
+
+    @staticmethod
+    def _check_serving(location: Path) -> None:
+        """Refuses to serve a database which a daemon already serves.
+
+        Args:
+            location: The database location.
+
+        Returns:
+            Nothing.
+
+        Raises:
+            DaemonError: If a daemon answers on the socket of the database.
+        """
+        if _answers(location):
+            raise exceptions.DaemonError(f"A daemon already serves the database at '{location}'.")
+
+    @property
+    def database(self) -> Database:
+        """The database being served.
+
+        Returns:
+            The database object.
+        """
+        return self._database
+
+    def warm(self) -> None:
+        """Parses the entries, formats their locations and builds the search index and path trie, so requests don't.
+
+        Returns:
+            Nothing.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+        """
+        with self._lock:
+            entries: List[Entry] = self._database.entries
+            self._database.search("")  # loads the search index without searching
+            self._database.owner_of(Path(os.sep))  # builds the path trie
+        for entry in entries:
+            try:
+                _ = entry.locations
+            except exceptions.FormatMapError:
+                pass  # reported when the entry is requested
+
+    def _watch(self) -> None:
+        """Warms the database up again whenever its folder changes, until the server is shut down.
+
+        Returns:
+            Nothing.
+        """
+        while not self._stopped.wait(self._interval):
+            try:
+                with self._lock:
+                    changed: bool = self._database.refresh()
+                if changed:
+                    self.warm()
+            except exceptions.EntryParseError as error:
+                levels.error(f"Database error: [italic]{error.message}")
+
+    def respond(self, request: Dict[str, Any]) -> Iterator[Record]:
+        """Answers a request.
+
+        Args:
+            request: The request.
+
+        Returns:
+            The responses.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+            KeyError: If an argument of the request is missing.
+        """
+        command: str = request["command"]
+        if command == "ping":
+            with self._lock:
+                count: int = len(self._database.entries)
+            yield {"version": version, "entries": count}
+        elif command == "find":
+            with self._lock:
+                entry: Optional[Entry] = self._database.get(request["name"])
+            if entry is None:
+                yield {"missing": request["name"]}
+                return
+            try:
+                yield {"status": status_record(entry.name, entry.locations_status())}
+            except (exceptions.FormatMapError, OSError) as error:
+                yield {"error": str(error)}
+        elif command == "scan":
+            with self._lock:
+                entries: List[Entry] = self._database.entries
+            for result in scan.scan(entries, max(1, int(request.get("workers", utils.DEFAULT_WORKERS)))):
+                yield {"status": status_record(result.entry.name, result.status, result.error)}
+        elif command == "search":
+            with self._lock:
+                results: List[search.SearchResult] = self._database.search(
+                    request["query"], int(request.get("limit", search.DEFAULT_LIMIT))
+                )
+            for result in results:
+                yield {"result": result_record(result)}
+        elif command == "owner":
+            with self._lock:
+                owners: List[owner.Owner] = self._database.owner_of(Path(request["path"]))
+            for found in owners:
+                yield {"owner": owner_record(found.entry.name, found.location, found.exact)}
+        else:
+            yield {"error": f"Unknown command '{command}'."}
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        """Serves requests and watches the database folder until the server is shut down.
+
+        Args:
+            poll_interval: How often to check whether the server is shut down, in seconds.
+
+        Returns:
+            Nothing.
+        """
+        self._watcher.start()
+        super().serve_forever(poll_interval)
+
+    def server_close(self) -> None:
+        """Stops watching the database folder and removes the socket, if it's still the one this server bound.
+
+        Returns:
+            Nothing.
+        """
+        self._stopped.set()
+        super().server_close()
+        path: Path = socket_path(self._database.location)
+        try:
+            if self._inode is not None and path.stat().st_ino == self._inode:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} object: location={self._database.location}>"
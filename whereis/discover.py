@@ -0,0 +1,416 @@
+"""Discovery of the config files of tools, to propose new entries.
+
+Some roots (the home folder, the config folder and `/etc`) are walked with `os.scandir` by a pool of threads. Each
+folder is listed by a single thread, its subfolders are then queued for the others. Folders that can't hold config
+files (caches, version control, package stores...) are pruned, and the walk stops at a maximum depth.
+
+The candidate config files are grouped by tool, the tool being the first component of their path under the root
+(`~/.zshrc` and `~/.zsh_profile` both belong to `zsh`, `~/.config/nvim/init.lua` belongs to `nvim`). Tools with too
+many config files in their folder get the folder as a location instead.
+
+The listing of every folder is remembered along with its mtime in the `.cache` folder of the database, so that the
+next runs only list the folders that changed since.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+from whereis import utils
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from whereis.core import Entry
+
+DEFAULT_DEPTH: int = 3
+# Config files are small, bigger files are data.
+MAX_SIZE: int = 1024 * 1024
+# Tools with more config files than this in their folder get the folder as a location instead.
+MAX_LOCATIONS: int = 8
+DISCOVER_NAME: str = "discover"
+
+_VERSION: int = 1
+
+# Folders that never hold config files worth an entry.
+PRUNED: FrozenSet[str] = frozenset(
+    {
+        ".cache",
+        ".local",
+        ".git",
+        ".hg",
+        ".svn",
+        ".npm",
+        ".cargo",
+        ".rustup",
+        ".pyenv",
+        ".nvm",
+        ".gradle",
+        ".m2",
+        ".venv",
+        ".Trash",
+        "venv",
+        "node_modules",
+        "site-packages",
+        "__pycache__",
+        "cache",
+        "Cache",
+        "Caches",
+        "CachedData",
+        "Code Cache",
+        "GPUCache",
+        "IndexedDB",
+        "Local Storage",
+        "Service Worker",
+        "logs",
+        "log",
+    }
+)
+# Suffixes of files that aren't config files.
+IGNORED_SUFFIXES: FrozenSet[str] = frozenset(
+    {
+        ".bak",
+        ".db",
+        ".gif",
+        ".gz",
+        ".html",
+        ".jpg",
+        ".lock",
+        ".log",
+        ".md",
+        ".old",
+        ".pid",
+        ".png",
+        ".pyc",
+        ".so",
+        ".sock",
+        ".sqlite",
+        ".svg",
+        ".swp",
+        ".tmp",
+        ".txt",
+        ".zip",
+    }
+)
+# Suffixes stripped from a file name to get the name of its tool.
+CONFIG_SUFFIXES: FrozenSet[str] = frozenset(
+    {".cfg", ".conf", ".config", ".ini", ".json", ".lua", ".rc", ".toml", ".vim", ".yaml", ".yml"}
+)
+_TOOL_ENDINGS: Tuple[str, ...] = ("_profile", "-profile", "_aliases", "config", "rc")
+
+
+class Root(NamedTuple):
+    """A folder walked to discover config files.
+
+    The template is formatted like the locations of an entry, and becomes the beginning of the proposed locations.
+    If hidden_only is set, only the hidden files and folders right under the root are walked. Containers are folders
+    right under the root holding one tool per child, like `/etc/default`.
+    """
+
+    template: Tuple[str, ...]
+    hidden_only: bool = False
+    containers: FrozenSet[str] = frozenset()
+
+
+ROOTS: Tuple[Root, ...] = (
+    Root(("{HOME}",), hidden_only=True),
+    Root(("{XDG_CONFIG_HOME}",)),
+    Root(("{CONFIG_FOLDER}",)),
+    Root(("etc",), containers=frozenset({"default", "conf.d", "sysconfig"})),
+)
+
+
+class Discovery(NamedTuple):
+    """The entries proposed by a discovery, and how many folders were listed or reused from the last one."""
+
+    entries: List["Entry"]
+    listed: int
+    reused: int
+
+
+# The mtime of a folder, when it was listed, and the size of its files and the names of its subfolders.
+_Listing = Tuple[int, int, Dict[str, int], List[str]]
+
+
+def tool_name(component: str) -> str:
+    """Guesses the name of a tool from the file or folder holding its config.
+
+    Args:
+        component: The name of the file or folder, like '.zshrc', 'nvim' or 'sshd_config'.
+
+    Returns:
+        The tool name, in lowercase.
+    """
+    name: str = component.lstrip(".")
+    stem, suffix = os.path.splitext(name)
+    if stem and (suffix.lower() in CONFIG_SUFFIXES or suffix.lower().endswith("rc")):
+        name = stem
+    for ending in _TOOL_ENDINGS:
+        if name.lower().endswith(ending) and len(name) > len(ending) + 1:
+            name = name[: -len(ending)]
+            break
+    return (name.rstrip("._-") or component).lower()
+
+
+def _is_candidate(name: str, size: int) -> bool:
+    """Checks if a file can be a config file.
+
+    Args:
+        name: The file name.
+        size: The file size.
+
+    Returns:
+        True if the file is small enough and isn't a lock, a log, a backup, a document, a history file...
+    """
+    lowered: str = name.lower()
+    return (
+        size <= MAX_SIZE
+        and os.path.splitext(lowered)[1] not in IGNORED_SUFFIXES
+        and not lowered.endswith(("~", "-", "history", "hst", "hsts"))
+    )
+
+
+def _root_path(template: Tuple[str, ...]) -> Optional[Path]:
+    """Formats the template of a root.
+
+    Args:
+        template: The template.
+
+    Returns:
+        The path of the root, or nothing if a placeholder isn't in the format map.
+    """
+    format_map: Dict[str, Path] = utils.format_map()
+    parts: List[str] = []
+    for part in template:
+        if part.startswith("{") and part.endswith("}"):
+            try:
+                parts.append(str(format_map[part[1:-1]]))
+            except KeyError:
+                return None
+        else:
+            parts.append(part)
+    return Path(os.path.join(os.path.sep, *parts))
+
+
+def _list(path: str, cached: Optional[_Listing]) -> Tuple[Optional[_Listing], bool]:
+    """Lists a folder, unless it didn't change since it was last listed.
+
+    Args:
+        path: The folder.
+        cached: The last listing of the folder, if any.
+
+    Returns:
+        The listing, or nothing if the folder can't be listed, and whether it was reused.
+    """
+    try:
+        mtime_ns: int = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, False
+    if cached is not None and cached[0] == mtime_ns and cached[1] - mtime_ns >= utils.RACY_NS:
+        return cached, True
+    taken_ns: int = time.time_ns()
+    files: Dict[str, int] = {}
+    folders: List[str] = []
+    try:
+        with os.scandir(path) as iterator:
+            for item in iterator:
+                try:
+                    if item.is_dir(follow_symlinks=False):
+                        folders.append(item.name)
+                    elif item.is_file():
+                        files[item.name] = item.stat().st_size
+                except OSError:
+                    pass  # removed or unreadable since it was listed
+    except OSError:
+        return None, False
+    return (mtime_ns, taken_ns, files, sorted(folders)), False
+
+
+def _read_cache(path: Optional[Path]) -> Dict[str, _Listing]:
+    """Reads the folder listings remembered by the last discovery.
+
+    Args:
+        path: The cache file, if any.
+
+    Returns:
+        The listings keyed by folder, empty if the cache is missing or invalid.
+    """
+    if path is None:
+        return {}
+    try:
+        cache = json.loads(path.read_text())
+        if cache["version"] != _VERSION:
+            return {}
+        return {folder: tuple(listing) for folder, listing in cache["folders"].items()}  # type: ignore
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return {}
+
+
+def _write_cache(path: Optional[Path], listings: Dict[str, _Listing]) -> None:
+    """Remembers the folder listings for the next discovery.
+
+    Notes:
+        The cache is written to a temporary file first, then renamed. Errors are ignored, the next discovery
+        lists every folder again.
+
+    Args:
+        path: The cache file, if any.
+        listings: The listings keyed by folder.
+
+    Returns:
+        Nothing.
+    """
+    if path is None:
+        return
+    try:
+        path.parent.mkdir(exist_ok=True)
+        utils.write_atomically(
+            path, json.dumps({"version": _VERSION, "folders": listings}, separators=(",", ":")).encode()
+        )
+    except OSError:
+        pass
+
+
+def _propose(candidates: Dict[str, Dict[Tuple[str, ...], List[Tuple[str, ...]]]]) -> List["Entry"]:
+    """Turns the candidate config files of each tool into entries.
+
+    Args:
+        candidates: The candidate locations of each tool, grouped by the folder of the tool they're in (or an empty
+            folder for the files right under a root).
+
+    Returns:
+        The entries, sorted by name.
+    """
+    from whereis.core import Entry
+
+    entries: List[Entry] = []
+    for name in sorted(candidates):
+        locations: List[Tuple[str, ...]] = []
+        for folder, files in candidates[name].items():
+            if folder and len(files) > MAX_LOCATIONS:
+                locations.append(folder)
+            else:
+                locations.extend(files)
+        entries.append(Entry(name, *sorted(list(location) for location in locations)))  # type: ignore
+    return entries
+
+
+def discover(
+    roots: Iterable[Root] = ROOTS,
+    max_depth: int = DEFAULT_DEPTH,
+    workers: int = utils.DEFAULT_WORKERS,
+    cache: Optional[Path] = None,
+    known: Optional[Callable[[Path], bool]] = None,
+    excluded: Iterable[Path] = (),
+) -> Discovery:
+    """Walks the roots concurrently and proposes entries for the config files found.
+
+    Notes:
+        Roots that can't be formatted, don't exist or are the same folder as another root are skipped. A root found
+        while walking another root is left to its own rules.
+        The size of a file is remembered with the listing of its folder, files grown past the maximum size since are
+        only noticed when their folder changes.
+
+    Args:
+        roots: The roots.
+        max_depth: The maximum number of components of a config file path under its root.
+        workers: The number of threads listing folders.
+        cache: The file remembering the listing of every folder, if any.
+        known: Tells if a config file is already in an entry, so that it isn't proposed again.
+        excluded: Folders not to walk, like the database folder.
+
+    Returns:
+        The proposed entries, and how many folders were listed or reused.
+
+    Raises:
+        ValueError: If there isn't at least one worker.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    utils.check_workers(workers)
+    walked: List[Tuple[Root, str]] = []
+    for root in roots:
+        path: Optional[Path] = _root_path(root.template)
+        if path is None or not path.is_dir():
+            continue
+        if any(str(path) == other for _, other in walked):
+            continue
+        walked.append((root, str(path)))
+    skipped: Set[str] = {str(path) for path in excluded} | {path for _, path in walked}
+
+    previous: Dict[str, _Listing] = _read_cache(cache)
+    listings: Dict[str, _Listing] = {}
+    candidates: Dict[str, Dict[Tuple[str, ...], List[Tuple[str, ...]]]] = {}
+    listed, reused = 0, 0
+
+    def visit(root: Root, path: str, relative: Tuple[str, ...], listing: _Listing) -> List[Tuple[str, ...]]:
+        """Collects the candidates of a listed folder.
+
+        Args:
+            root: The root the folder is in.
+            path: The folder.
+            relative: The components of the folder under the root.
+            listing: The listing of the folder.
+
+        Returns:
+            The subfolders to walk, relative to the root.
+        """
+        top: bool = not relative
+        tool_depth: int = 2 if relative[:1] and relative[0] in root.containers else 1
+        for name, size in listing[2].items():
+            if (top and root.hidden_only and not name.startswith(".")) or not _is_candidate(name, size):
+                continue
+            if known is not None and known(Path(path, name)):
+                continue
+            location: Tuple[str, ...] = relative + (name,)
+            tool: str = tool_name(location[tool_depth - 1])
+            folder: Tuple[str, ...] = location[:tool_depth] if len(location) > tool_depth else ()
+            candidates.setdefault(tool, {}).setdefault(
+                (root.template + folder) if folder else (), []
+            ).append(root.template + location)
+        if len(relative) + 1 >= max_depth:
+            return []
+        return [
+            relative + (name,)
+            for name in listing[3]
+            if name not in PRUNED
+            and not (top and root.hidden_only and not name.startswith("."))
+            and os.path.join(path, name) not in skipped
+        ]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: Dict["Future", Tuple[Root, str, Tuple[str, ...]]] = {}
+        for root, path in walked:
+            pending[executor.submit(_list, path, previous.get(path))] = (root, path, ())
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                root, path, relative = pending.pop(future)
+                listing, was_reused = future.result()
+                if listing is None:
+                    continue
+                listings[path] = listing
+                if was_reused:
+                    reused += 1
+                else:
+                    listed += 1
+                for child in visit(root, path, relative, listing):
+                    child_path: str = os.path.join(path, child[-1])
+                    pending[executor.submit(_list, child_path, previous.get(child_path))] = (
+                        root,
+                        child_path,
+                        child,
+                    )
+
+    _write_cache(cache, listings)
+    return Discovery(_propose(candidates), listed, reused)
@@ -45,3 +45,11 @@ class DatabaseExistsError(WhereIsException):
 
 class DatabaseNotFoundError(WhereIsException):
     """Raised when a database isn't found."""
+
+
+class DaemonError(WhereIsException):
+    """Raised when the daemon can't be started or doesn't answer a request."""
+
+
+class StorageError(WhereIsException):
+    """Raised when the storage of a database is unknown or can't be changed."""
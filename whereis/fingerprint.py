@@ -0,0 +1,328 @@
+"""Fingerprinting the content of the config files of entries.
+
+The locations of each entry are walked (a location that is a folder stands for every file inside it), and every file
+found is hashed with sha256 by a pool of threads, reading it in chunks into a buffer reused by each thread. The digest
+of an entry is hashed from the templates of its locations and the relative path and digest of each file, in sorted
+order, so it only changes when a config file is created, deleted, renamed or modified.
+
+The digest of every file is remembered along with its device, inode, size and mtime in the `.cache` folder of the
+database, so that the next runs only read the files that changed since.
+"""
+import hashlib
+import json
+import os
+import stat
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from whereis import exceptions, utils
+
+if TYPE_CHECKING:
+    from whereis.core import Entry
+
+CHUNK_SIZE: int = 1024 * 1024
+FINGERPRINT_NAME: str = "fingerprint"
+
+_VERSION: int = 1
+# The kinds of the records of a location, as they are hashed in the digest of an entry.
+MISSING: bytes = b"-"
+FILE: bytes = b"f"
+LINK: bytes = b"l"
+UNREADABLE: bytes = b"!"
+
+# The device, inode, size and mtime of a file: its content is assumed to be the same as long as they are.
+_Key = Tuple[int, int, int, int]
+
+
+class Record(NamedTuple):
+    """Something a location holds, with the stat result of a file or the target of a symlink to a folder."""
+
+    kind: bytes
+    relative: str
+    stat: Optional[os.stat_result]
+    target: Optional[str]
+
+
+class Fingerprint(NamedTuple):
+    """The digest of an entry, and the digest of each of its files (nothing for the files that can't be read)."""
+
+    entry: "Entry"
+    digest: Optional[str]
+    files: Dict[Path, Optional[str]]
+    error: Optional[Exception]
+
+
+class Fingerprints(NamedTuple):
+    """The fingerprints of many entries, and how many files were hashed or reused from the last run."""
+
+    fingerprints: List[Fingerprint]
+    hashed: int
+    reused: int
+
+
+_local: threading.local = threading.local()
+
+
+def _key(result: os.stat_result) -> _Key:
+    """Gets the key of a file.
+
+    Args:
+        result: The stat result of the file.
+
+    Returns:
+        Its device, inode, size and mtime.
+    """
+    return result.st_dev, result.st_ino, result.st_size, result.st_mtime_ns
+
+
+def walk(location: Path) -> List[Record]:
+    """Lists what a location holds.
+
+    Notes:
+        Symlinks to files are followed, symlinks to folders aren't walked but their target is recorded. Anything
+        else than files and folders is left out.
+
+    Args:
+        location: The location.
+
+    Returns:
+        The records of the location, sorted by relative path. A file location has a single record with an empty
+        relative path, a missing location has a single missing record.
+    """
+    try:
+        result: os.stat_result = os.stat(location)
+    except (OSError, ValueError):
+        return [Record(MISSING, "", None, None)]
+    if not stat.S_ISDIR(result.st_mode):
+        return [Record(FILE, "", result, None)] if stat.S_ISREG(result.st_mode) else []
+    records: List[Record] = []
+    folders: List[Tuple[str, str]] = [(str(location), "")]
+    while folders:
+        folder, relative = folders.pop()
+        try:
+            with os.scandir(folder) as iterator:
+                items: List[os.DirEntry] = list(iterator)
+        except OSError:
+            records.append(Record(UNREADABLE, relative, None, None))
+            continue
+        for item in items:
+            path: str = f"{relative}/{item.name}" if relative else item.name
+            try:
+                if item.is_dir(follow_symlinks=False):
+                    folders.append((item.path, path))
+                elif item.is_symlink() and item.is_dir():
+                    records.append(Record(LINK, path, None, os.readlink(item.path)))
+                elif item.is_file():
+                    records.append(Record(FILE, path, item.stat(), None))
+            except OSError:
+                pass  # removed since it was listed, or a dangling symlink
+    records.sort(key=lambda record: record.relative)
+    return records
+
+
+def _list(entry: "Entry") -> Tuple[List[Tuple[Path, List[Record]]], Optional[Exception]]:
+    """Lists what every location of an entry holds.
+
+    Args:
+        entry: The entry.
+
+    Returns:
+        Each location and its records, or the error formatting the locations.
+    """
+    try:
+        return [(location, walk(location)) for location in entry.locations], None
+    except exceptions.FormatMapError as error:
+        return [], error
+
+
+def _hash(path: str) -> Tuple[Optional[str], Optional[_Key]]:
+    """Hashes the content of a file, in chunks.
+
+    Args:
+        path: The file.
+
+    Returns:
+        The sha256 digest of the file, or nothing if it can't be read, and its key if it didn't change while it was
+        hashed.
+    """
+    buffer: Optional[bytearray] = getattr(_local, "buffer", None)
+    if buffer is None:
+        buffer = _local.buffer = bytearray(CHUNK_SIZE)
+    view: memoryview = memoryview(buffer)
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb", buffering=0) as file:
+            before: _Key = _key(os.fstat(file.fileno()))
+            while True:
+                read: int = file.readinto(buffer)  # type: ignore
+                if not read:
+                    break
+                digest.update(view[:read])
+            after: _Key = _key(os.fstat(file.fileno()))
+    except OSError:
+        return None, None
+    return digest.hexdigest(), before if before == after else None
+
+
+def _read_cache(path: Optional[Path]) -> Dict[str, list]:
+    """Reads the file digests remembered by the last run.
+
+    Args:
+        path: The cache file, if any.
+
+    Returns:
+        The key of every file, when it was hashed and its digest, keyed by file. Empty if the cache is missing or
+        invalid.
+    """
+    if path is None:
+        return {}
+    try:
+        cache = json.loads(path.read_text())
+        if cache["version"] != _VERSION:
+            return {}
+        return dict(cache["files"])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return {}
+
+
+def _write_cache(path: Optional[Path], files: Dict[str, list]) -> None:
+    """Remembers the file digests for the next run.
+
+    Notes:
+        The cache is written to a temporary file first, then renamed. Errors are ignored, the next run hashes every
+        file again.
+
+    Args:
+        path: The cache file, if any.
+        files: The key of every file, when it was hashed and its digest, keyed by file.
+
+    Returns:
+        Nothing.
+    """
+    if path is None:
+        return
+    try:
+        path.parent.mkdir(exist_ok=True)
+        utils.write_atomically(
+            path, json.dumps({"version": _VERSION, "files": files}, separators=(",", ":")).encode()
+        )
+    except OSError:
+        pass
+
+
+def _inside(path: str, folders: Set[str]) -> bool:
+    """Checks if a path is one of some folders, or inside one.
+
+    Args:
+        path: The path.
+        folders: The folders.
+
+    Returns:
+        True if the path or one of its parents is in the folders.
+    """
+    while True:
+        if path in folders:
+            return True
+        parent: str = os.path.dirname(path)
+        if parent == path:
+            return False
+        path = parent
+
+
+def _entry_digest(
+    entry: "Entry", locations: List[Tuple[Path, List[Record]]], digests: Dict[str, Optional[str]]
+) -> Tuple[str, Dict[Path, Optional[str]]]:
+    """Hashes the digest of an entry.
+
+    Args:
+        entry: The entry.
+        locations: Each location of the entry and its records.
+        digests: The digest of every file, keyed by file.
+
+    Returns:
+        The digest of the entry, and the digest of each of its files.
+    """
+    digest = hashlib.sha256(b"where-is fingerprint %d\0" % _VERSION)
+    files: Dict[Path, Optional[str]] = {}
+    for template, (location, records) in zip(entry.to_dict["locations"], locations):
+        digest.update(b"L\0" + os.fsencode("/".join(template)) + b"\0")
+        for kind, relative, _, target in records:
+            value: Optional[str] = target
+            if kind == FILE:
+                path: Path = location / relative if relative else location
+                value = files[path] = digests[str(path)]
+                kind = FILE if value is not None else UNREADABLE
+            digest.update(kind + b"\0" + os.fsencode(relative) + b"\0" + os.fsencode(value or "") + b"\0")
+    return digest.hexdigest(), files
+
+
+def fingerprint(
+    entries: Iterable["Entry"], workers: int = utils.DEFAULT_WORKERS, cache: Optional[Path] = None
+) -> Fingerprints:
+    """Fingerprints the content of the config files of many entries.
+
+    Notes:
+        A file whose device, inode, size and mtime didn't change since the last run isn't read again, unless it was
+        modified right before it was hashed. A file shared by many entries is only hashed once.
+        Files that can't be read count as unreadable in the digest, so that the digest changes once they can be.
+
+    Args:
+        entries: The entries.
+        workers: The number of threads walking locations and hashing files.
+        cache: The file remembering the digest of every file, if any.
+
+    Returns:
+        The fingerprint of each entry, in the order of the entries, and how many files were hashed or reused.
+
+    Raises:
+        ValueError: If there isn't at least one worker.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    utils.check_workers(workers)
+    entries = list(entries)
+    previous: Dict[str, list] = _read_cache(cache)
+    remembered: Dict[str, list] = {}
+    digests: Dict[str, Optional[str]] = {}
+    hashed, reused = 0, 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        listings: List[Tuple[List[Tuple[Path, List[Record]]], Optional[Exception]]] = list(
+            executor.map(_list, entries)
+        )
+        keys: Dict[str, _Key] = {}
+        for locations, _ in listings:
+            for location, records in locations:
+                for kind, relative, result, _ in records:
+                    if kind == FILE:
+                        keys[str(location / relative if relative else location)] = _key(result)  # type: ignore
+        pending: List[str] = []
+        for path, key in keys.items():
+            cached: Optional[list] = previous.get(path)
+            if cached is not None and tuple(cached[:4]) == key and cached[4] - key[3] >= utils.RACY_NS:
+                digests[path] = cached[5]
+                remembered[path] = cached
+                reused += 1
+            else:
+                pending.append(path)
+        started_ns: int = time.time_ns()
+        for path, (digest, key) in zip(pending, executor.map(_hash, pending)):
+            digests[path] = digest
+            hashed += 1
+            if digest is not None and key is not None:
+                remembered[path] = [*key, started_ns, digest]
+
+    fingerprints: List[Fingerprint] = []
+    walked: Set[str] = set()
+    for entry, (locations, error) in zip(entries, listings):
+        if error is not None:
+            fingerprints.append(Fingerprint(entry, None, {}, error))
+            continue
+        walked.update(str(location) for location, _ in locations)
+        fingerprints.append(Fingerprint(entry, *_entry_digest(entry, locations, digests), None))
+    # the files of the locations that weren't walked this time are kept for the next runs
+    for path, cached in previous.items():
+        if path not in remembered and not _inside(path, walked):
+            remembered[path] = cached
+    _write_cache(cache, remembered)
+    return Fingerprints(fingerprints, hashed, reused)
@@ -0,0 +1,462 @@
+"""A compiled, memory-mapped index of a database folder.
+
+The index is a single binary file stored in the `.cache` folder of the database. It holds a header, a table of
+slots sorted by entry name, the entry names and the entries themselves encoded as compact json. Looking up an
+entry is a binary search over the slots, so only a few pages of the index get touched instead of every json file
+in the database.
+"""
+import mmap
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+from whereis import codec, exceptions, profiling, utils
+
+if TYPE_CHECKING:
+    from whereis.storage import Storage
+
+RawEntry = Dict[str, Union[str, List[List[str]]]]
+
+CACHE_FOLDER: str = ".cache"
+INDEX_NAME: str = "index"
+SEARCH_NAME: str = "search"
+SOCKET_NAME: str = "daemon.sock"
+
+_MAGIC: bytes = b"WHIX"
+_VERSION: int = 1
+# magic, version, folder mtime (ns), snapshot time (ns), json file count, json file names checksum, entry count
+_HEADER: struct.Struct = struct.Struct("<4sIqqIII")
+# name offset, name length, data offset, data length
+_SLOT: struct.Struct = struct.Struct("<IIII")
+# Looking up a single entry doesn't make up for importing a faster json codec.
+_LOOKUP_CODEC: codec.Codec = codec.JsonCodec()
+# How many times the entries are read again when the database changes while they're read. If it keeps changing, the
+# index compiled from the last read is tagged with the snapshot from before it, so it gets compiled again next time.
+_READ_ATTEMPTS: int = 3
+
+
+def json_files(location: Path) -> List[str]:
+    """Lists the json files of a database folder.
+
+    Args:
+        location: The database folder.
+
+    Returns:
+        The sorted names of every file whose suffix is '.json'.
+    """
+    return sorted(name for name in os.listdir(location) if os.path.splitext(name)[1] == ".json")
+
+
+def _checksum(name: str) -> int:
+    """Computes the checksum of a file name.
+
+    Args:
+        name: The file name.
+
+    Returns:
+        The crc32 of the name.
+    """
+    return zlib.crc32(name.encode("utf-8", "surrogateescape"))
+
+
+class Snapshot(NamedTuple):
+    """The state of a database folder at some point in time.
+
+    The checksum is the sum of the checksums of every json file name, so it doesn't depend on the listing order and
+    can be updated when a single file is added or removed.
+    """
+
+    mtime_ns: int
+    taken_ns: int
+    file_count: int
+    checksum: int
+
+    @classmethod
+    def take(cls, location: Path) -> "Snapshot":
+        """Takes a snapshot of a database folder.
+
+        Args:
+            location: The database folder.
+
+        Returns:
+            The snapshot.
+        """
+        taken_ns: int = time.time_ns()
+        mtime_ns: int = os.stat(location).st_mtime_ns
+        names: List[str] = json_files(location)
+        return cls(
+            mtime_ns, taken_ns, len(names), sum(map(_checksum, names)) & 0xFFFFFFFF
+        )
+
+    def refresh(self, location: Path) -> Optional["Snapshot"]:
+        """Checks if a database folder is still in the state of this snapshot.
+
+        Notes:
+            Only the folder mtime and the set of json files are checked, editing a json file in place isn't
+            detected. The json files are only listed if the folder was modified right before the snapshot was taken,
+            because the mtime may not have changed since.
+
+        Args:
+            location: The database folder.
+
+        Returns:
+            An equivalent snapshot if the folder didn't change, else nothing.
+        """
+        try:
+            mtime_ns: int = os.stat(location).st_mtime_ns
+        except OSError:
+            return None
+        if mtime_ns != self.mtime_ns:
+            return None
+        if self.taken_ns - self.mtime_ns >= utils.RACY_NS:
+            return self
+        snapshot: Snapshot = self.take(location)
+        if (snapshot.mtime_ns, snapshot.file_count, snapshot.checksum) != (
+            self.mtime_ns,
+            self.file_count,
+            self.checksum,
+        ):
+            return None
+        return snapshot
+
+    def updated(self, location: Path, names: Sequence[str], delta: int) -> "Snapshot":
+        """The snapshot of a database folder after this process changed some json files.
+
+        Args:
+            location: The database folder.
+            names: The json file names.
+            delta: 1 if the files were created, -1 if they were removed and 0 if they were overwritten.
+
+        Returns:
+            The new snapshot.
+        """
+        return Snapshot(
+            os.stat(location).st_mtime_ns,
+            time.time_ns(),
+            self.file_count + delta * len(names),
+            (self.checksum + delta * sum(map(_checksum, names))) & 0xFFFFFFFF,
+        )
+
+
+def _encode(raw_entries: Sequence[RawEntry]) -> List[Tuple[bytes, bytes]]:
+    """Encodes raw entries for the binary index format.
+
+    Args:
+        raw_entries: The raw entries.
+
+    Returns:
+        The encoded name and compact json of every entry.
+
+    Raises:
+        EntryParseError: If an entry doesn't have a name.
+    """
+    encoder: codec.Codec = codec.json_codec()
+    records: List[Tuple[bytes, bytes]] = []
+    for raw_entry in raw_entries:
+        name = raw_entry.get("name") if isinstance(raw_entry, dict) else None
+        if not isinstance(name, str):
+            raise exceptions.EntryParseError(f"JSON schema incorrect: {raw_entry}")
+        records.append(
+            (
+                name.encode("utf-8", "surrogateescape"),
+                encoder.encode(raw_entry),
+            )
+        )
+    return records
+
+
+def _compile(snapshot: Snapshot, raw_entries: List[RawEntry]) -> bytes:
+    """Compiles raw entries into the binary index format.
+
+    Args:
+        snapshot: The snapshot of the database folder taken before the entries were read.
+        raw_entries: The raw entries.
+
+    Returns:
+        The compiled index.
+
+    Raises:
+        EntryParseError: If an entry doesn't have a name.
+    """
+    return _pack(snapshot, _encode(raw_entries))
+
+
+def _pack(snapshot: Snapshot, records: List[Tuple[bytes, bytes]]) -> bytes:
+    """Packs encoded entries into the binary index format.
+
+    Args:
+        snapshot: The snapshot of the database folder the entries are up to date with.
+        records: The encoded name and entry of every entry, in any order.
+
+    Returns:
+        The compiled index.
+    """
+    records.sort(key=lambda record: record[0])
+
+    names_start: int = _HEADER.size + _SLOT.size * len(records)
+    data_start: int = names_start + sum(len(name) for name, _ in records)
+    slots: List[bytes] = []
+    name_offset, data_offset = names_start, data_start
+    for name, data in records:
+        slots.append(_SLOT.pack(name_offset, len(name), data_offset, len(data)))
+        name_offset += len(name)
+        data_offset += len(data)
+
+    header: bytes = _HEADER.pack(_MAGIC, _VERSION, *snapshot, len(records))
+    return b"".join(
+        [header, *slots, *(name for name, _ in records), *(data for _, data in records)]
+    )
+
+
+class Index:
+    def __init__(
+        self, storage: "Storage", buffer: Union[bytes, mmap.mmap], path: Optional[Path] = None
+    ) -> None:
+        """Initializes an Index object.
+
+        Args:
+            storage: The storage of the database the index belongs to.
+            buffer: The compiled index, either in memory or memory-mapped.
+            path: The compiled index file the buffer is mapped from, if any.
+
+        Raises:
+            ValueError: If the buffer isn't a compiled index.
+        """
+        self._storage = storage
+        self._buffer = buffer
+        self._path = path
+        if len(buffer) < _HEADER.size:
+            raise ValueError("Index is truncated.")
+        magic, version, *snapshot, self._count = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a where-is index.")
+        self._snapshot: Snapshot = Snapshot(*snapshot)
+
+    @classmethod
+    @profiling.timed(profiling.DATABASE_LOAD)
+    def load(cls, storage: "Storage", path: Optional[Path] = None) -> "Index":
+        """Opens the index of a database, compiling it first if it's missing or stale.
+
+        Notes:
+            If the index can't be written (for example, if the database is read-only) it is kept in memory only.
+
+        Args:
+            storage: The storage of the database.
+            path: The compiled index file. Defaults to the index file of the database cache folder.
+
+        Returns:
+            An up to date index.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed while compiling the index.
+        """
+        path = path or storage.location / CACHE_FOLDER / INDEX_NAME
+        index: Optional[Index] = cls._open(storage, path)
+        if index is not None and not index.is_stale():
+            return index
+        if index is not None:
+            index.close()
+
+        try:
+            # creating the cache folder changes the mtime of the database folder, so do it before taking the mtime
+            path.parent.mkdir(exist_ok=True)
+        except OSError:
+            pass
+        # readers don't lock: if a writer changed the database while it was read, it's read again
+        for _ in range(_READ_ATTEMPTS):
+            snapshot: Snapshot = storage.take()
+            raw_entries: List[RawEntry] = storage.read()
+            if storage.refresh(snapshot) is not None:
+                break
+        return cls._write(storage, path, _compile(snapshot, raw_entries))
+
+    @classmethod
+    def _write(cls, storage: "Storage", path: Optional[Path], compiled: bytes) -> "Index":
+        """Writes a compiled index file, then memory-maps it.
+
+        Notes:
+            Another process may replace the file right after it's written, with an index compiled from another
+            state of the database, so the index is kept in memory if the mapped file isn't the one written.
+
+        Args:
+            storage: The storage of the database.
+            path: The index file, if any.
+            compiled: The compiled index.
+
+        Returns:
+            The index, memory-mapped or in memory.
+        """
+        if path is None:
+            return cls(storage, compiled)
+        try:
+            utils.write_atomically(path, compiled)
+        except OSError:
+            return cls(storage, compiled)
+        index: Optional[Index] = cls._open(storage, path)
+        if index is not None and index._buffer[: _HEADER.size] == compiled[: _HEADER.size]:
+            return index
+        if index is not None:
+            index.close()
+        return cls(storage, compiled)
+
+    @classmethod
+    def _open(cls, storage: "Storage", path: Path) -> Optional["Index"]:
+        """Memory-maps a compiled index file.
+
+        Args:
+            storage: The storage of the database.
+            path: The index file.
+
+        Returns:
+            The index, or nothing if it doesn't exist or isn't valid.
+        """
+        try:
+            with open(str(path), "rb") as file:
+                buffer: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            return cls(storage, buffer, path)
+        except ValueError:
+            buffer.close()
+            return None
+
+    @property
+    def snapshot(self) -> Snapshot:
+        """The snapshot of the database the index was compiled from.
+
+        Returns:
+            The snapshot.
+        """
+        return self._snapshot
+
+    def is_stale(self) -> bool:
+        """Has the database changed since the index was compiled?
+
+        Returns:
+            True if the index has to be compiled again, else False.
+        """
+        snapshot: Optional[Snapshot] = self._storage.refresh(self._snapshot)
+        if snapshot is None:
+            return True
+        self._snapshot = snapshot
+        return False
+
+    def updated(self, snapshot: Snapshot, raw_entries: Sequence[RawEntry], removed: Sequence[str]) -> "Index":
+        """Compiles the index again after this process wrote or removed some entries, without reading the database.
+
+        Notes:
+            The other entries are copied as they're encoded in this index, and the index file is replaced, so the
+            other processes don't have to compile it again. This index is closed.
+
+        Args:
+            snapshot: The snapshot of the database after the entries were written or removed.
+            raw_entries: The written raw entries.
+            removed: The names of the removed entries.
+
+        Returns:
+            The updated index, kept in memory only if its file can't be written.
+
+        Raises:
+            EntryParseError: If a written entry doesn't have a name.
+        """
+        written: List[Tuple[bytes, bytes]] = _encode(raw_entries)
+        skipped: Set[bytes] = {name for name, _ in written}
+        skipped.update(name.encode("utf-8", "surrogateescape") for name in removed)
+        records: List[Tuple[bytes, bytes]] = written
+        for position in range(self._count):
+            name_offset, name_length, data_offset, data_length = self._slot(position)
+            name: bytes = self._buffer[name_offset : name_offset + name_length]
+            if name not in skipped:
+                records.append((name, self._buffer[data_offset : data_offset + data_length]))
+        self.close()
+        return self._write(self._storage, self._path, _pack(snapshot, records))
+
+    def _slot(self, position: int) -> Tuple[int, int, int, int]:
+        """Reads a slot.
+
+        Args:
+            position: The position of the slot in the sorted slot table.
+
+        Returns:
+            The name offset, name length, data offset and data length.
+        """
+        return _SLOT.unpack_from(self._buffer, _HEADER.size + _SLOT.size * position)
+
+    def _name(self, position: int) -> bytes:
+        """Reads the name of a slot.
+
+        Args:
+            position: The position of the slot.
+
+        Returns:
+            The encoded entry name.
+        """
+        name_offset, name_length, _, _ = self._slot(position)
+        return self._buffer[name_offset : name_offset + name_length]
+
+    @profiling.timed(profiling.JSON_PARSE)
+    def _data(self, position: int, decoder: Optional[codec.Codec] = None) -> RawEntry:
+        """Reads the entry of a slot.
+
+        Args:
+            position: The position of the slot.
+            decoder: The json codec decoding it. Defaults to the fastest one available.
+
+        Returns:
+            The raw entry.
+        """
+        _, _, data_offset, data_length = self._slot(position)
+        return (decoder or codec.json_codec()).decode(self._buffer[data_offset : data_offset + data_length])
+
+    def get(self, name: str) -> Optional[RawEntry]:
+        """Looks up an entry by its name.
+
+        Args:
+            name: The entry name.
+
+        Returns:
+            The raw entry, or nothing if there isn't an entry with that name.
+        """
+        key: bytes = name.encode("utf-8", "surrogateescape")
+        low, high = 0, self._count
+        while low < high:
+            middle: int = (low + high) // 2
+            if self._name(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._name(low) == key:
+            return self._data(low, _LOOKUP_CODEC)
+        return None
+
+    def names(self) -> List[str]:
+        """All of the entry names, sorted.
+
+        Returns:
+            The entry names.
+        """
+        return [
+            self._name(position).decode("utf-8", "surrogateescape")
+            for position in range(self._count)
+        ]
+
+    def close(self) -> None:
+        """Unmaps the index.
+
+        Returns:
+            Nothing.
+        """
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __iter__(self) -> Iterator[RawEntry]:
+        return (self._data(position) for position in range(self._count))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} object: location={self._storage.location} entries={self._count}>"
@@ -0,0 +1,339 @@
+"""Databases made of layers, each overriding the entries of the layers below it.
+
+From the bottom up, a database reads:
+    the catalog: the entries packaged with where-is, read in place so that upgrades ship new entries.
+    the project layer (optional): a database folder shipped with a project, for its own config files.
+    the user layer: the database folder itself, the only layer which is written to.
+
+Every read-only layer has its own compiled index, kept in the cache folder of the user layer so that read-only
+folders are never written to. It's compiled once and then only checked for changes, and the layers are merged into the
+compiled index of the user layer. Removing an entry which is in a read-only layer writes a tombstone
+(an entry with `"removed": true` and no locations) in the user layer, hiding the entry of the layers below.
+
+Databases created before the catalog was layered hold their own copies of the packaged entries, so a packaged entry
+they don't have was removed from them. They get tombstones for those entries the first time they're opened with the
+catalog below them.
+"""
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+from whereis import exceptions
+from whereis.index import CACHE_FOLDER, Index, RawEntry, Snapshot
+from whereis.storage import Storage
+
+# The name of the compiled index of the catalog, in the cache folder of the user layer.
+CATALOG_INDEX: str = "catalog"
+# The prefix of the names of the compiled indexes of project layers, in the cache folder of the user layer.
+PROJECT_INDEX: str = "project"
+# The file marking a database folder whose entries are layered over the catalog, instead of holding copies of it.
+LAYERED_NAME: str = ".layered"
+
+
+class Layer(NamedTuple):
+    """A read-only layer of a database, and where its compiled index is kept."""
+
+    storage: Storage
+    index_path: Path
+
+
+def project_index(location: Path, project: Path) -> Path:
+    """Gets where the compiled index of a project layer is kept.
+
+    Args:
+        location: The database folder.
+        project: The project folder.
+
+    Returns:
+        The compiled index file, named after a checksum of the absolute project folder.
+    """
+    checksum: int = zlib.crc32(str(project.absolute()).encode("utf-8", "surrogateescape"))
+    return location / CACHE_FOLDER / f"{PROJECT_INDEX}.{checksum:08x}"
+
+
+def tombstone(name: str) -> RawEntry:
+    """Makes the tombstone of an entry.
+
+    Args:
+        name: The entry name.
+
+    Returns:
+        The raw tombstone.
+    """
+    return {"name": name, "removed": True}  # type: ignore
+
+
+def is_tombstone(raw_entry: RawEntry) -> bool:
+    """Checks if a raw entry is a tombstone.
+
+    Args:
+        raw_entry: The raw entry.
+
+    Returns:
+        True if the raw entry hides the entries of the layers below, else False.
+    """
+    return isinstance(raw_entry, dict) and raw_entry.get("removed") is True
+
+
+def upgrade(user: Storage, catalog: Storage) -> bool:
+    """Hides the packaged entries which were removed from a database created before the catalog was layered.
+
+    Notes:
+        Such a database is told apart by the unchanged copy of a packaged entry it holds, and by the missing marker and
+        compiled catalog index. Anything else is left as is, nothing is written to a folder only being read. Once
+        upgraded the folder is marked as layered, so it's only done once. Packaged entries added to the catalog after
+        the database was created are hidden as well, there's no telling them apart from removed ones.
+
+    Args:
+        user: The storage of the database folder.
+        catalog: The storage of the packaged entries.
+
+    Returns:
+        True if the database was upgraded, else False.
+    """
+    marker: Path = user.location / LAYERED_NAME
+    if marker.exists() or (user.location / CACHE_FOLDER / CATALOG_INDEX).exists() or not user.location.is_dir():
+        return False
+    try:
+        packaged: Dict[str, RawEntry] = {raw_entry["name"]: raw_entry for raw_entry in catalog.read()}  # type: ignore
+        if not any(packaged.get(raw_entry["name"]) == raw_entry for raw_entry in user.read()):  # type: ignore
+            return False
+        with user.lock():
+            if marker.exists():
+                return False
+            names = {raw_entry["name"] for raw_entry in user.read()}  # type: ignore
+            removed = sorted(set(packaged) - names)
+            if removed:
+                user.write_batch([tombstone(name) for name in removed])
+            marker.touch()
+    except (exceptions.EntryParseError, OSError):  # tried again next time, the tombstones written are kept
+        return False
+    return True
+
+
+class LayeredStorage(Storage):
+    def __init__(self, user: Storage, layers: Sequence[Layer] = ()) -> None:
+        """Initializes a LayeredStorage object.
+
+        Notes:
+            The snapshots of the read-only layers are folded into the mtime of the user layer snapshots, so that a
+            change to any layer makes the compiled indexes of the database stale without changing their format.
+
+        Args:
+            user: The storage of the user layer, which entries are written to.
+            layers: The read-only layers, from the bottom up.
+        """
+        super().__init__(user.location)
+        self._user = user
+        self._layers: List[Layer] = list(layers)
+        self._indexes: List[Optional[Index]] = [None] * len(self._layers)
+        self._token: int = 0
+        # how writing the last tombstone of each name changed the user layer, for every snapshot updated after it
+        self._tombstones: Dict[str, int] = {}
+
+    @property
+    def name(self) -> str:  # type: ignore
+        return self._user.name
+
+    @property
+    def exact(self) -> bool:  # type: ignore
+        return self._user.exact
+
+    @property
+    def user(self) -> Storage:
+        """The storage of the user layer.
+
+        Returns:
+            The storage.
+        """
+        return self._user
+
+    @property
+    def layers(self) -> List[Layer]:
+        """The read-only layers, from the bottom up.
+
+        Returns:
+            The layers.
+        """
+        return list(self._layers)
+
+    def _index(self, position: int) -> Optional[Index]:
+        """Gets the up to date index of a read-only layer.
+
+        Args:
+            position: The position of the layer.
+
+        Returns:
+            The index, or nothing if the layer folder doesn't exist.
+
+        Raises:
+            EntryParseError: If an entry of the layer can't be parsed.
+        """
+        index: Optional[Index] = self._indexes[position]
+        if index is None or index.is_stale():
+            if index is not None:
+                index.close()
+            layer: Layer = self._layers[position]
+            try:
+                index = Index.load(layer.storage, layer.index_path)
+            except OSError:
+                index = None
+            self._indexes[position] = index
+        return index
+
+    def _refresh_token(self) -> int:
+        """Folds the snapshots of the read-only layers into a token.
+
+        Returns:
+            The token, 0 if there isn't any read-only layer.
+        """
+        if not self._layers:
+            return 0
+        states: List[str] = []
+        for position in range(len(self._layers)):
+            index: Optional[Index] = self._index(position)
+            snapshot: Optional[Snapshot] = index.snapshot if index is not None else None
+            states.append(
+                "-" if snapshot is None else f"{snapshot.mtime_ns}:{snapshot.file_count}:{snapshot.checksum}"
+            )
+        self._token = zlib.crc32(",".join(states).encode())
+        return self._token
+
+    def _fold(self, snapshot: Snapshot, token: int) -> Snapshot:
+        """Folds a token in or out of a snapshot.
+
+        Args:
+            snapshot: The snapshot.
+            token: The token.
+
+        Returns:
+            The snapshot, whose mtime has the token folded in if it wasn't, else out.
+        """
+        return snapshot._replace(mtime_ns=snapshot.mtime_ns ^ token)
+
+    def take(self) -> Snapshot:
+        token: int = self._refresh_token()  # before the user layer, loading an index can create its cache folder
+        return self._fold(self._user.take(), token)
+
+    def refresh(self, snapshot: Snapshot) -> Optional[Snapshot]:
+        token: int = self._refresh_token()
+        refreshed: Optional[Snapshot] = self._user.refresh(self._fold(snapshot, token))
+        return None if refreshed is None else self._fold(refreshed, token)
+
+    def updated(self, snapshot: Snapshot, names: Sequence[str], delta: int) -> Snapshot:
+        """The snapshot of the stored entries after this object wrote some entries at once.
+
+        Notes:
+            Removing an entry of a read-only layer writes a tombstone in the user layer instead, so the user layer
+            gets a file more (or the same files, if the entry was overridden there).
+
+        Args:
+            snapshot: The snapshot before the entries were written.
+            names: The entry names.
+            delta: 1 if the entries were added, -1 if they were removed and 0 if they were overwritten.
+
+        Returns:
+            The new snapshot.
+        """
+        user: Snapshot = self._fold(snapshot, self._token)
+        deltas: Dict[int, List[str]] = {}
+        for name in names:
+            deltas.setdefault(self._tombstones.get(name, delta) if delta < 0 else delta, []).append(name)
+        for user_delta, grouped in deltas.items():
+            user = self._user.updated(user, grouped, user_delta)
+        return self._fold(user, self._token)
+
+    def _lower(self, name: str) -> Optional[RawEntry]:
+        """Looks up an entry in the read-only layers.
+
+        Args:
+            name: The entry name.
+
+        Returns:
+            The raw entry of the topmost layer having it, or nothing if none has it.
+        """
+        for position in reversed(range(len(self._layers))):
+            index: Optional[Index] = self._index(position)
+            raw_entry: Optional[RawEntry] = index.get(name) if index is not None else None
+            if raw_entry is not None:
+                return raw_entry
+        return None
+
+    def read(self) -> List[RawEntry]:
+        """Reads every entry, merging the layers.
+
+        Returns:
+            The raw entries, without the tombstones and the entries they hide.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+        """
+        merged: Dict[str, RawEntry] = {}
+        for position in range(len(self._layers)):
+            index: Optional[Index] = self._index(position)
+            for raw_entry in index if index is not None else ():
+                merged[raw_entry["name"]] = raw_entry  # type: ignore
+        for raw_entry in self._user.read():
+            merged[raw_entry["name"]] = raw_entry  # type: ignore
+        return [raw_entry for raw_entry in merged.values() if not is_tombstone(raw_entry)]
+
+    def read_direct(self, name: str) -> Optional[RawEntry]:
+        """Reads an entry from the user layer if it's there, else from the read-only layers.
+
+        Notes:
+            The read-only layers are only read if the user layer is exact, else the entry can be in a file of the user
+            layer named after something else, and only the merged index tells.
+
+        Args:
+            name: The entry name.
+
+        Returns:
+            The raw entry, or nothing if it's removed, or if the user layer can't read it by itself.
+
+        Raises:
+            EntryParseError: If the entry can't be parsed.
+        """
+        if not self._user.direct:
+            return None
+        raw_entry: Optional[RawEntry] = self._user.read_direct(name)
+        if raw_entry is None:
+            return self._lower(name) if self._user.exact else None
+        return None if is_tombstone(raw_entry) else raw_entry
+
+    def write(self, raw_entry: RawEntry) -> bool:
+        return self._user.write(raw_entry)
+
+    def write_batch(self, raw_entries: List[RawEntry]) -> bool:
+        return self._user.write_batch(raw_entries)
+
+    def delete(self, name: str) -> None:
+        """Deletes an entry from the user layer, or hides it with a tombstone if a read-only layer has it.
+
+        Args:
+            name: The entry name.
+
+        Returns:
+            Nothing.
+        """
+        if self._lower(name) is None:
+            self._tombstones.pop(name, None)
+            return self._user.delete(name)
+        self._tombstones[name] = 0 if self._user.write(tombstone(name)) else 1
+
+    def initialize(self, raw_entries: Iterable[RawEntry]) -> None:
+        self._user.initialize(raw_entries)
+
+    def clear(self) -> None:
+        self._user.clear()
+
+    def compact(self) -> bool:
+        return self._user.compact()
+
+    def close(self) -> None:
+        self._user.close()
+        for position, index in enumerate(self._indexes):
+            if index is not None:
+                index.close()
+                self._indexes[position] = None
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} object: location={self._location} layers={len(self._layers) + 1}>"
@@ -1,9 +1,28 @@
 """Custom messages."""
-from typing import Literal, Dict
-from rich.console import Console
+from typing import TYPE_CHECKING, Literal, Dict, Optional
 import sys
 
-_console: Console = Console(file=sys.stderr)
+if TYPE_CHECKING:
+    from rich.console import Console
+
+_console: Optional["Console"] = None
+
+
+def _get_console() -> "Console":
+    """Gets the console messages are printed to.
+
+    Notes:
+        rich is only imported when the first message is printed.
+
+    Returns:
+        The console, printing to stderr.
+    """
+    global _console
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console(file=sys.stderr)
+    return _console
 
 
 def _levels(
@@ -30,7 +49,7 @@ def _levels(
     icon: Dict[str, str] = {"info": "🛈", "success": "✓", "warn": "⚠", "error": "✗"}
 
     for line in message.splitlines():
-        _console.print(
+        _get_console().print(
             to_message[level].format(
                 icon="" if no_icon else f"[[{icon[level]}]]", line=line
             )
@@ -99,7 +118,7 @@ def debug(message: str) -> None:
         Nothing.
     """
     for line in message.splitlines():
-        _console.log(f"[cyan]🔍 {line}")
+        _get_console().log(f"[cyan]🔍 {line}")
 
 
 def _test_levels() -> None:
@@ -0,0 +1,283 @@
+"""Machine-readable output, streamed straight to a file without going through rich."""
+import enum
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO
+from whereis import profiling
+from whereis.status import LocationStatus
+
+Record = Dict[str, Any]
+
+# The columns of status records, written by the commands probing locations.
+STATUS_COLUMNS: List[str] = [
+    "name",
+    "path",
+    "exists",
+    "is_file",
+    "is_dir",
+    "is_symlink",
+    "size",
+    "mtime_ns",
+]
+# The columns of entry records, written by the commands listing entries.
+ENTRY_COLUMNS: List[str] = ["name", "path"]
+# The columns of search records, written by the search command.
+SEARCH_COLUMNS: List[str] = ["name", "score", "match", "path"]
+# The columns of owner records, written by the owner command.
+OWNER_COLUMNS: List[str] = ["name", "location", "exact"]
+# The columns of event records, written by the watch command.
+EVENT_COLUMNS: List[str] = ["event", "name", "path"]
+# The columns of fingerprint records, written by the fingerprint command.
+FINGERPRINT_COLUMNS: List[str] = ["name", "digest"]
+
+_TSV_ESCAPES: Dict[int, str] = {ord("\\"): "\\\\", ord("\t"): "\\t", ord("\n"): "\\n", ord("\r"): "\\r"}
+
+
+class Format(str, enum.Enum):
+    rich = "rich"
+    json = "json"
+    ndjson = "ndjson"
+    tsv = "tsv"
+
+
+def status_record(
+    name: str, status: Dict[Path, LocationStatus], error: Optional[Exception] = None
+) -> Record:
+    """Makes the record of the probed locations of an entry.
+
+    Args:
+        name: The entry name.
+        status: The status of each location.
+        error: The error encountered while probing the locations, if any.
+
+    Returns:
+        The record.
+    """
+    record: Record = {
+        "name": name,
+        "locations": [
+            {
+                "path": str(location),
+                "exists": location_status.exists,
+                "is_file": location_status.is_file,
+                "is_dir": location_status.is_dir,
+                "is_symlink": location_status.is_symlink,
+                "size": location_status.size,
+                "mtime_ns": location_status.mtime_ns,
+            }
+            for location, location_status in status.items()
+        ],
+    }
+    if error is not None:
+        record["error"] = str(error)
+    return record
+
+
+def status_from_record(record: Record) -> Dict[Path, LocationStatus]:
+    """Reads the status of each location back from a status record.
+
+    Args:
+        record: The status record.
+
+    Returns:
+        The status of each location.
+    """
+    status: Dict[Path, LocationStatus] = {}
+    for location in record["locations"]:
+        path: Path = Path(location["path"])
+        status[path] = LocationStatus(
+            path,
+            location["exists"],
+            location["is_file"],
+            location["is_dir"],
+            location["is_symlink"],
+            location["size"],
+            location["mtime_ns"],
+        )
+    return status
+
+
+def entry_record(name: str, locations: Sequence[Path]) -> Record:
+    """Makes the record of an entry.
+
+    Args:
+        name: The entry name.
+        locations: The formatted locations of the entry.
+
+    Returns:
+        The record.
+    """
+    return {"name": name, "locations": [str(location) for location in locations]}
+
+
+def search_record(name: str, score: float, match: str, locations: Sequence[Path]) -> Record:
+    """Makes the record of an entry matching a search query.
+
+    Args:
+        name: The entry name.
+        score: How well the entry matches the query, from 0 to 1.
+        match: The term of the entry that matched the query.
+        locations: The formatted locations of the entry.
+
+    Returns:
+        The record.
+    """
+    return {
+        "name": name,
+        "score": round(score, 4),
+        "match": match,
+        "locations": [str(location) for location in locations],
+    }
+
+
+def owner_record(name: str, location: Path, exact: bool) -> Record:
+    """Makes the record of an entry owning a path.
+
+    Args:
+        name: The entry name.
+        location: The location of the entry that is, or contains, the path.
+        exact: Is the location the path itself?
+
+    Returns:
+        The record.
+    """
+    return {"name": name, "location": str(location), "exact": exact}
+
+
+def event_record(event: str, name: str, path: Path) -> Record:
+    """Makes the record of a change of a location.
+
+    Args:
+        event: The kind of change, created, modified or deleted.
+        name: The name of an entry having the location.
+        path: The location.
+
+    Returns:
+        The record.
+    """
+    return {"event": event, "name": name, "path": str(path)}
+
+
+def fingerprint_record(
+    name: str, digest: Optional[str], files: Dict[Path, Optional[str]], error: Optional[Exception] = None
+) -> Record:
+    """Makes the record of the fingerprint of an entry.
+
+    Args:
+        name: The entry name.
+        digest: The digest of the entry, or nothing if its locations can't be formatted.
+        files: The digest of each file of the entry, nothing for the files that can't be read.
+        error: The error encountered while fingerprinting the entry, if any.
+
+    Returns:
+        The record.
+    """
+    record: Record = {"name": name, "digest": digest, "files": {str(path): value for path, value in files.items()}}
+    if error is not None:
+        record["error"] = str(error)
+    return record
+
+
+def _tsv_field(value: Any) -> str:
+    """Converts a value to a tsv field.
+
+    Args:
+        value: The value.
+
+    Returns:
+        The escaped field. Booleans are written in lowercase and nothing is written as an empty field.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value).translate(_TSV_ESCAPES)
+
+
+def _tsv_rows(record: Record) -> Iterator[Record]:
+    """Flattens a record into tsv rows, one per location.
+
+    Args:
+        record: The record.
+
+    Returns:
+        The rows.
+    """
+    locations: List[Any] = record.get("locations") or [{}]
+    for location in locations:
+        yield {**record, **(location if isinstance(location, dict) else {"path": location})}
+
+
+class RecordWriter:
+    def __init__(
+        self, format_: Format, columns: Sequence[str], file: Optional[TextIO] = None
+    ) -> None:
+        """Initializes a RecordWriter object.
+
+        Args:
+            format_: The output format, can't be rich.
+            columns: The tsv columns.
+            file: The file to write to. Defaults to stdout.
+
+        Raises:
+            ValueError: If the format is rich.
+        """
+        if format_ is Format.rich:
+            raise ValueError("Records can't be written in the rich format.")
+        self._format = format_
+        self._columns = columns
+        self._file: TextIO = file or sys.stdout
+        self._count = 0
+
+    @profiling.timed(profiling.RENDERING)
+    def write(self, record: Record) -> None:
+        """Writes a record.
+
+        Args:
+            record: The record.
+
+        Returns:
+            Nothing.
+        """
+        if self._format is Format.tsv:
+            if not self._count:
+                self._file.write("\t".join(self._columns) + "\n")
+            for row in _tsv_rows(record):
+                self._file.write(
+                    "\t".join(_tsv_field(row.get(column)) for column in self._columns) + "\n"
+                )
+        elif self._format is Format.ndjson:
+            self._file.write(json.dumps(record) + "\n")
+        else:
+            self._file.write(("[" if not self._count else ",") + json.dumps(record))
+        self._count += 1
+
+    def flush(self) -> None:
+        """Flushes the records written so far, for output streamed to another program.
+
+        Returns:
+            Nothing.
+        """
+        self._file.flush()
+
+    def close(self) -> None:
+        """Finishes the output.
+
+        Returns:
+            Nothing.
+        """
+        if self._format is Format.json:
+            self._file.write("]\n" if self._count else "[]\n")
+        elif self._format is Format.tsv and not self._count:
+            self._file.write("\t".join(self._columns) + "\n")
+        self._file.flush()
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} object: format={self._format.value} records={self._count}>"
@@ -0,0 +1,155 @@
+"""Reverse lookups: which entries own a path.
+
+The formatted locations of every entry are stored in a trie keyed by path component, so finding the owners of a
+path walks one node per component of the path, whatever the size of the database.
+"""
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from whereis import exceptions
+
+if TYPE_CHECKING:
+    from whereis.core import Entry
+
+
+class Match(NamedTuple):
+    """An entry name whose location is a path, or one of its parents."""
+
+    name: str
+    location: Path
+    exact: bool
+
+
+class Owner(NamedTuple):
+    """An entry whose location is a path, or one of its parents."""
+
+    entry: "Entry"
+    location: Path
+    exact: bool
+
+
+def _parts(path: Path) -> Tuple[str, ...]:
+    """Splits a path into the keys of the trie.
+
+    Args:
+        path: The path, made absolute against the current directory if it's relative.
+
+    Returns:
+        The normalized components of the path.
+    """
+    return Path(os.path.normcase(os.path.abspath(path))).parts
+
+
+class _Node:
+    __slots__ = ("children", "names")
+
+    def __init__(self) -> None:
+        """Initializes a _Node object, without children nor entries."""
+        self.children: Dict[str, _Node] = {}
+        self.names: List[str] = []
+
+
+class PathTrie:
+    def __init__(self) -> None:
+        """Initializes an empty PathTrie object."""
+        self._root: _Node = _Node()
+        self._count = 0
+
+    @classmethod
+    def build(cls, entries: Iterable["Entry"]) -> "PathTrie":
+        """Builds the trie of the locations of many entries.
+
+        Notes:
+            Entries whose locations can't be formatted are left out.
+
+        Args:
+            entries: The entries.
+
+        Returns:
+            The trie.
+        """
+        trie: PathTrie = cls()
+        for entry in entries:
+            trie.add(entry)
+        return trie
+
+    def add(self, entry: "Entry") -> bool:
+        """Adds the locations of an entry.
+
+        Args:
+            entry: The entry.
+
+        Returns:
+            True if the entry was added, False if its locations can't be formatted.
+        """
+        try:
+            locations: List[Path] = entry.locations
+        except exceptions.FormatMapError:
+            return False
+        for location in locations:
+            node: _Node = self._root
+            for part in _parts(location):
+                node = node.children.setdefault(part, _Node())
+            if entry.name not in node.names:
+                node.names.append(entry.name)
+                self._count += 1
+        return True
+
+    def remove(self, entry: "Entry") -> None:
+        """Removes the locations of an entry, pruning the nodes left empty.
+
+        Args:
+            entry: The entry.
+
+        Returns:
+            Nothing.
+        """
+        try:
+            locations: List[Path] = entry.locations
+        except exceptions.FormatMapError:
+            return
+        for location in locations:
+            path: List[Tuple[_Node, str]] = []
+            node: Optional[_Node] = self._root
+            for part in _parts(location):
+                path.append((node, part))  # type: ignore
+                node = node.children.get(part)  # type: ignore
+                if node is None:
+                    break
+            if node is None or entry.name not in node.names:
+                continue
+            node.names.remove(entry.name)
+            self._count -= 1
+            for parent, part in reversed(path):
+                child: _Node = parent.children[part]
+                if child.names or child.children:
+                    break
+                del parent.children[part]
+
+    def owners(self, path: Path) -> List[Match]:
+        """Finds the entry names whose location is a path, or one of its parents.
+
+        Args:
+            path: The path, made absolute against the current directory if it's relative.
+
+        Returns:
+            The matches, from the deepest location to the shallowest, then by entry name.
+        """
+        parts: Tuple[str, ...] = _parts(path)
+        matches: List[Match] = []
+        node: _Node = self._root
+        for depth, part in enumerate(parts, 1):
+            child: Optional[_Node] = node.children.get(part)
+            if child is None:
+                break
+            node = child
+            location: Path = Path(*parts[:depth])
+            matches.extend(Match(name, location, depth == len(parts)) for name in node.names)
+        matches.sort(key=lambda match: (-len(match.location.parts), match.name))
+        return matches
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} object: locations={self._count}>"
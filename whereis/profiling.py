@@ -0,0 +1,271 @@
+"""Timing and profiling of the phases of where-is.
+
+The functions doing the work of a phase (loading the database, parsing json, formatting paths, probing the filesystem
+and rendering) are decorated with `timed`. When a profiler is running, every call records its wall time, and the peak
+memory allocated during it if memory is traced; otherwise the decorator only checks that no profiler is running.
+
+Phases nest (compiling the database index parses json, for example), and a phase's time includes the phases inside
+it. Phases run by many threads at once (like probing locations during a scan) add up the time of every thread.
+"""
+import contextlib
+import functools
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from cProfile import Profile
+    from rich.table import Table
+
+# When the package started being imported, for the import phase.
+_STARTED: float = time.perf_counter()
+
+IMPORT: str = "import"
+DATABASE_LOAD: str = "database load"
+JSON_PARSE: str = "json parse"
+PATH_FORMATTING: str = "path formatting"
+FILESYSTEM_STAT: str = "filesystem stat"
+RENDERING: str = "rendering"
+PHASES: List[str] = [IMPORT, DATABASE_LOAD, JSON_PARSE, PATH_FORMATTING, FILESYSTEM_STAT, RENDERING]
+
+Function = TypeVar("Function", bound=Callable[..., Any])
+
+
+class _Frame:
+    __slots__ = ("name", "start", "memory", "peak")
+
+    def __init__(self, name: str, start: float, memory: int, peak: int) -> None:
+        """Initializes a _Frame object.
+
+        Args:
+            name: The name of the phase.
+            start: When the phase started.
+            memory: The traced memory when the phase started.
+            peak: The highest traced memory seen by the phases inside this one so far.
+        """
+        self.name = name
+        self.start = start
+        self.memory = memory
+        self.peak = peak
+
+
+class Profiler:
+    def __init__(self, memory: bool = True, stats: Optional[Path] = None) -> None:
+        """Initializes a Profiler object.
+
+        Args:
+            memory: Trace the memory allocated by each phase? This slows every allocation down.
+            stats: Where to dump the cProfile stats of the whole run, if anywhere.
+        """
+        self._memory = memory
+        self._stats = stats
+        self._profile: Optional["Profile"] = None
+        self._lock: threading.Lock = threading.Lock()
+        self._local: threading.local = threading.local()
+        self._phases: Dict[str, Dict[str, float]] = {}
+        self._started: float = 0.0
+        self._elapsed: float = 0.0
+        self._peak: int = 0
+        # was tracemalloc started by this object, rather than already tracing?
+        self._tracing: bool = False
+
+    def start(self, since_import: bool = False) -> None:
+        """Starts profiling.
+
+        Args:
+            since_import: Record the time since the package started being imported as the import phase, and count it
+                in the wall time of the run?
+
+        Returns:
+            Nothing.
+        """
+        global _profiler
+
+        self._started = time.perf_counter()
+        if since_import:
+            self._record(IMPORT, self._started - _STARTED, 0)
+            self._started = _STARTED
+        if self._memory:
+            import tracemalloc
+
+            self._tracing = not tracemalloc.is_tracing()
+            tracemalloc.start()
+        if self._stats is not None:
+            from cProfile import Profile
+
+            self._profile = Profile()
+            self._profile.enable()
+        _profiler = self
+
+    def stop(self) -> None:
+        """Stops profiling, dumping the cProfile stats if asked to.
+
+        Returns:
+            Nothing.
+        """
+        global _profiler
+
+        if _profiler is self:
+            _profiler = None
+        self._elapsed = time.perf_counter() - self._started
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(str(self._stats))
+            self._profile = None
+        if self._memory:
+            import tracemalloc
+
+            if tracemalloc.is_tracing():
+                self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+                if self._tracing:
+                    tracemalloc.stop()
+
+    def _record(self, name: str, seconds: float, peak: int) -> None:
+        """Adds a call to the totals of a phase.
+
+        Args:
+            name: The name of the phase.
+            seconds: How long the call took.
+            peak: The most memory allocated during the call.
+
+        Returns:
+            Nothing.
+        """
+        with self._lock:
+            totals: Dict[str, float] = self._phases.setdefault(name, {"calls": 0, "seconds": 0.0, "peak_bytes": 0})
+            totals["calls"] += 1
+            totals["seconds"] += seconds
+            totals["peak_bytes"] = max(totals["peak_bytes"], peak)
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Records the time and peak memory of a phase.
+
+        Args:
+            name: The name of the phase.
+
+        Returns:
+            A context manager, the phase lasts as long as it.
+        """
+        stack: List[_Frame] = self._local.__dict__.setdefault("stack", [])
+        memory: int = 0
+        if self._memory:
+            import tracemalloc
+
+            memory, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            self._peak = max(self._peak, peak)
+            tracemalloc.reset_peak()
+        stack.append(_Frame(name, time.perf_counter(), memory, memory))
+        try:
+            yield
+        finally:
+            frame: _Frame = stack.pop()
+            seconds: float = time.perf_counter() - frame.start
+            peak = frame.peak
+            if self._memory:
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1].peak = max(stack[-1].peak, peak)
+                self._peak = max(self._peak, peak)
+            self._record(name, seconds, peak - frame.memory)
+
+    def report(self) -> Dict[str, Any]:
+        """Reports the totals of every phase.
+
+        Returns:
+            The wall time of the run, its peak traced memory and the calls, time and peak memory of each phase.
+        """
+        with self._lock:
+            # the known phases in their usual order, then the others by name
+            order: List[str] = [name for name in PHASES if name in self._phases]
+            order += sorted(name for name in self._phases if name not in PHASES)
+            phases: Dict[str, Dict[str, float]] = {name: dict(self._phases[name]) for name in order}
+        return {
+            "seconds": self._elapsed or time.perf_counter() - self._started,
+            "peak_bytes": self._peak if self._memory else None,
+            "phases": phases,
+        }
+
+    def table(self) -> "Table":
+        """Generates a table of the totals of every phase.
+
+        Returns:
+            A table object, usable by rich print instances.
+        """
+        from rich.table import Table
+
+        report: Dict[str, Any] = self.report()
+        table: Table = Table(title=f"[bold purple]Profile ({report['seconds'] * 1000:.1f} ms)")
+        for column in ("Phase", "Calls", "Time (ms)", "Peak memory (KiB)"):
+            table.add_column(column)
+        for name, totals in report["phases"].items():
+            table.add_row(
+                f"[magenta]{name}",
+                str(int(totals["calls"])),
+                f"{totals['seconds'] * 1000:.2f}",
+                f"{totals['peak_bytes'] / 1024:.1f}" if self._memory and name != IMPORT else "[italic]Unknown",
+            )
+        return table
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} object: phases={len(self._phases)} memory={self._memory}>"
+
+
+_profiler: Optional[Profiler] = None
+
+
+def phase(name: str) -> "contextlib.AbstractContextManager":
+    """Records the time and peak memory of a phase, if a profiler is running.
+
+    Args:
+        name: The name of the phase.
+
+    Returns:
+        A context manager, the phase lasts as long as it.
+    """
+    return _profiler.phase(name) if _profiler is not None else contextlib.nullcontext()
+
+
+def timed(name: str) -> Callable[[Function], Function]:
+    """Records every call of a function as a phase, if a profiler is running.
+
+    Args:
+        name: The name of the phase.
+
+    Returns:
+        The decorator.
+    """
+
+    def decorator(function: Function) -> Function:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _profiler is None:
+                return function(*args, **kwargs)
+            with _profiler.phase(name):
+                return function(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+@contextlib.contextmanager
+def profile(memory: bool = True, stats: Optional[Path] = None) -> Iterator[Profiler]:
+    """Profiles the code run inside it.
+
+    Args:
+        memory: Trace the memory allocated by each phase?
+        stats: Where to dump the cProfile stats, if anywhere.
+
+    Returns:
+        A context manager giving the profiler, which is stopped when it exits.
+    """
+    profiler: Profiler = Profiler(memory, stats)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
@@ -0,0 +1,63 @@
+"""Concurrent probing of the locations of many entries."""
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, NamedTuple, Optional, Set
+from whereis import exceptions, utils
+from whereis.status import LocationStatus
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from whereis.core import Entry
+
+
+class ScanResult(NamedTuple):
+    """The probed locations of an entry."""
+
+    entry: "Entry"
+    status: Dict[Path, LocationStatus]
+    error: Optional[Exception]
+
+
+def _probe(entry: "Entry") -> ScanResult:
+    """Probes every location of an entry.
+
+    Args:
+        entry: The entry.
+
+    Returns:
+        The result. If the locations can't be formatted or stat'd, the result holds the error instead.
+    """
+    try:
+        return ScanResult(entry, entry.locations_status(), None)
+    except (exceptions.FormatMapError, OSError) as error:
+        return ScanResult(entry, {}, error)
+
+
+def scan(entries: Iterable["Entry"], workers: int = utils.DEFAULT_WORKERS) -> Iterator[ScanResult]:
+    """Probes the locations of many entries concurrently.
+
+    Notes:
+        At most twice as many entries as there are workers are in flight at once, so the entries can be streamed.
+
+    Args:
+        entries: The entries.
+        workers: The number of threads probing locations.
+
+    Returns:
+        The results, in the order they complete.
+
+    Raises:
+        ValueError: If there isn't at least one worker.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+    utils.check_workers(workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: Set["Future"] = set()
+        for entry in entries:
+            pending.add(executor.submit(_probe, entry))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
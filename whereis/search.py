@@ -0,0 +1,664 @@
+"""Fuzzy search over the names and location components of entries.
+
+Every term (the lowercased entry names and the literal parts of their locations) is indexed by its trigrams. The
+trigrams are padded, so that terms starting like the query share its first trigrams: the same index answers exact,
+prefix, substring and fuzzy matches. A search counts the trigrams each term shares with the query, then scores the
+terms by descending count, and stops as soon as the remaining terms can't make it into the results.
+
+The index is compiled next to the compiled index of the database, in its `.cache` folder, so that searching doesn't
+parse every entry. Entries added or removed by this process are kept in memory on top of it until it's compiled again.
+"""
+import abc
+import heapq
+import itertools
+import re
+import struct
+import sys
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+from whereis import exceptions, utils
+from whereis.index import CACHE_FOLDER, SEARCH_NAME, Index, RawEntry, Snapshot
+
+if TYPE_CHECKING:
+    from whereis.core import Entry
+
+DEFAULT_LIMIT: int = 10
+# Results scoring less than this are left out.
+MIN_SCORE: float = 0.3
+# Matches on a location component score less than matches on the entry name.
+LOCATION_WEIGHT: float = 0.8
+
+_MAGIC: bytes = b"WHSX"
+_VERSION: int = 1
+# magic, version, byte order, folder mtime (ns), json file count, json file names checksum, entry count, term count,
+# trigram count
+_HEADER: struct.Struct = struct.Struct("<4sIIqIIIII")
+# The compiled arrays are written in the byte order of the machine, and compiled again on another one.
+_BYTE_ORDER: int = 0 if sys.byteorder == "little" else 1
+_PLACEHOLDER = re.compile(r"\{[^{}]*\}")
+
+# A term is a string in memory, and the position of the term in a compiled index.
+TermKey = Union[str, int]
+
+
+class Match(NamedTuple):
+    """The name of an entry matching a query."""
+
+    name: str
+    score: float
+    term: str
+
+
+class SearchResult(NamedTuple):
+    """An entry matching a query."""
+
+    entry: "Entry"
+    score: float
+    match: str
+
+
+def _trigrams(term: str) -> Set[str]:
+    """Splits a term into trigrams.
+
+    Args:
+        term: The term.
+
+    Returns:
+        The trigrams of the term, padded so that the start and the end of the term have trigrams of their own.
+    """
+    padded: str = f"  {term} "
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+def _component(part: str) -> str:
+    """Converts a location part to a term.
+
+    Args:
+        part: The location part.
+
+    Returns:
+        The lowercased part without placeholders or separators, which is empty if nothing is left.
+    """
+    if "{" in part:
+        part = _PLACEHOLDER.sub("", part)
+    return part.strip("/\\").lower()
+
+
+def _components(locations: Iterable[Iterable[str]], cache: Dict[str, str]) -> Set[str]:
+    """Gets the terms of the parts of locations.
+
+    Args:
+        locations: The locations, as lists of parts.
+        cache: The terms of the parts seen so far, as parts are often shared by many entries.
+
+    Returns:
+        The terms.
+    """
+    terms: Set[str] = set()
+    for location in locations:
+        for part in location:
+            term: Optional[str] = cache.get(part)
+            if term is None:
+                term = cache[part] = _component(part)
+            if term:
+                terms.add(term)
+    return terms
+
+
+def _score(query: str, term: str, shared: int, trigrams: int) -> float:
+    """Scores how well a term matches a query.
+
+    Args:
+        query: The query.
+        term: The term.
+        shared: How many trigrams the query and the term share.
+        trigrams: How many trigrams the query has.
+
+    Returns:
+        1 for an exact match, then prefix matches, substring matches and finally fuzzy matches, scored by the
+        similarity of their trigrams.
+    """
+    if term == query:
+        return 1.0
+    if term.startswith(query):
+        return 0.8 + 0.2 * len(query) / len(term)
+    if query in term:
+        return 0.6 + 0.2 * len(query) / len(term)
+    # a term has at most one trigram per character, plus one
+    return 0.8 * min(1.0, 2 * shared / (trigrams + len(term) + 1))
+
+
+def _bound(query: str, shared: int, trigrams: int) -> float:
+    """Bounds the score of the terms sharing a number of trigrams with a query.
+
+    Args:
+        query: The query.
+        shared: How many trigrams the terms share with the query.
+        trigrams: How many trigrams the query has.
+
+    Returns:
+        The highest score the terms can have.
+    """
+    if shared >= trigrams - 1:
+        return 1.0  # the terms can start with the query, sharing every trigram but the last one
+    if shared >= len({query[index : index + 3] for index in range(len(query) - 2)}):
+        return 0.8  # the terms can contain the query
+    return 0.8 * 2 * shared / (trigrams + shared)
+
+
+class _Terms(abc.ABC):
+    """Terms indexed by their trigrams, linked to the entries they come from."""
+
+    @abc.abstractmethod
+    def _count(self, trigrams: Set[str]) -> Counter:
+        """Counts the trigrams each term shares with a query.
+
+        Args:
+            trigrams: The trigrams of the query.
+
+        Returns:
+            The number of shared trigrams, keyed by term.
+        """
+
+    @abc.abstractmethod
+    def _term(self, key: TermKey) -> str:
+        """Gets a term.
+
+        Args:
+            key: The term key.
+
+        Returns:
+            The term.
+        """
+
+    @abc.abstractmethod
+    def _names(self, key: TermKey) -> Iterable[str]:
+        """Gets the entries whose lowercased name is a term.
+
+        Args:
+            key: The term key.
+
+        Returns:
+            The entry names.
+        """
+
+    @abc.abstractmethod
+    def _components(self, key: TermKey, count: int) -> Iterable[str]:
+        """Gets the first entries, by name, with a location component being a term.
+
+        Args:
+            key: The term key.
+            count: The maximum number of entries.
+
+        Returns:
+            The entry names.
+        """
+
+    def _collect(self, query: str, limit: int, excluded: Set[str], best: Dict[str, Match]) -> None:
+        """Collects the best matches of a query.
+
+        Args:
+            query: The lowercased query.
+            limit: The maximum number of results.
+            excluded: The entry names to leave out.
+            best: The best match of each entry so far, updated in place.
+
+        Returns:
+            Nothing.
+        """
+        trigrams: Set[str] = _trigrams(query)
+        threshold: float = MIN_SCORE
+        last: int = -1
+        for key, shared in self._count(trigrams).most_common():
+            if shared != last:
+                last = shared
+                if len(best) >= limit:
+                    scores: List[float] = heapq.nlargest(limit, [match.score for match in best.values()])
+                    threshold = max(MIN_SCORE, scores[-1])
+                if _bound(query, shared, len(trigrams)) < threshold:
+                    break
+            term: str = self._term(key)
+            score: float = _score(query, term, shared, len(trigrams))
+            if score < threshold:
+                continue
+            for name in self._names(key):
+                if name not in excluded and (name not in best or score > best[name].score):
+                    best[name] = Match(name, score, term)
+            score *= LOCATION_WEIGHT
+            if score < threshold:
+                continue
+            # only the first entries can make it into the results, the others rank after them with the same score
+            for name in self._components(key, limit + len(excluded)):
+                if name not in excluded and (name not in best or score > best[name].score):
+                    best[name] = Match(name, score, term)
+
+
+def _offsets(lengths: Iterable[int]) -> array:
+    """Turns lengths into offsets.
+
+    Args:
+        lengths: The lengths.
+
+    Returns:
+        The offset of each item, followed by the total length.
+    """
+    return array("I", itertools.accumulate(itertools.chain([0], lengths)))
+
+
+def _compile(snapshot: Snapshot, raw_entries: Iterable[RawEntry]) -> bytes:
+    """Compiles raw entries into the binary search index format.
+
+    Args:
+        snapshot: The snapshot of the database folder the raw entries were read from.
+        raw_entries: The raw entries, sorted by name.
+
+    Returns:
+        The compiled search index.
+
+    Raises:
+        EntryParseError: If an entry doesn't follow the json schema.
+    """
+    names: List[bytes] = []
+    term_ids: Dict[str, int] = {}
+    name_postings: List[List[int]] = []
+    component_postings: List[List[int]] = []
+    cache: Dict[str, str] = {}
+    for entry_id, raw_entry in enumerate(raw_entries):
+        try:
+            name: str = raw_entry["name"]  # type: ignore
+            terms: Set[str] = _components(raw_entry["locations"], cache)  # type: ignore
+            lowered: str = name.lower()
+        except (KeyError, TypeError, AttributeError):
+            raise exceptions.EntryParseError(f"JSON schema incorrect: {raw_entry}") from None
+        names.append(name.encode("utf-8", "surrogateescape"))
+        for term, postings in [(lowered, name_postings)] + [(term, component_postings) for term in terms]:
+            term_id: Optional[int] = term_ids.get(term)
+            if term_id is None:
+                term_id = term_ids[term] = len(term_ids)
+                name_postings.append([])
+                component_postings.append([])
+            postings[term_id].append(entry_id)
+
+    trigram_postings: Dict[str, List[int]] = {}
+    for term, term_id in term_ids.items():
+        for trigram in _trigrams(term):
+            trigram_postings.setdefault(trigram, []).append(term_id)
+    # the trigrams are looked up by binary search over their encoded form
+    trigrams: List[str] = sorted(
+        trigram_postings, key=lambda trigram: trigram.encode("utf-8", "surrogateescape")
+    )
+    trigrams_encoded: List[bytes] = [trigram.encode("utf-8", "surrogateescape") for trigram in trigrams]
+    terms_encoded: List[bytes] = [term.encode("utf-8", "surrogateescape") for term in term_ids]
+
+    arrays: List[array] = [
+        _offsets(map(len, names)),
+        _offsets(map(len, terms_encoded)),
+        _offsets(map(len, trigrams_encoded)),
+        _offsets(len(trigram_postings[trigram]) for trigram in trigrams),
+        _offsets(map(len, name_postings)),
+        _offsets(map(len, component_postings)),
+        array("I", itertools.chain.from_iterable(trigram_postings[trigram] for trigram in trigrams)),
+        array("I", itertools.chain.from_iterable(name_postings)),
+        array("I", itertools.chain.from_iterable(component_postings)),
+    ]
+    header: bytes = _HEADER.pack(
+        _MAGIC,
+        _VERSION,
+        _BYTE_ORDER,
+        snapshot.mtime_ns,
+        snapshot.file_count,
+        snapshot.checksum,
+        len(names),
+        len(term_ids),
+        len(trigrams),
+    )
+    return b"".join(
+        [header, *(values.tobytes() for values in arrays), *names, *terms_encoded, *trigrams_encoded]
+    )
+
+
+class CompiledSearch(_Terms):
+    def __init__(self, buffer: bytes) -> None:
+        """Initializes a CompiledSearch object.
+
+        Args:
+            buffer: The compiled search index.
+
+        Raises:
+            ValueError: If the buffer isn't a compiled search index, or was compiled on another machine.
+        """
+        if len(buffer) < _HEADER.size:
+            raise ValueError("Search index is truncated.")
+        magic, version, byte_order, *state, entries, terms, trigrams = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != _VERSION or byte_order != _BYTE_ORDER:
+            raise ValueError("Not a where-is search index.")
+        self._state: Tuple[int, int, int] = tuple(state)  # type: ignore
+        self._entry_count: int = entries
+        self._view: memoryview = memoryview(buffer)
+        self._position: int = _HEADER.size
+
+        self._name_offsets: memoryview = self._array(entries + 1)
+        self._term_offsets: memoryview = self._array(terms + 1)
+        self._trigram_offsets: memoryview = self._array(trigrams + 1)
+        self._trigram_postings_offsets: memoryview = self._array(trigrams + 1)
+        self._name_postings_offsets: memoryview = self._array(terms + 1)
+        self._component_postings_offsets: memoryview = self._array(terms + 1)
+        self._trigram_postings: memoryview = self._array(self._trigram_postings_offsets[-1])
+        self._name_postings: memoryview = self._array(self._name_postings_offsets[-1])
+        self._component_postings: memoryview = self._array(self._component_postings_offsets[-1])
+        self._names_blob: memoryview = self._bytes(self._name_offsets[-1])
+        self._terms_blob: memoryview = self._bytes(self._term_offsets[-1])
+        self._trigrams_blob: memoryview = self._bytes(self._trigram_offsets[-1])
+        if self._position != len(buffer):
+            raise ValueError("Search index is truncated.")
+
+    def _bytes(self, size: int) -> memoryview:
+        """Reads the next section of the buffer.
+
+        Args:
+            size: The size of the section, in bytes.
+
+        Returns:
+            The section.
+
+        Raises:
+            ValueError: If the buffer is truncated.
+        """
+        if self._position + size > len(self._view):
+            raise ValueError("Search index is truncated.")
+        section: memoryview = self._view[self._position : self._position + size]
+        self._position += size
+        return section
+
+    def _array(self, count: int) -> memoryview:
+        """Reads the next array of the buffer.
+
+        Args:
+            count: The number of items in the array.
+
+        Returns:
+            The array, as unsigned 32-bit integers.
+
+        Raises:
+            ValueError: If the buffer is truncated.
+        """
+        return self._bytes(count * 4).cast("I")
+
+    @classmethod
+    def load(cls, location: Path, index: Index) -> "CompiledSearch":
+        """Reads the search index of a database folder, compiling it first if it's missing or stale.
+
+        Notes:
+            If the search index can't be written (for example, if the database is read-only) it is kept in memory
+            only.
+
+        Args:
+            location: The database folder.
+            index: The up to date compiled index of the database.
+
+        Returns:
+            An up to date search index.
+
+        Raises:
+            EntryParseError: If an entry doesn't follow the json schema.
+        """
+        path: Path = location / CACHE_FOLDER / SEARCH_NAME
+        snapshot: Snapshot = index.snapshot
+        try:
+            compiled: CompiledSearch = cls(path.read_bytes())
+            if compiled._state == (snapshot.mtime_ns, snapshot.file_count, snapshot.checksum):
+                return compiled
+        except (OSError, ValueError):
+            pass
+
+        buffer: bytes = _compile(snapshot, index)
+        try:
+            utils.write_atomically(path, buffer)
+        except OSError:
+            pass
+        return cls(buffer)
+
+    def _find(self, trigram: str) -> Optional[int]:
+        """Looks up a trigram.
+
+        Args:
+            trigram: The trigram.
+
+        Returns:
+            The position of the trigram, or nothing if no term has it.
+        """
+        key: bytes = trigram.encode("utf-8", "surrogateescape")
+        offsets: memoryview = self._trigram_offsets
+        low, high = 0, len(offsets) - 1
+        while low < high:
+            middle: int = (low + high) // 2
+            if self._trigrams_blob[offsets[middle] : offsets[middle + 1]].tobytes() < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(offsets) - 1 and self._trigrams_blob[offsets[low] : offsets[low + 1]] == key:
+            return low
+        return None
+
+    def _count(self, trigrams: Set[str]) -> Counter:
+        counts: Counter = Counter()
+        offsets: memoryview = self._trigram_postings_offsets
+        for trigram in trigrams:
+            position: Optional[int] = self._find(trigram)
+            if position is not None:
+                counts.update(self._trigram_postings[offsets[position] : offsets[position + 1]])
+        return counts
+
+    def _term(self, key: TermKey) -> str:
+        offsets: memoryview = self._term_offsets
+        return str(self._terms_blob[offsets[key] : offsets[key + 1]], "utf-8", "surrogateescape")  # type: ignore
+
+    def _name(self, entry_id: int) -> str:
+        """Gets the name of an entry.
+
+        Args:
+            entry_id: The position of the entry.
+
+        Returns:
+            The entry name.
+        """
+        offsets: memoryview = self._name_offsets
+        return str(self._names_blob[offsets[entry_id] : offsets[entry_id + 1]], "utf-8", "surrogateescape")
+
+    def _names(self, key: TermKey) -> Iterable[str]:
+        offsets: memoryview = self._name_postings_offsets
+        return map(self._name, self._name_postings[offsets[key] : offsets[key + 1]])  # type: ignore
+
+    def _components(self, key: TermKey, count: int) -> Iterable[str]:
+        # the entries are sorted by name, so the first postings are the first entries
+        start: int = self._component_postings_offsets[key]  # type: ignore
+        end: int = min(self._component_postings_offsets[key + 1], start + count)  # type: ignore
+        return map(self._name, self._component_postings[start:end])
+
+    def __len__(self) -> int:
+        return self._entry_count
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} object: entries={self._entry_count}>"
+
+
+class SearchIndex(_Terms):
+    def __init__(self, compiled: Optional[CompiledSearch] = None, entries: Iterable["Entry"] = ()) -> None:
+        """Initializes a SearchIndex object.
+
+        Args:
+            compiled: The compiled search index the other entries are added on top of, if any.
+            entries: The entries to index in memory.
+        """
+        self._compiled = compiled
+        # the names of the compiled entries which were removed or replaced
+        self._removed: Set[str] = set()
+        self._entries: Dict[str, "Entry"] = {}
+        self._entry_names: Dict[str, List[str]] = {}
+        self._entry_components: Dict[str, Set[str]] = {}
+        self._entry_trigrams: Dict[str, Set[str]] = {}
+        self._cache: Dict[str, str] = {}
+        for entry in entries:
+            self._add(entry)
+
+    @classmethod
+    def load(cls, location: Path, index: Index) -> "SearchIndex":
+        """Loads the search index of a database folder.
+
+        Args:
+            location: The database folder.
+            index: The up to date compiled index of the database.
+
+        Returns:
+            The search index, without entries in memory.
+
+        Raises:
+            EntryParseError: If an entry doesn't follow the json schema.
+        """
+        return cls(CompiledSearch.load(location, index))
+
+    def _terms(self, entry: "Entry") -> Set[str]:
+        """Gets the location terms of an entry.
+
+        Args:
+            entry: The entry.
+
+        Returns:
+            The terms of the location parts of the entry.
+        """
+        return _components(entry.to_dict["locations"], self._cache)  # type: ignore
+
+    def _index_term(self, term: str) -> None:
+        """Adds a term to the trigram index, unless it's already indexed.
+
+        Args:
+            term: The term.
+
+        Returns:
+            Nothing.
+        """
+        if term not in self._entry_names and term not in self._entry_components:
+            for trigram in _trigrams(term):
+                self._entry_trigrams.setdefault(trigram, set()).add(term)
+
+    def _unindex_term(self, term: str) -> None:
+        """Removes a term from the trigram index, unless it's still used.
+
+        Args:
+            term: The term.
+
+        Returns:
+            Nothing.
+        """
+        if term in self._entry_names or term in self._entry_components:
+            return
+        for trigram in _trigrams(term):
+            terms: Set[str] = self._entry_trigrams[trigram]
+            terms.discard(term)
+            if not terms:
+                del self._entry_trigrams[trigram]
+
+    def _add(self, entry: "Entry") -> None:
+        """Indexes an entry which isn't indexed in memory yet.
+
+        Args:
+            entry: The entry.
+
+        Returns:
+            Nothing.
+        """
+        self._entries[entry.name] = entry
+        name: str = entry.name.lower()
+        self._index_term(name)
+        self._entry_names.setdefault(name, []).append(entry.name)
+        for term in self._terms(entry):
+            self._index_term(term)
+            self._entry_components.setdefault(term, set()).add(entry.name)
+
+    def add(self, entry: "Entry") -> None:
+        """Indexes an entry, replacing the entry with the same name.
+
+        Args:
+            entry: The entry.
+
+        Returns:
+            Nothing.
+        """
+        self.remove(entry)
+        self._add(entry)
+
+    def remove(self, entry: "Entry") -> None:
+        """Removes the entry with the same name as an entry from the index.
+
+        Args:
+            entry: The entry.
+
+        Returns:
+            Nothing.
+        """
+        if self._compiled is not None:
+            self._removed.add(entry.name)
+        indexed: Optional["Entry"] = self._entries.pop(entry.name, None)
+        if indexed is None:
+            return
+        name: str = indexed.name.lower()
+        self._entry_names[name].remove(indexed.name)
+        if not self._entry_names[name]:
+            del self._entry_names[name]
+            self._unindex_term(name)
+        for term in self._terms(indexed):
+            names: Set[str] = self._entry_components[term]
+            names.discard(indexed.name)
+            if not names:
+                del self._entry_components[term]
+                self._unindex_term(term)
+
+    def _count(self, trigrams: Set[str]) -> Counter:
+        counts: Counter = Counter()
+        for trigram in trigrams:
+            counts.update(self._entry_trigrams.get(trigram, ()))
+        return counts
+
+    def _term(self, key: TermKey) -> str:
+        return key  # type: ignore
+
+    def _names(self, key: TermKey) -> Iterable[str]:
+        return self._entry_names.get(key, ())  # type: ignore
+
+    def _components(self, key: TermKey, count: int) -> Iterable[str]:
+        names: Set[str] = self._entry_components.get(key, set())  # type: ignore
+        return names if len(names) <= count else heapq.nsmallest(count, names)
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Match]:
+        """Searches for the entries matching a query.
+
+        Args:
+            query: The query, matched against the entry names and the components of their locations.
+            limit: The maximum number of results.
+
+        Returns:
+            The best matches, sorted by descending score then by name.
+        """
+        query = query.strip().lower()
+        if not query or limit < 1:
+            return []
+        best: Dict[str, Match] = {}
+        if self._compiled is not None:
+            self._compiled._collect(query, limit, self._removed, best)
+        self._collect(query, limit, set(), best)
+        return heapq.nsmallest(limit, best.values(), key=lambda match: (-match.score, match.name))
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} object: compiled={self._compiled} entries={len(self._entries)}>"
@@ -0,0 +1,91 @@
+"""Probing the status of entry locations."""
+import errno
+import os
+import stat
+from pathlib import Path
+from typing import NamedTuple, Optional
+from whereis import profiling
+
+# The errors pathlib treats as the path not existing.
+_IGNORED_ERRNOS = (errno.ENOENT, errno.ENOTDIR, errno.EBADF, errno.ELOOP)
+_IGNORED_WINERRORS = (21, 123, 1921)
+
+
+def _stat(path: Path, follow_symlinks: bool) -> Optional[os.stat_result]:
+    """Stats a path.
+
+    Args:
+        path: The path.
+        follow_symlinks: Follow the path if it's a symlink?
+
+    Returns:
+        The stat result, or nothing if the path doesn't exist.
+
+    Raises:
+        OSError: If the path can't be stat'd for another reason than it not existing.
+    """
+    try:
+        return os.stat(path, follow_symlinks=follow_symlinks)
+    except OSError as error:
+        if (
+            error.errno in _IGNORED_ERRNOS
+            or getattr(error, "winerror", None) in _IGNORED_WINERRORS
+        ):
+            return None
+        raise
+    except ValueError:  # embedded null character
+        return None
+
+
+class LocationStatus(NamedTuple):
+    """The status of a location, from a single probe of the filesystem."""
+
+    path: Path
+    exists: bool
+    is_file: bool
+    is_dir: bool
+    is_symlink: bool
+    size: Optional[int]
+    mtime_ns: Optional[int]
+
+    @classmethod
+    @profiling.timed(profiling.FILESYSTEM_STAT)
+    def probe(cls, path: Path) -> "LocationStatus":
+        """Probes a location.
+
+        Notes:
+            The location is stat'd once, unless it's a symlink, in which case its target is stat'd as well.
+
+        Args:
+            path: The location.
+
+        Returns:
+            The status of the location. A dangling symlink doesn't exist, like with `Path.exists()`.
+
+        Raises:
+            OSError: If the location can't be stat'd for another reason than it not existing.
+        """
+        result: Optional[os.stat_result] = _stat(path, follow_symlinks=False)
+        is_symlink: bool = result is not None and stat.S_ISLNK(result.st_mode)
+        if is_symlink:
+            result = _stat(path, follow_symlinks=True)
+        if result is None:
+            return cls(path, False, False, False, is_symlink, None, None)
+        return cls(
+            path,
+            True,
+            stat.S_ISREG(result.st_mode),
+            stat.S_ISDIR(result.st_mode),
+            is_symlink,
+            result.st_size,
+            result.st_mtime_ns,
+        )
+
+    @property
+    def mtime(self) -> Optional[float]:
+        """The modification time of the location.
+
+        Returns:
+            The modification time in seconds since the epoch, or nothing if the location doesn't exist.
+        """
+        return None if self.mtime_ns is None else self.mtime_ns / 1e9
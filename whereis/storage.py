@@ -0,0 +1,989 @@
+"""How the entries of a database are stored.
+
+Three layouts are supported:
+    folder: one json file per entry, named after it. This is the default, and the layout of the packaged database.
+    journal: an append-only journal of add and remove records, compacted into a snapshot once it grows bigger than
+        the snapshot. Adding or removing an entry appends a single line instead of writing a file, and the database
+        folder only holds a few files whatever the number of entries.
+    binary: the journal layout, with the records packed by the binary codec instead of written as json lines. It's
+        smaller, but can't be edited by hand.
+
+The layout of a database is detected from its folder, a database with a journal file uses the journal layout (or the
+binary layout, depending on the journal file name).
+
+Journal records are json objects, one per line: `{"add": ENTRY}` adds (or replaces) an entry, `{"batch": [ENTRY, ...]}`
+adds many at once and `{"remove": NAME}` removes one. The snapshot holds one entry per line. In the binary layout, every
+record is a frame: the length of its payload and its kind, the payload, then the length again and the crc32 of the
+payload, so that a frame being appended is told apart from a complete one.
+
+In both layouts, writers hold an advisory lock (the `lock` file of the cache folder) while changing the database,
+and readers never lock. Files are written under a temporary name and renamed over the old ones, so a reader sees
+either the old or the new file, never half of one. Journal readers open the journal before the snapshot, and since
+replaying a journal over a snapshot it was compacted into gives the same entries, a compaction happening in between
+is harmless.
+"""
+import abc
+import contextlib
+import enum
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from whereis import codec, exceptions, profiling, utils
+from whereis.index import CACHE_FOLDER, RawEntry, Snapshot, json_files
+
+try:
+    import fcntl
+except ImportError:  # not available on windows, where writers are only serialized within a process
+    fcntl = None  # type: ignore
+
+FOLDER: str = "folder"
+JOURNAL: str = "journal"
+BINARY: str = "binary"
+STORAGES: Tuple[str, ...] = (FOLDER, JOURNAL, BINARY)
+JOURNAL_NAME: str = "journal.ndjson"
+SNAPSHOT_NAME: str = "snapshot.ndjson"
+BINARY_JOURNAL_NAME: str = "journal.bin"
+BINARY_SNAPSHOT_NAME: str = "snapshot.bin"
+LOCK_NAME: str = "lock"
+# The journal is only compacted once it's bigger than this, and bigger than the snapshot.
+COMPACT_SIZE: int = 1024 * 1024
+
+_LOCK: threading.Lock = threading.Lock()
+# the database folders whose lock each thread holds
+_held: threading.local = threading.local()
+# payload length and kind, then payload length and checksum, of the frames of the binary layout
+_FRAME_HEADER: struct.Struct = struct.Struct("<IB")
+_FRAME_FOOTER: struct.Struct = struct.Struct("<II")
+_BATCH_LENGTH: struct.Struct = struct.Struct("<I")
+_ADD: int = ord("a")
+_BATCH: int = ord("b")
+_REMOVE: int = ord("r")
+
+
+class Layout(str, enum.Enum):
+    folder = FOLDER
+    journal = JOURNAL
+    binary = BINARY
+
+
+def layout(location: Path) -> str:
+    """Detects the layout of a database folder.
+
+    Args:
+        location: The database folder.
+
+    Returns:
+        The name of the layout.
+    """
+    if (location / JOURNAL_NAME).exists():
+        return JOURNAL
+    return BINARY if (location / BINARY_JOURNAL_NAME).exists() else FOLDER
+
+
+@contextlib.contextmanager
+def lock(location: Path) -> Iterator[None]:
+    """Holds the advisory lock of a database, which writers take before changing it.
+
+    Notes:
+        The lock is reentrant within a thread, so that a writer can check the database and change it under the
+        same lock.
+
+    Args:
+        location: The database folder.
+
+    Returns:
+        A context manager, the lock is held inside it.
+    """
+    held: Set[str] = _held.__dict__.setdefault("locations", set())
+    key: str = os.path.abspath(location)
+    if key in held:
+        yield
+        return
+    path: Path = location / CACHE_FOLDER / LOCK_NAME
+    path.parent.mkdir(exist_ok=True)
+    with open(str(path), "a") as file:
+        if fcntl is None:
+            _LOCK.acquire()
+        else:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        held.add(key)
+        try:
+            yield
+        finally:
+            held.discard(key)
+            if fcntl is None:
+                _LOCK.release()
+            else:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+def _entry_name(raw_entry: RawEntry) -> str:
+    """Gets the name of a raw entry.
+
+    Args:
+        raw_entry: The raw entry.
+
+    Returns:
+        The entry name.
+
+    Raises:
+        EntryParseError: If the raw entry doesn't have a name.
+    """
+    name = raw_entry.get("name") if isinstance(raw_entry, dict) else None
+    if not isinstance(name, str):
+        raise exceptions.EntryParseError(f"JSON schema incorrect: {raw_entry}")
+    return name
+
+
+class Storage(abc.ABC):
+    name: str = ""
+    # Does the snapshot change whenever an entry is written? If not, the compiled search index is removed after writes.
+    exact: bool = False
+    # Is every entry stored by itself, so that read_direct() tells if it's stored?
+    direct: bool = False
+
+    def __init__(self, location: Path) -> None:
+        """Initializes a Storage object.
+
+        Args:
+            location: The database folder.
+        """
+        self._location = location
+
+    @property
+    def location(self) -> Path:
+        """The database folder.
+
+        Returns:
+            The database folder.
+        """
+        return self._location
+
+    def lock(self) -> ContextManager[None]:
+        """Holds the advisory lock of the database, which every write takes.
+
+        Notes:
+            No other process can change the stored entries while it's held, and writes from the same thread don't
+            wait for it.
+
+        Returns:
+            A context manager, the lock is held inside it.
+        """
+        return lock(self._location)
+
+    @abc.abstractmethod
+    def take(self) -> Snapshot:
+        """Takes a snapshot of the stored entries.
+
+        Returns:
+            The snapshot.
+
+        Raises:
+            OSError: If the database can't be read.
+        """
+
+    @abc.abstractmethod
+    def refresh(self, snapshot: Snapshot) -> Optional[Snapshot]:
+        """Checks if the stored entries are still in the state of a snapshot.
+
+        Args:
+            snapshot: The snapshot.
+
+        Returns:
+            An equivalent snapshot if they didn't change, else nothing.
+        """
+
+    @abc.abstractmethod
+    def updated(self, snapshot: Snapshot, names: Sequence[str], delta: int) -> Snapshot:
+        """The snapshot of the stored entries after this object wrote some entries at once.
+
+        Args:
+            snapshot: The snapshot before the entries were written.
+            names: The entry names.
+            delta: 1 if the entries were added, -1 if they were removed and 0 if they were overwritten.
+
+        Returns:
+            The new snapshot. If it can't be told, a snapshot which isn't up to date.
+        """
+
+    @abc.abstractmethod
+    def read(self) -> List[RawEntry]:
+        """Reads every stored entry.
+
+        Returns:
+            The raw entries.
+
+        Raises:
+            EntryParseError: If an entry can't be parsed.
+        """
+
+    def read_direct(self, name: str) -> Optional[RawEntry]:
+        """Reads an entry without reading the others, if the layout allows it.
+
+        Args:
+            name: The entry name.
+
+        Returns:
+            The raw entry, or nothing if it can't be read by itself.
+
+        Raises:
+            EntryParseError: If the entry can't be parsed.
+        """
+        return None
+
+    @abc.abstractmethod
+    def write(self, raw_entry: RawEntry) -> bool:
+        """Stores an entry.
+
+        Args:
+            raw_entry: The raw entry.
+
+        Returns:
+            True if an entry was overwritten without the database knowing it (which can happen in hand-edited
+            databases), else False.
+        """
+
+    @abc.abstractmethod
+    def write_batch(self, raw_entries: List[RawEntry]) -> bool:
+        """Stores many entries at once.
+
+        Args:
+            raw_entries: The raw entries, with distinct names.
+
+        Returns:
+            True if an entry was overwritten without the database knowing it, else False.
+        """
+
+    @abc.abstractmethod
+    def delete(self, name: str) -> None:
+        """Deletes a stored entry.
+
+        Args:
+            name: The entry name.
+
+        Returns:
+            Nothing.
+        """
+
+    @abc.abstractmethod
+    def initialize(self, raw_entries: Iterable[RawEntry]) -> None:
+        """Stores entries in this layout, in an existing database folder.
+
+        Args:
+            raw_entries: The raw entries.
+
+        Returns:
+            Nothing.
+        """
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Removes the files of this layout from the database folder.
+
+        Returns:
+            Nothing.
+        """
+
+    def compact(self) -> bool:
+        """Compacts the stored entries, if the layout needs it.
+
+        Returns:
+            True if the entries were compacted, else False.
+        """
+        return False
+
+    def close(self) -> None:
+        """Waits for the background work on the stored entries to finish.
+
+        Returns:
+            Nothing.
+        """
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} object: location={self._location}>"
+
+
+class FolderStorage(Storage):
+    name = FOLDER
+    direct = True
+
+    def __init__(self, location: Path, reader: Callable[[Path, codec.Codec], RawEntry]) -> None:
+        """Initializes a FolderStorage object.
+
+        Args:
+            location: The database folder.
+            reader: Reads a single json file into a raw entry, with a json codec.
+        """
+        super().__init__(location)
+        self._reader = reader
+
+    def take(self) -> Snapshot:
+        return Snapshot.take(self._location)
+
+    def refresh(self, snapshot: Snapshot) -> Optional[Snapshot]:
+        return snapshot.refresh(self._location)
+
+    def updated(self, snapshot: Snapshot, names: Sequence[str], delta: int) -> Snapshot:
+        return snapshot.updated(self._location, [f"{name}.json" for name in names], delta)
+
+    def read(self) -> List[RawEntry]:
+        raw_entries: List[RawEntry] = []
+        decoder: codec.Codec = codec.json_codec()
+        for name in json_files(self._location):
+            try:
+                raw_entries.append(self._reader(self._location / name, decoder))
+            except FileNotFoundError:  # removed since it was listed
+                pass
+        return raw_entries
+
+    def read_direct(self, name: str) -> Optional[RawEntry]:
+        """Reads an entry from the json file named after it.
+
+        Notes:
+            The file is decoded with the standard library json module: a single small file doesn't make up for
+            importing a faster json codec.
+
+        Args:
+            name: The entry name.
+
+        Returns:
+            The raw entry, or nothing if the file is missing or holds another entry.
+
+        Raises:
+            EntryParseError: If the entry can't be parsed.
+        """
+        if any(separator and separator in name for separator in (os.sep, os.altsep, "\0")):
+            return None
+        try:
+            raw_entry: RawEntry = self._reader(self._location / f"{name}.json", codec.JsonCodec())
+        except OSError:
+            return None
+        if not isinstance(raw_entry, dict) or raw_entry.get("name") != name:
+            return None
+        return raw_entry
+
+    def write(self, raw_entry: RawEntry) -> bool:
+        path: Path = self._location / f"{_entry_name(raw_entry)}.json"
+        data: bytes = codec.json_codec().encode(raw_entry)
+        with lock(self._location):
+            overwritten: bool = path.exists()
+            utils.write_atomically(path, data)
+        return overwritten
+
+    def write_batch(self, raw_entries: List[RawEntry]) -> bool:
+        """Stores many entries at once.
+
+        Notes:
+            Every json file is written under a temporary name first, then they're all renamed. If writing one of
+            them fails, none of the entries is stored. A crash while renaming them can still store only part of
+            them, the journal layout doesn't have that limit.
+
+        Args:
+            raw_entries: The raw entries, with distinct names.
+
+        Returns:
+            True if an entry was overwritten without the database knowing it, else False.
+        """
+        written: List[Tuple[Path, Path]] = []
+        try:
+            for raw_entry in raw_entries:
+                path: Path = self._location / f"{_entry_name(raw_entry)}.json"
+                temporary: Path = utils.temporary_path(path)
+                written.append((temporary, path))
+                temporary.write_bytes(codec.json_codec().encode(raw_entry))
+        except BaseException:
+            for temporary, _ in written:
+                try:
+                    temporary.unlink()
+                except OSError:
+                    pass
+            raise
+        with lock(self._location):
+            overwritten: bool = any(path.exists() for _, path in written)
+            for temporary, path in written:
+                os.replace(str(temporary), str(path))
+        return overwritten
+
+    def delete(self, name: str) -> None:
+        with lock(self._location):
+            (self._location / f"{name}.json").unlink()
+
+    def initialize(self, raw_entries: Iterable[RawEntry]) -> None:
+        for raw_entry in raw_entries:
+            self.write(raw_entry)
+
+    def clear(self) -> None:
+        with lock(self._location):
+            for name in json_files(self._location):
+                (self._location / name).unlink()
+
+
+class JournalStorage(Storage):
+    name = JOURNAL
+    exact = True
+    journal_name: str = JOURNAL_NAME
+    snapshot_name: str = SNAPSHOT_NAME
+
+    def __init__(self, location: Path) -> None:
+        """Initializes a JournalStorage object.
+
+        Args:
+            location: The database folder.
+        """
+        super().__init__(location)
+        self._codec: codec.Codec = codec.json_codec()
+        self._journal: Path = location / self.journal_name
+        self._snapshot: Path = location / self.snapshot_name
+        self._last: Optional[Tuple[Snapshot, Snapshot]] = None
+        self._compactor: Optional[threading.Thread] = None
+
+    def take(self) -> Snapshot:
+        """Takes a snapshot of the stored entries.
+
+        Notes:
+            The journal only grows between compactions, so its size tells if a record was appended. Compactions
+            replace both files, which is told by their inodes.
+
+        Returns:
+            The snapshot.
+
+        Raises:
+            OSError: If the journal can't be stat'd.
+        """
+        taken_ns: int = time.time_ns()
+        journal: os.stat_result = os.stat(self._journal)
+        try:
+            stat: os.stat_result = os.stat(self._snapshot)
+            snapshot: Tuple[int, int, int] = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            snapshot = (0, 0, 0)
+        checksum: int = zlib.crc32(f"{journal.st_ino}:{snapshot}".encode())
+        return Snapshot(journal.st_mtime_ns, taken_ns, journal.st_size & 0xFFFFFFFF, checksum)
+
+    def refresh(self, snapshot: Snapshot) -> Optional[Snapshot]:
+        try:
+            current: Snapshot = self.take()
+        except OSError:
+            return None
+        if (current.mtime_ns, current.file_count, current.checksum) != (
+            snapshot.mtime_ns,
+            snapshot.file_count,
+            snapshot.checksum,
+        ):
+            return None
+        return current
+
+    def updated(self, snapshot: Snapshot, names: Sequence[str], delta: int) -> Snapshot:
+        """The snapshot of the stored entries after this object appended a single record.
+
+        Notes:
+            The snapshots of the journal right before and after the last append are remembered, so if another
+            process appended a record before it, the given snapshot doesn't match and is returned as is.
+
+        Args:
+            snapshot: The snapshot before the record was appended.
+            names: The entry names.
+            delta: 1 if the entries were added, -1 if they were removed and 0 if they were overwritten.
+
+        Returns:
+            The new snapshot, or the given one if it wasn't up to date before the append.
+        """
+        if self._last is None:
+            return snapshot
+        before, after = self._last
+        if (before.mtime_ns, before.file_count, before.checksum) != (
+            snapshot.mtime_ns,
+            snapshot.file_count,
+            snapshot.checksum,
+        ):
+            return snapshot
+        return after
+
+    @profiling.timed(profiling.JSON_PARSE)
+    def _parse(self, data: bytes, path: Path, number: int) -> Dict[str, RawEntry]:
+        """Parses a line of the journal or the snapshot.
+
+        Args:
+            data: The line.
+            path: The file the line is from.
+            number: The line number.
+
+        Returns:
+            The json object.
+
+        Raises:
+            EntryParseError: If the line isn't a json object.
+        """
+        try:
+            record = self._codec.decode(data)
+        except ValueError as error:
+            raise exceptions.EntryParseError(f"Error parsing '{path}' line {number}: {error}") from None
+        if not isinstance(record, dict):
+            raise exceptions.EntryParseError(f"Error parsing '{path}' line {number}: not a json object")
+        return record
+
+    def _snapshot_entries(self, file: BinaryIO) -> Iterator[RawEntry]:
+        """Parses the entries of the snapshot.
+
+        Args:
+            file: The snapshot file.
+
+        Returns:
+            The raw entries.
+
+        Raises:
+            EntryParseError: If a line can't be parsed.
+        """
+        for number, line in enumerate(file, 1):
+            yield self._parse(line, self._snapshot, number)
+
+    def _journal_records(self, file: BinaryIO) -> Iterator[Dict[str, RawEntry]]:
+        """Parses the records of the journal.
+
+        Notes:
+            A last line without a line break is a record being appended (or whose writer crashed), it is ignored.
+
+        Args:
+            file: The journal file.
+
+        Returns:
+            The records.
+
+        Raises:
+            EntryParseError: If a line can't be parsed.
+        """
+        for number, line in enumerate(file, 1):
+            if not line.endswith(b"\n"):
+                break
+            yield self._parse(line, self._journal, number)
+
+    def _encode(self, record: Dict[str, RawEntry]) -> bytes:
+        """Encodes a journal record.
+
+        Args:
+            record: The record.
+
+        Returns:
+            The line of the record.
+        """
+        return self._codec.encode(record) + b"\n"
+
+    def _encode_entry(self, raw_entry: RawEntry) -> bytes:
+        """Encodes an entry of the snapshot.
+
+        Args:
+            raw_entry: The raw entry.
+
+        Returns:
+            The line of the entry.
+        """
+        return self._codec.encode(raw_entry) + b"\n"
+
+    def read(self) -> List[RawEntry]:
+        """Reads every stored entry, replaying the journal over the snapshot.
+
+        Notes:
+            A record that isn't completely written is being appended (or its writer crashed), it is ignored.
+
+        Returns:
+            The raw entries.
+
+        Raises:
+            EntryParseError: If a record can't be parsed.
+        """
+        entries: Dict[str, RawEntry] = {}
+        with open(str(self._journal), "rb") as journal:  # before the snapshot, see the module docstring
+            try:
+                with open(str(self._snapshot), "rb") as snapshot:
+                    for raw_entry in self._snapshot_entries(snapshot):
+                        entries[_entry_name(raw_entry)] = raw_entry
+            except FileNotFoundError:
+                pass
+            for record in self._journal_records(journal):
+                if "add" in record:
+                    entries[_entry_name(record["add"])] = record["add"]
+                elif isinstance(record.get("batch"), list):
+                    for raw_entry in record["batch"]:  # type: ignore
+                        entries[_entry_name(raw_entry)] = raw_entry
+                elif isinstance(record.get("remove"), str):
+                    entries.pop(record["remove"], None)  # type: ignore
+                else:
+                    raise exceptions.EntryParseError(f"Unknown journal record: {record}")
+        return list(entries.values())
+
+    def _append(self, record: Dict[str, RawEntry]) -> None:
+        """Appends a record to the journal, then compacts it in the background if it grew too big.
+
+        Notes:
+            A last record left incomplete by a writer that crashed is truncated first.
+
+        Args:
+            record: The record.
+
+        Returns:
+            Nothing.
+        """
+        data: bytes = self._encode(record)
+        with lock(self._location):
+            before: Snapshot = self.take()
+            descriptor: int = os.open(str(self._journal), os.O_RDWR | os.O_APPEND)
+            try:
+                size: int = os.fstat(descriptor).st_size
+                end: int = self._complete_end(descriptor, size)
+                if end != size:
+                    os.ftruncate(descriptor, end)
+                while data:
+                    data = data[os.write(descriptor, data) :]
+            finally:
+                os.close(descriptor)
+            self._last = (before, self.take())
+        if self._needs_compaction():
+            self._compact_in_background()
+
+    def _complete_end(self, descriptor: int, size: int) -> int:
+        """Finds the end of the last complete line of the journal.
+
+        Args:
+            descriptor: The journal file descriptor.
+            size: The journal size.
+
+        Returns:
+            The offset right after the last line break, or 0 if there isn't any.
+        """
+        position: int = size
+        while position > 0:
+            start: int = max(0, position - 4096)
+            os.lseek(descriptor, start, os.SEEK_SET)
+            chunk: bytes = os.read(descriptor, position - start)
+            if position == size and chunk.endswith(b"\n"):
+                return size
+            newline: int = chunk.rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            position = start
+        return 0
+
+    def _needs_compaction(self) -> bool:
+        """Has the journal grown enough to be compacted?
+
+        Returns:
+            True if the journal is bigger than the compaction size and the snapshot, else False.
+        """
+        try:
+            journal_size: int = os.stat(self._journal).st_size
+            snapshot_size: int = os.stat(self._snapshot).st_size if self._snapshot.exists() else 0
+        except OSError:
+            return False
+        return journal_size > max(COMPACT_SIZE, snapshot_size)
+
+    def _compact_in_background(self) -> None:
+        """Compacts the journal in a thread, unless a compaction is already running.
+
+        Notes:
+            The thread isn't a daemon thread, so the process waits for the compaction to finish before exiting.
+
+        Returns:
+            Nothing.
+        """
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self._compact_quietly)
+        self._compactor.start()
+
+    def _compact_quietly(self) -> None:
+        """Compacts the journal, leaving it as is if that fails so that the next append tries again.
+
+        Returns:
+            Nothing.
+        """
+        try:
+            self.compact()
+        except (OSError, exceptions.EntryParseError):
+            pass
+
+    def _write_snapshot(self, raw_entries: Iterable[RawEntry]) -> None:
+        """Writes the snapshot, through a temporary file.
+
+        Args:
+            raw_entries: The raw entries.
+
+        Returns:
+            Nothing.
+        """
+        temporary: Path = utils.temporary_path(self._snapshot)
+        try:
+            with open(str(temporary), "wb") as file:
+                for raw_entry in sorted(raw_entries, key=_entry_name):
+                    file.write(self._encode_entry(raw_entry))
+            os.replace(str(temporary), str(self._snapshot))
+        except BaseException:
+            try:
+                temporary.unlink()
+            except OSError:
+                pass
+            raise
+
+    def _reset_journal(self) -> None:
+        """Replaces the journal with an empty one.
+
+        Returns:
+            Nothing.
+        """
+        utils.write_atomically(self._journal, b"")
+
+    def compact(self) -> bool:
+        """Compacts the journal into the snapshot.
+
+        Notes:
+            The snapshot is replaced before the journal, so readers never miss records.
+
+        Returns:
+            True.
+
+        Raises:
+            EntryParseError: If the journal or the snapshot can't be parsed.
+        """
+        with lock(self._location):
+            self._write_snapshot(self.read())
+            self._reset_journal()
+        return True
+
+    def write(self, raw_entry: RawEntry) -> bool:
+        self._append({"add": raw_entry})
+        return False
+
+    def write_batch(self, raw_entries: List[RawEntry]) -> bool:
+        """Stores many entries at once, in a single journal record.
+
+        Notes:
+            Readers ignore a record that isn't completely written, so either all the entries are stored or none.
+
+        Args:
+            raw_entries: The raw entries, with distinct names.
+
+        Returns:
+            False, entries can't be overwritten without the database knowing it.
+        """
+        for raw_entry in raw_entries:
+            _entry_name(raw_entry)
+        self._append({"batch": raw_entries})  # type: ignore
+        return False
+
+    def delete(self, name: str) -> None:
+        self._append({"remove": name})
+
+    def initialize(self, raw_entries: Iterable[RawEntry]) -> None:
+        """Stores entries in the journal layout, in an existing database folder.
+
+        Notes:
+            The journal is created last, so the folder only switches to the journal layout once the snapshot is
+            complete.
+
+        Args:
+            raw_entries: The raw entries.
+
+        Returns:
+            Nothing.
+        """
+        with lock(self._location):
+            self._write_snapshot(raw_entries)
+            self._reset_journal()
+
+    def clear(self) -> None:
+        """Removes the journal and the snapshot.
+
+        Notes:
+            The journal is removed first, so the folder switches out of the journal layout before the snapshot is
+            removed.
+
+        Returns:
+            Nothing.
+        """
+        self.close()
+        for path in (self._journal, self._snapshot):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def close(self) -> None:
+        if self._compactor is not None:
+            self._compactor.join()
+
+
+def _frame(kind: int, payload: bytes) -> bytes:
+    """Frames a record of the binary layout.
+
+    Args:
+        kind: The kind of the record.
+        payload: The payload.
+
+    Returns:
+        The frame.
+    """
+    return (
+        _FRAME_HEADER.pack(len(payload), kind)
+        + payload
+        + _FRAME_FOOTER.pack(len(payload), zlib.crc32(payload))
+    )
+
+
+def _frames(data: bytes) -> Iterator[Tuple[int, bytes, int]]:
+    """Parses the frames of a file of the binary layout.
+
+    Args:
+        data: The file content.
+
+    Returns:
+        The kind, payload and end of every complete frame. The last frame is left out if it isn't complete.
+
+    Raises:
+        ValueError: If a frame is complete but its checksum doesn't match.
+    """
+    offset: int = 0
+    while offset + _FRAME_HEADER.size + _FRAME_FOOTER.size <= len(data):
+        length, kind = _FRAME_HEADER.unpack_from(data, offset)
+        start: int = offset + _FRAME_HEADER.size
+        end: int = start + length + _FRAME_FOOTER.size
+        if end > len(data):
+            return
+        payload: bytes = data[start : start + length]
+        if _FRAME_FOOTER.unpack_from(data, start + length) != (length, zlib.crc32(payload)):
+            raise ValueError(f"corrupted frame at offset {offset}")
+        yield kind, payload, end
+        offset = end
+
+
+class BinaryStorage(JournalStorage):
+    name = BINARY
+    journal_name = BINARY_JOURNAL_NAME
+    snapshot_name = BINARY_SNAPSHOT_NAME
+
+    def __init__(self, location: Path) -> None:
+        """Initializes a BinaryStorage object.
+
+        Args:
+            location: The database folder.
+        """
+        super().__init__(location)
+        self._codec = codec.BinaryCodec()
+
+    def _read_frames(self, file: BinaryIO, path: Path, complete: bool) -> Iterator[Tuple[int, int, bytes]]:
+        """Parses the frames of the journal or the snapshot.
+
+        Args:
+            file: The file.
+            path: Where the file is.
+            complete: Should the last frame be complete?
+
+        Returns:
+            The number, kind and payload of every complete frame.
+
+        Raises:
+            EntryParseError: If a frame is corrupted, or if the last one isn't complete when it should be.
+        """
+        data: bytes = file.read()
+        end: int = 0
+        try:
+            for number, (kind, payload, end) in enumerate(_frames(data), 1):
+                yield number, kind, payload
+        except ValueError as error:
+            raise exceptions.EntryParseError(f"Error parsing '{path}': {error}") from None
+        if complete and end != len(data):
+            raise exceptions.EntryParseError(f"Error parsing '{path}': truncated frame at offset {end}")
+
+    def _snapshot_entries(self, file: BinaryIO) -> Iterator[RawEntry]:
+        for number, kind, payload in self._read_frames(file, self._snapshot, True):
+            if kind != _ADD:
+                raise exceptions.EntryParseError(f"Error parsing '{self._snapshot}' line {number}: not an entry")
+            yield self._parse(payload, self._snapshot, number)
+
+    def _journal_records(self, file: BinaryIO) -> Iterator[Dict[str, RawEntry]]:
+        for number, kind, payload in self._read_frames(file, self._journal, False):
+            if kind == _ADD:
+                yield {"add": self._parse(payload, self._journal, number)}
+            elif kind == _BATCH:
+                batch: List[RawEntry] = []
+                offset: int = 0
+                while offset < len(payload):
+                    (length,) = _BATCH_LENGTH.unpack_from(payload, offset)
+                    offset += _BATCH_LENGTH.size + length
+                    batch.append(self._parse(payload[offset - length : offset], self._journal, number))
+                yield {"batch": batch}  # type: ignore
+            elif kind == _REMOVE:
+                yield {"remove": payload.decode("utf-8", "surrogatepass")}  # type: ignore
+            else:
+                raise exceptions.EntryParseError(f"Unknown journal record kind: {kind}")
+
+    def _encode(self, record: Dict[str, RawEntry]) -> bytes:
+        if "add" in record:
+            return _frame(_ADD, self._codec.encode(record["add"]))
+        if "batch" in record:
+            encoded: List[bytes] = [self._codec.encode(raw_entry) for raw_entry in record["batch"]]  # type: ignore
+            return _frame(_BATCH, b"".join(_BATCH_LENGTH.pack(len(data)) + data for data in encoded))
+        return _frame(_REMOVE, record["remove"].encode("utf-8", "surrogatepass"))  # type: ignore
+
+    def _encode_entry(self, raw_entry: RawEntry) -> bytes:
+        return _frame(_ADD, self._codec.encode(raw_entry))
+
+    def _complete_end(self, descriptor: int, size: int) -> int:
+        """Finds the end of the last complete frame of the journal.
+
+        Notes:
+            The last frame is checked from its footer, the journal is only read from the start if it isn't complete.
+
+        Args:
+            descriptor: The journal file descriptor.
+            size: The journal size.
+
+        Returns:
+            The offset right after the last complete frame, or the size if a frame is corrupted (so that nothing is
+            truncated, and readers raise an error).
+        """
+        if size >= _FRAME_HEADER.size + _FRAME_FOOTER.size:
+            os.lseek(descriptor, size - _FRAME_FOOTER.size, os.SEEK_SET)
+            length, checksum = _FRAME_FOOTER.unpack(os.read(descriptor, _FRAME_FOOTER.size))
+            start: int = size - _FRAME_FOOTER.size - length - _FRAME_HEADER.size
+            if start >= 0:
+                os.lseek(descriptor, start, os.SEEK_SET)
+                frame: bytes = os.read(descriptor, _FRAME_HEADER.size + length)
+                if (
+                    _FRAME_HEADER.unpack_from(frame)[0] == length
+                    and zlib.crc32(frame[_FRAME_HEADER.size :]) == checksum
+                ):
+                    return size
+        os.lseek(descriptor, 0, os.SEEK_SET)
+        end: int = 0
+        try:
+            for _, _, end in _frames(os.read(descriptor, size)):
+                pass
+        except ValueError:
+            return size
+        return end
+
+
+def open_storage(name: str, location: Path, reader: Callable[[Path, codec.Codec], RawEntry]) -> Storage:
+    """Opens the storage of a database in a layout.
+
+    Args:
+        name: The name of the layout.
+        location: The database folder.
+        reader: Reads a single json file into a raw entry with a json codec, for the folder layout.
+
+    Returns:
+        The storage.
+
+    Raises:
+        StorageError: If there isn't a layout with that name.
+    """
+    if name == FOLDER:
+        return FolderStorage(location, reader)
+    if name == JOURNAL:
+        return JournalStorage(location)
+    if name == BINARY:
+        return BinaryStorage(location)
+    raise exceptions.StorageError(f"Unknown storage '{name}', it can be one of: {', '.join(STORAGES)}.")
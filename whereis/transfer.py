@@ -0,0 +1,170 @@
+"""Streaming import and export of entries.
+
+Entries are imported from either a json array of entries or ndjson (one entry per line). The file is parsed one
+entry at a time, so importing a catalog doesn't need to hold it in memory. Exported entries are written one at a
+time too, in the same formats.
+"""
+import json
+import re
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Pattern, TextIO
+from whereis import exceptions
+from whereis.index import RawEntry
+from whereis.output import ENTRY_COLUMNS, Format, RecordWriter
+
+if TYPE_CHECKING:
+    from whereis.core import Entry
+
+# How many characters are read from the file at once.
+CHUNK_SIZE: int = 64 * 1024
+# How many entries are written at once by Database.bulk_add().
+DEFAULT_BATCH: int = 1000
+
+_WHITESPACE: Pattern = re.compile(r"[ \t\n\r﻿]*")
+
+
+def _array(file: TextIO, buffer: str, name: str) -> Iterator[RawEntry]:
+    """Parses the items of a json array one at a time.
+
+    Args:
+        file: The file, read past the beginning of the buffer.
+        buffer: What has been read from the file, starting with the '[' of the array.
+        name: The name of the file, for errors.
+
+    Returns:
+        The items.
+
+    Raises:
+        EntryParseError: If the array isn't valid json.
+    """
+    decoder: json.JSONDecoder = json.JSONDecoder()
+    position: int = 1
+    eof: bool = False
+    separator: bool = False  # is a ',' or a ']' expected next?
+    empty: bool = True
+    while True:
+        position = _WHITESPACE.match(buffer, position).end()  # type: ignore
+        if position < len(buffer):
+            character: str = buffer[position]
+            if character == "]" and (separator or empty):
+                return
+            if separator:
+                if character != ",":
+                    raise exceptions.EntryParseError(
+                        f"Error parsing '{name}': expected ',' or ']' instead of {character!r}"
+                    )
+                position, separator = position + 1, False
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                # a value touching the end of the buffer (like a number) may go on in the next chunk
+                complete: bool = end < len(buffer) or eof
+            except ValueError as error:
+                if eof:
+                    raise exceptions.EntryParseError(f"Error parsing '{name}': {error}") from None
+                complete = False
+            if complete:
+                yield item
+                position, separator, empty = end, True, False
+                continue
+        elif eof:
+            raise exceptions.EntryParseError(f"Error parsing '{name}': the array isn't closed")
+        chunk: str = file.read(CHUNK_SIZE)
+        eof = not chunk
+        buffer, position = buffer[position:] + chunk, 0
+
+
+def _lines(file: TextIO, buffer: str, name: str) -> Iterator[RawEntry]:
+    """Parses ndjson one line at a time.
+
+    Args:
+        file: The file, read past the beginning of the buffer.
+        buffer: What has been read from the file.
+        name: The name of the file, for errors.
+
+    Returns:
+        The object on each line, blank lines are skipped.
+
+    Raises:
+        EntryParseError: If a line isn't valid json.
+    """
+    lines: List[str] = buffer.splitlines(keepends=True)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += file.readline()
+    for number, line in enumerate(_chain(lines, file), 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                raise exceptions.EntryParseError(f"Error parsing '{name}' line {number}: {error}") from None
+
+
+def _chain(lines: List[str], file: TextIO) -> Iterator[str]:
+    """Iterates over lines already read, then over the rest of the file.
+
+    Args:
+        lines: The lines already read.
+        file: The file.
+
+    Returns:
+        The lines.
+    """
+    yield from lines
+    yield from file
+
+
+def read_entries(file: TextIO, name: str = "<stdin>") -> Iterator["Entry"]:
+    """Parses the entries of a json array or of ndjson, one at a time.
+
+    Args:
+        file: The file.
+        name: The name of the file, for errors.
+
+    Returns:
+        The entries.
+
+    Raises:
+        EntryParseError: If the file isn't a json array or ndjson, or if an entry doesn't follow the json schema.
+    """
+    from whereis.core import Entry
+
+    buffer: str = file.read(CHUNK_SIZE)
+    start: int = _WHITESPACE.match(buffer).end()  # type: ignore
+    while start == len(buffer):
+        chunk: str = file.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        buffer = buffer[start:] + chunk
+        start = _WHITESPACE.match(buffer).end()  # type: ignore
+    buffer = buffer[start:]
+    if buffer.startswith("["):
+        raw_entries: Iterator[RawEntry] = _array(file, buffer, name)
+    elif buffer.startswith("{"):
+        raw_entries = _lines(file, buffer, name)
+    else:
+        raise exceptions.EntryParseError(f"Error parsing '{name}': not a json array nor ndjson")
+    for raw_entry in raw_entries:
+        yield Entry.from_dict(raw_entry)
+
+
+def write_entries(entries: Iterable["Entry"], file: TextIO, format_: Format = Format.json) -> int:
+    """Writes entries one at a time.
+
+    Args:
+        entries: The entries.
+        file: The file.
+        format_: The output format, either json (an array) or ndjson.
+
+    Returns:
+        The number of entries written.
+
+    Raises:
+        ValueError: If the format is neither json nor ndjson.
+    """
+    if format_ not in (Format.json, Format.ndjson):
+        raise ValueError("Entries can only be written as json or ndjson.")
+    count: int = 0
+    with RecordWriter(format_, ENTRY_COLUMNS, file) as writer:
+        for entry in entries:
+            writer.write(entry.to_dict)
+            count += 1
+    return count
@@ -1,8 +1,31 @@
 """Some useful utilities to be used by where-is."""
 from pathlib import Path
 import platform
-from typing import Dict
+from typing import Callable, Dict
+import functools
 import os
+import threading
+
+# The default number of threads of the commands working on many files at once.
+DEFAULT_WORKERS: int = 16
+# Files and folders modified this close to the time they were read may have changed again within the same mtime tick.
+RACY_NS: int = 2_000_000_000
+
+
+def check_workers(workers: int) -> None:
+    """Checks a number of threads given to a command.
+
+    Args:
+        workers: The number of threads.
+
+    Returns:
+        Nothing.
+
+    Raises:
+        ValueError: If there isn't at least one worker.
+    """
+    if workers < 1:
+        raise ValueError("There must be at least one worker.")
 
 
 def config_folder(system: str = platform.system()) -> Path:
@@ -15,13 +38,85 @@ def config_folder(system: str = platform.system()) -> Path:
         A path object that points to where a config folder is
         (if system is not in Linux, Mac, Windows it will default to Linux)
     """
-    switch_case: Dict[str, Path] = {
-        "Linux": Path().home() / ".config" / "where-is",
-        "Mac": Path().home() / "Library" / "Preferences" / "where-is",
-        "Windows": Path(
+    switch_case: Dict[str, Callable[[], Path]] = {
+        "Linux": lambda: Path().home() / ".config" / "where-is",
+        "Mac": lambda: Path().home() / "Library" / "Preferences" / "where-is",
+        "Windows": lambda: Path(
             str(os.getenv("APPDATA"))  # in case the os is other than windows
         )
         / "where-is",
     }
 
-    return switch_case.get(system, switch_case["Linux"])
+    return switch_case.get(system, switch_case["Linux"])()
+
+
+class _FormatMap(dict):
+    """A format map that resolves '{ENV:NAME}' placeholders on first use."""
+
+    def __missing__(self, key: str) -> Path:
+        if not key.startswith("ENV:") or key[4:] not in os.environ:
+            raise KeyError(key)
+        value: Path = Path(os.environ[key[4:]])
+        self[key] = value
+        return value
+
+
+@functools.lru_cache(maxsize=None)
+def format_map() -> Dict[str, Path]:
+    """Gets the format map used to format entry locations.
+
+    Notes:
+        The format map is resolved once per process, call `format_map.cache_clear()` to resolve it again.
+
+    Returns:
+        A dictionary of placeholder names and the paths they are replaced with.
+    """
+    home: Path = Path().home()
+    whereis_config: Path = config_folder()
+    xdg_config_home: Path = Path(os.getenv("XDG_CONFIG_HOME") or home / ".config")
+    return _FormatMap(
+        {
+            "HOME": home,
+            "WHEREIS_CONFIG": whereis_config,
+            "CONFIG_FOLDER": whereis_config.parent,
+            "XDG_CONFIG_HOME": xdg_config_home if xdg_config_home.is_absolute() else home / ".config",
+        }
+    )
+
+
+def temporary_path(path: Path) -> Path:
+    """Gets a temporary file next to a path, unique to the calling process and thread.
+
+    Args:
+        path: The path.
+
+    Returns:
+        The temporary file, hidden and ending in '.tmp'.
+    """
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def write_atomically(path: Path, data: bytes) -> None:
+    """Writes a file through a temporary file renamed over it, so readers see either the old or the new file.
+
+    Args:
+        path: The file.
+        data: The content of the file.
+
+    Returns:
+        Nothing.
+
+    Raises:
+        OSError: If the file can't be written, the temporary file is removed first.
+    """
+    temporary: Path = temporary_path(path)
+    try:
+        with open(str(temporary), "wb") as file:
+            file.write(data)
+        os.replace(str(temporary), str(path))
+    except BaseException:
+        try:
+            temporary.unlink()
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,548 @@
+"""Watching the locations of entries for changes.
+
+A watcher probes every location once, then waits for the filesystem to change and probes the locations again to tell
+which were created, modified or deleted. Only the status of the locations themselves is compared (a folder is
+modified when files are added to it or removed from it, not when a file inside it is written to), like `find` shows.
+
+Two backends tell the watcher what to probe again:
+    inotify (linux): every folder holding a location is watched once, however many locations it holds, as well as
+        the locations that are folders. A missing folder is replaced by its closest existing parent until it's
+        created. Only the locations an event is about are probed again. If inotify runs out of watches, the
+        locations whose folder isn't watched are polled.
+    poll (everywhere else, or if inotify can't be used): every location is probed again after an interval, which is
+        doubled each time nothing changed, up to a maximum, and goes back to the minimum once something changes.
+"""
+import errno
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+from whereis.status import LocationStatus
+
+if TYPE_CHECKING:
+    from whereis.core import Entry
+
+CREATED: str = "created"
+MODIFIED: str = "modified"
+DELETED: str = "deleted"
+
+INOTIFY: str = "inotify"
+POLL: str = "poll"
+
+DEFAULT_INTERVAL: float = 0.5
+DEFAULT_MAX_INTERVAL: float = 8.0
+
+_IN_MODIFY: int = 0x2
+_IN_ATTRIB: int = 0x4
+_IN_CLOSE_WRITE: int = 0x8
+_IN_MOVED_FROM: int = 0x40
+_IN_MOVED_TO: int = 0x80
+_IN_CREATE: int = 0x100
+_IN_DELETE: int = 0x200
+_IN_DELETE_SELF: int = 0x400
+_IN_MOVE_SELF: int = 0x800
+_IN_Q_OVERFLOW: int = 0x4000
+_IN_IGNORED: int = 0x8000
+_IN_ONLYDIR: int = 0x1000000
+_IN_ISDIR: int = 0x40000000
+_IN_NONBLOCK: int = 0o4000
+_IN_CLOEXEC: int = 0o2000000
+_WATCH_MASK: int = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+)
+# the events changing which folders exist, after which the watched folders are picked again
+_REARM_MASK: int = _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO
+_SELF_MASK: int = _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED
+# watch descriptor, mask, cookie and name length of an inotify event
+_EVENT: struct.Struct = struct.Struct("iIII")
+
+
+class Event(NamedTuple):
+    """A change of a location."""
+
+    kind: str
+    path: Path
+    names: Tuple[str, ...]
+
+
+def _changed(old: LocationStatus, new: LocationStatus) -> Optional[str]:
+    """Compares two probes of a location.
+
+    Args:
+        old: The previous status.
+        new: The current status.
+
+    Returns:
+        The kind of change, or nothing if the location didn't change.
+    """
+    if not old.exists:
+        return CREATED if new.exists else None
+    if not new.exists:
+        return DELETED
+    if (old.is_file, old.is_dir, old.is_symlink, old.size, old.mtime_ns) != (
+        new.is_file,
+        new.is_dir,
+        new.is_symlink,
+        new.size,
+        new.mtime_ns,
+    ):
+        return MODIFIED
+    return None
+
+
+def _probe(path: Path) -> LocationStatus:
+    """Probes a location, treating a location that can't be stat'd as missing.
+
+    Args:
+        path: The location.
+
+    Returns:
+        The status of the location.
+    """
+    try:
+        return LocationStatus.probe(path)
+    except OSError:
+        return LocationStatus(path, False, False, False, False, None, None)
+
+
+class _Inotify:
+    def __init__(self) -> None:
+        """Initializes an _Inotify object.
+
+        Raises:
+            OSError: If inotify isn't available.
+        """
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify isn't available.")
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._fd: int = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            code: int = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        # written to by wake(), so that a read waiting for events returns
+        self._wake_fds: Tuple[int, int] = os.pipe()
+
+    def add(self, path: Path) -> int:
+        """Watches a folder.
+
+        Args:
+            path: The folder.
+
+        Returns:
+            The watch descriptor, the same one if the folder is already watched.
+
+        Raises:
+            OSError: If the folder can't be watched.
+        """
+        import ctypes
+
+        descriptor: int = self._libc.inotify_add_watch(self._fd, os.fsencode(str(path)), _WATCH_MASK)
+        if descriptor < 0:
+            code: int = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), str(path))
+        return descriptor
+
+    def remove(self, descriptor: int) -> None:
+        """Stops watching a folder.
+
+        Args:
+            descriptor: The watch descriptor.
+
+        Returns:
+            Nothing.
+        """
+        self._libc.inotify_rm_watch(self._fd, descriptor)
+
+    def read(self, timeout: Optional[float]) -> List[Tuple[int, int, str]]:
+        """Waits for events.
+
+        Args:
+            timeout: How long to wait for the first event, in seconds. Nothing waits forever.
+
+        Returns:
+            The watch descriptor, mask and name of every event read, nothing if none came in time or if woken.
+        """
+        readable, _, _ = select.select([self._fd, self._wake_fds[0]], [], [], timeout)
+        if not readable or self._wake_fds[0] in readable:
+            return []
+        try:
+            data: bytes = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events: List[Tuple[int, int, str]] = []
+        offset: int = 0
+        while offset + _EVENT.size <= len(data):
+            descriptor, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size + length
+            events.append((descriptor, mask, os.fsdecode(data[offset - length : offset].rstrip(b"\0"))))
+        return events
+
+    def wake(self) -> None:
+        """Makes a read waiting for events, or the next one, return right away.
+
+        Returns:
+            Nothing.
+        """
+        os.write(self._wake_fds[1], b"\0")
+
+    def close(self) -> None:
+        """Closes the inotify instance, removing every watch.
+
+        Returns:
+            Nothing.
+        """
+        os.close(self._fd)
+        for fd in self._wake_fds:
+            os.close(fd)
+
+
+class Watcher:
+    def __init__(
+        self,
+        entries: Iterable["Entry"],
+        poll: bool = False,
+        interval: float = DEFAULT_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+    ) -> None:
+        """Initializes a Watcher object, probing every location.
+
+        Notes:
+            The locations are formatted once, when the watcher is created.
+
+        Args:
+            entries: The entries whose locations are watched.
+            poll: Poll the locations even if inotify is available?
+            interval: The shortest time between two polls, in seconds.
+            max_interval: The longest time between two polls, in seconds.
+
+        Raises:
+            FormatMapError: If a location has a placeholder that isn't in the format map.
+            ValueError: If the intervals aren't positive, or the shortest one is longer than the longest one.
+        """
+        if not 0 < interval <= max_interval:
+            raise ValueError("The intervals must be positive, and the shortest one can't be longer than the longest.")
+        self._names: Dict[Path, Tuple[str, ...]] = {}
+        for entry in entries:
+            for location in entry.locations:
+                self._names[location] = self._names.get(location, ()) + (entry.name,)
+        self._status: Dict[Path, LocationStatus] = {location: _probe(location) for location in self._names}
+        self._interval = interval
+        self._max_interval = max_interval
+        self._wait: float = interval
+        # the locations in each folder, by name
+        self._children: Dict[Path, Dict[str, Path]] = {}
+        # the locations and every folder above them, which being created or removed changes the folders to watch
+        self._folders_of_interest: Set[Path] = set(self._names)
+        for location in self._names:
+            self._children.setdefault(location.parent, {})[location.name] = location
+            self._folders_of_interest.update(location.parents)
+        self._inotify: Optional[_Inotify] = None
+        # set by close(), another thread can close the watcher while it waits for changes
+        self._closed: threading.Event = threading.Event()
+        self._lock: threading.Lock = threading.Lock()
+        # whether a thread is waiting for inotify events or handling them, it closes inotify once the watcher is closed
+        self._reading: bool = False
+        # the watch descriptor of each watched folder, and the folder each location is watched from
+        self._descriptors: Dict[Path, int] = {}
+        self._folders: Dict[int, Path] = {}
+        self._watched_from: Dict[Path, Path] = {}
+        # the locations whose folder can't be watched (when inotify runs out of watches), polled instead
+        self._polled: Set[Path] = set()
+        if not poll and self._names:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError, TypeError):
+                self._inotify = None
+            else:
+                self._arm()
+
+    @property
+    def backend(self) -> str:
+        """The backend telling what to probe again.
+
+        Returns:
+            'inotify' or 'poll'.
+        """
+        return INOTIFY if self._inotify is not None else POLL
+
+    @property
+    def locations(self) -> List[Path]:
+        """The watched locations.
+
+        Returns:
+            The locations.
+        """
+        return list(self._names)
+
+    @property
+    def watch_count(self) -> int:
+        """How many folders are watched with inotify.
+
+        Returns:
+            The number of inotify watches, 0 when polling.
+        """
+        return len(self._descriptors)
+
+    @property
+    def polled(self) -> List[Path]:
+        """The locations polled because their folder can't be watched with inotify, when it runs out of watches.
+
+        Returns:
+            The locations, all of them when polling.
+        """
+        return list(self._names) if self._inotify is None else sorted(self._polled)
+
+    def status(self, path: Path) -> LocationStatus:
+        """The last known status of a location.
+
+        Args:
+            path: The location.
+
+        Returns:
+            The status.
+
+        Raises:
+            KeyError: If the location isn't watched.
+        """
+        return self._status[path]
+
+    @staticmethod
+    def _existing(folder: Path) -> Path:
+        """Finds the closest existing folder.
+
+        Args:
+            folder: The folder.
+
+        Returns:
+            The folder if it exists, else its closest existing parent.
+        """
+        while not folder.is_dir() and folder.parent != folder:
+            folder = folder.parent
+        return folder
+
+    def _arm(self) -> Set[Path]:
+        """Picks the folders to watch, and watches them.
+
+        Notes:
+            Every location is watched from its folder (or its closest existing parent), and the locations that are
+            folders are watched themselves. The locations whose folder can't be watched, because inotify ran out of
+            watches, are polled until it can.
+
+        Returns:
+            The locations whose watched folder changed, which could have changed unnoticed.
+        """
+        assert self._inotify is not None
+        folders: Dict[Path, Path] = {}
+        for folder in self._children:
+            folders[folder] = self._existing(folder)
+        for location, status in self._status.items():
+            if status.is_dir:
+                folders[location] = location
+        moved: Set[Path] = set()
+        for location in self._names:
+            watched: Path = folders[location.parent]
+            if self._watched_from.get(location) != watched:
+                moved.add(location)
+                self._watched_from[location] = watched
+        wanted: Set[Path] = set(folders.values())
+        for folder in set(self._descriptors) - wanted:
+            self._inotify.remove(self._descriptors.pop(folder))
+        unwatched: Set[Path] = set()
+        for folder in wanted - set(self._descriptors):
+            try:
+                self._descriptors[folder] = self._inotify.add(folder)
+            except OSError as error:
+                if error.errno not in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):  # not removed since, or unreadable
+                    unwatched.add(folder)
+        self._folders = {descriptor: folder for folder, descriptor in self._descriptors.items()}
+        self._polled = {
+            location
+            for location, watched in self._watched_from.items()
+            if watched in unwatched or location in unwatched
+        }
+        return moved
+
+    def _affected(self, events: List[Tuple[int, int, str]]) -> Tuple[Set[Path], bool]:
+        """Finds the locations some inotify events are about.
+
+        Args:
+            events: The watch descriptor, mask and name of each event.
+
+        Returns:
+            The locations to probe again, and whether the folders to watch should be picked again.
+        """
+        assert self._inotify is not None
+        affected: Set[Path] = set()
+        rearm: bool = False
+        for descriptor, mask, name in events:
+            if mask & _IN_Q_OVERFLOW:
+                return set(self._names), True
+            folder: Optional[Path] = self._folders.get(descriptor)
+            if folder is None:
+                continue
+            if mask & _SELF_MASK:
+                # the folder is gone (or moved), its watch is dropped so that whatever is there now gets watched
+                del self._folders[descriptor]
+                if self._descriptors.pop(folder, None) is not None and not mask & _IN_IGNORED:
+                    self._inotify.remove(descriptor)
+                affected.update(location for location, watched in self._watched_from.items() if watched == folder)
+                rearm = True
+                continue
+            if folder in self._names:  # a location that is a folder changed
+                affected.add(folder)
+            location: Optional[Path] = self._children.get(folder, {}).get(name)
+            if location is not None:
+                affected.add(location)
+            if mask & _IN_ISDIR and mask & _REARM_MASK and (folder / name) in self._folders_of_interest:
+                rearm = True
+        return affected, rearm
+
+    def _diff(self, locations: Iterable[Path]) -> List[Event]:
+        """Probes locations again, and compares them to the last probe.
+
+        Args:
+            locations: The locations.
+
+        Returns:
+            The events, sorted by location.
+        """
+        events: List[Event] = []
+        for location in sorted(locations):
+            status: LocationStatus = _probe(location)
+            kind: Optional[str] = _changed(self._status[location], status)
+            self._status[location] = status
+            if kind is not None:
+                events.append(Event(kind, location, self._names[location]))
+        return events
+
+    def _read(self, timeout: Optional[float]) -> Optional[List[Event]]:
+        """Waits for inotify events and probes the locations they are about again, unless the watcher is closed.
+
+        Notes:
+            The locations whose folder can't be watched are probed again as well, after the poll interval.
+
+        Args:
+            timeout: How long to wait for the first event, in seconds. Nothing waits forever.
+
+        Returns:
+            The changes, or nothing if the watcher is closed.
+        """
+        with self._lock:
+            if self._closed.is_set():
+                return None
+            self._reading = True
+        try:
+            if self._polled:
+                timeout = self._wait if timeout is None else min(self._wait, timeout)
+            affected, rearm = self._affected(self._inotify.read(timeout))  # type: ignore
+            if self._closed.is_set():
+                return None
+            events: List[Event] = self._diff(affected | self._polled)
+            if self._polled:
+                self._wait = self._interval if events else min(self._wait * 2, self._max_interval)
+            if rearm:
+                # anything could have happened in the folders watched from now on before they were watched
+                events += self._diff(self._arm())
+        finally:
+            with self._lock:
+                self._reading = False
+                if self._closed.is_set():
+                    self._release()
+        return events
+
+    def poll(self, timeout: Optional[float] = None) -> List[Event]:
+        """Waits for locations to change.
+
+        Args:
+            timeout: How long to wait, in seconds. Nothing waits until a location changes.
+
+        Returns:
+            The changes, or nothing if no location changed in time, or if the watcher is closed.
+        """
+        deadline: Optional[float] = None if timeout is None else time.monotonic() + timeout
+        while not self._closed.is_set():
+            remaining: Optional[float] = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._inotify is not None:
+                read: Optional[List[Event]] = self._read(remaining)
+                if read is None:
+                    break
+                events: List[Event] = read
+            elif self._names:
+                if self._closed.wait(self._wait if remaining is None else min(self._wait, remaining)):
+                    break
+                events = self._diff(self._names)
+                self._wait = self._interval if events else min(self._wait * 2, self._max_interval)
+            else:
+                if self._closed.wait(self._max_interval if remaining is None else min(self._max_interval, remaining)):
+                    break
+                events = []
+            if events or (deadline is not None and time.monotonic() >= deadline):
+                return events
+        return []
+
+    def __iter__(self) -> Iterator[Event]:
+        """Streams the changes, until the watcher is closed.
+
+        Returns:
+            The changes, as they come.
+        """
+        while self._names and not self._closed.is_set():
+            yield from self.poll()
+
+    def _release(self) -> None:
+        """Closes inotify, once no thread waits for its events.
+
+        Returns:
+            Nothing.
+        """
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+            self._descriptors.clear()
+            self._folders.clear()
+
+    def close(self) -> None:
+        """Stops watching.
+
+        Notes:
+            It can be called from another thread while the watcher waits for changes, the wait then returns nothing
+            and the iteration ends.
+
+        Returns:
+            Nothing.
+        """
+        with self._lock:
+            self._closed.set()
+            if self._reading:
+                self._inotify.wake()  # type: ignore
+            else:
+                self._release()
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} object: backend={self.backend} locations={len(self._names)} "
+            f"watches={self.watch_count} polled={len(self._polled)}>"
+        )